@@ -0,0 +1,68 @@
+import json
+
+from ai_safe_ops.findings import FindingWriter, iter_findings
+
+# The types of values a step can return, by name. A value of None means the step
+# produced nothing (e.g. no file was found) and is never written.
+ARTIFACT_TYPES = ("path", "paths", "findings", "json")
+
+
+def artifact_file_name(step_name: str, output_key: str) -> str:
+    """Returns the name of the file an artifact is written to when it is persisted."""
+    return f"{step_name}_{output_key}.txt"
+
+
+def check_artifact(artifact_type: str, value):
+    """
+    Checks that a value returned by a step matches its declared artifact type, so a
+    step returning the wrong thing fails itself rather than the steps consuming it.
+
+    Raises:
+        TypeError: If the value does not match the type.
+    """
+    if value is None:
+        return
+    if artifact_type == "path":
+        valid = isinstance(value, str)
+    elif artifact_type == "paths":
+        valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+    elif artifact_type == "findings":
+        valid = isinstance(value, list) and all(isinstance(item, dict) for item in value)
+    elif artifact_type == "json":
+        valid = True
+    else:
+        raise ValueError(f"Unknown artifact type '{artifact_type}'. Choose one of: {', '.join(ARTIFACT_TYPES)}.")
+    if not valid:
+        raise TypeError(f"Expected a '{artifact_type}' artifact, got {type(value).__name__}.")
+
+
+def write_artifact(artifact_type: str, value, path: str):
+    """
+    Writes an artifact in the file format the steps read: a path as plain text, a
+    list of paths or a JSON value as JSON, and findings as newline-delimited JSON.
+    Nothing is written for None.
+    """
+    if value is None:
+        return
+    if artifact_type == "path":
+        with open(path, "w") as f:
+            f.write(value)
+    elif artifact_type == "findings":
+        with FindingWriter(path) as writer:
+            writer.write_all(value)
+    else:
+        with open(path, "w") as f:
+            json.dump(value, f, indent=4)
+
+
+def read_artifact(artifact_type: str, path: str):
+    """Reads an artifact written by write_artifact, or returns None if it was never written."""
+    try:
+        if artifact_type == "findings":
+            return list(iter_findings(path))
+        with open(path, "r") as f:
+            if artifact_type == "path":
+                return f.read().strip() or None
+            return json.load(f)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from ai_safe_ops.main import run_workflow
+from ai_safe_ops.server import WORKFLOW_DIR, preload_steps
+from ai_safe_ops.telemetry import OTEL_EXPORTERS
+from ai_safe_ops.vulndb import default_vulndb_path
+
+# The number of repositories whose workflows run at the same time on the shared pool.
+DEFAULT_CONCURRENT_REPOS = 2
+PORTFOLIO_JSON = "portfolio_summary.json"
+PORTFOLIO_MARKDOWN = "portfolio_summary.md"
+
+
+def read_repository_list(list_file: str) -> list[dict]:
+    """
+    Reads the repositories of a batch from a text file (one path per line; blank
+    lines and lines starting with "#" are ignored) or a JSON manifest (a list of
+    paths or of {"path": ..., "name": ...} objects). Relative paths are resolved
+    against the directory of the list file.
+    """
+    with open(list_file, "r") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        entries = [entry if isinstance(entry, dict) else {"path": entry} for entry in json.loads(content)]
+    else:
+        entries = [{"path": line.strip()} for line in content.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    base_dir = os.path.dirname(os.path.abspath(list_file))
+    return [{**entry, "path": os.path.normpath(os.path.join(base_dir, os.path.expanduser(entry["path"])))} for entry in entries]
+
+
+def assign_names(repositories: list[dict]) -> list[dict]:
+    """Gives every repository a unique name, usable as a directory name, from its given name or its directory name."""
+    named = []
+    seen = set()
+    for repository in repositories:
+        base = re.sub(r"[^A-Za-z0-9._-]+", "_", repository.get("name") or os.path.basename(os.path.normpath(repository["path"]))) or "repository"
+        name, suffix = base, 2
+        while name in seen:
+            name, suffix = f"{base}-{suffix}", suffix + 1
+        seen.add(name)
+        named.append({**repository, "name": name})
+    return named
+
+
+def _start_workers(executor: ProcessPoolExecutor):
+    # The pool forks all of its workers on the first submission. Doing that before
+    # the per-repository threads start keeps threads out of the forked processes.
+    executor.submit(int).result()
+
+
+def summarize_run(repository: dict, run: dict, log_dir: str, wall_s: float, error: BaseException = None) -> dict:
+    """Returns the portfolio entry of one repository from the summary returned by run_workflow."""
+    entry = {
+        "name": repository["name"],
+        "path": repository["path"],
+        "status": "failed" if error is not None else "completed",
+        "wall_s": round(wall_s, 2),
+        "log_dir": log_dir,
+    }
+    if error is not None:
+        entry["error"] = str(error)
+        entry["failed_step"] = getattr(error, "step_name", None)
+        return entry
+
+    entry["reports"] = {key: path for key, path in run["reports"].items() if os.path.exists(path)}
+    entry["findings_by_step"] = {
+        step_name: metrics["findings"] for step_name, metrics in run["steps"].items() if metrics.get("findings") is not None
+    }
+    entry["findings"] = sum(entry["findings_by_step"].values())
+    # The governance report writes a JSON summary with the counts by risk level.
+    summary_file = entry["reports"].get("summary_file")
+    if summary_file:
+        try:
+            with open(summary_file, "r") as f:
+                summary = json.load(f)
+            entry["findings"] = summary.get("total", entry["findings"])
+            entry["by_risk"] = summary.get("by_risk", {})
+        except (OSError, json.JSONDecodeError):
+            pass
+    return entry
+
+
+def write_portfolio_summary(workflow_name: str, entries: list[dict], output_dir: str) -> dict:
+    """
+    Writes the portfolio summary of a batch as JSON and Markdown to `output_dir`.
+
+    Returns:
+        The summary: totals, findings by step across all repositories and one entry
+        per repository.
+    """
+    completed = [entry for entry in entries if entry["status"] == "completed"]
+    by_step, by_risk = {}, {}
+    for entry in completed:
+        for step_name, count in entry.get("findings_by_step", {}).items():
+            by_step[step_name] = by_step.get(step_name, 0) + count
+        for risk_level, count in entry.get("by_risk", {}).items():
+            by_risk[risk_level] = by_risk.get(risk_level, 0) + count
+    summary = {
+        "workflow": workflow_name,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repositories": len(entries),
+        "completed": len(completed),
+        "failed": len(entries) - len(completed),
+        "findings": sum(entry.get("findings", 0) for entry in completed),
+        "findings_by_step": by_step,
+        "by_risk": by_risk,
+        "wall_s": round(sum(entry["wall_s"] for entry in entries), 2),
+        "entries": entries,
+    }
+    with open(os.path.join(output_dir, PORTFOLIO_JSON), "w") as f:
+        json.dump(summary, f, indent=4)
+
+    with open(os.path.join(output_dir, PORTFOLIO_MARKDOWN), "w") as f:
+        f.write("# AI Safe Ops 360 - Portfolio Summary\n---\n")
+        f.write(f"\n*Workflow `{workflow_name}` on {summary['repositories']} repositories: "
+                f"{summary['completed']} completed, {summary['failed']} failed, {summary['findings']} finding(s).*\n")
+        if by_risk:
+            f.write("\n## Findings by Risk\n\n| Risk | Findings |\n| --- | ---: |\n")
+            for risk_level, count in by_risk.items():
+                f.write(f"| {risk_level} | {count} |\n")
+        if by_step:
+            f.write("\n## Findings by Step\n\n| Step | Findings |\n| --- | ---: |\n")
+            for step_name, count in sorted(by_step.items(), key=lambda item: -item[1]):
+                f.write(f"| {step_name} | {count} |\n")
+        f.write("\n## Repositories\n\n| Repository | Status | Findings | High | Duration | Report |\n| --- | --- | ---: | ---: | ---: | --- |\n")
+        for entry in sorted(entries, key=lambda entry: (entry["status"] != "failed", -entry.get("findings", 0), entry["name"])):
+            if entry["status"] == "failed":
+                f.write(f"| {entry['name']} | ❌ failed in `{entry.get('failed_step')}` | | | {entry['wall_s']:.1f}s | {entry['error']} |\n")
+                continue
+            report = entry["reports"].get("output_file") or entry["reports"].get("report_file") or ""
+            high = entry.get("by_risk", {}).get("High", "")
+            f.write(f"| {entry['name']} | ✅ | {entry['findings']} | {high} | {entry['wall_s']:.1f}s | {os.path.relpath(report, output_dir) if report else ''} |\n")
+    return summary
+
+
+def run_batch(
+    workflow_name: str,
+    repositories: list[dict],
+    output_dir: str,
+    max_workers: int = None,
+    concurrent_repos: int = DEFAULT_CONCURRENT_REPOS,
+    use_cache: bool = True,
+    offline: bool = False,
+    vulndb_path: str = None,
+    live_fallback: bool = False,
+    patterns_file: str = None,
+    run_store_path: str = None,
+    otel_exporter: str = "auto",
+    otel_endpoint: str = None,
+    preload: bool = True,
+    step_timeout: float = None,
+) -> dict:
+    """
+    Runs a workflow on many repositories with one warm process pool.
+
+    The workflow's step modules (and models, through their `preload()` hooks) are
+    loaded once in this process before the pool forks its workers, and the same
+    workers run the steps of every repository, so nothing is imported or loaded per
+    repository. Up to `concurrent_repos` workflows run at a time, which keeps the
+    pool busy while a run waits on a single long step. Each repository gets its own
+    log directory (named after it) in `output_dir` with its reports and workflow
+    log; protocol lines are prefixed with "[name] ". A failing repository is
+    recorded and the batch continues.
+
+    Args:
+        workflow_name: The name of the workflow to run.
+        repositories: The repositories, as {"path": ..., "name": ...} dicts (see read_repository_list).
+        output_dir: The directory for the per-repository reports and the portfolio summary.
+        max_workers: The number of worker processes. Defaults to the number of CPUs.
+        concurrent_repos: The number of repositories scanned at the same time.
+        use_cache: Use the step result cache.
+        offline: Never query live vulnerability services.
+        vulndb_path: A local vulnerability database for dependency scans.
+        live_fallback: Look up packages missing from that database on PyPI.
+        patterns_file: A YAML or JSON file with additional PII patterns.
+        run_store_path: Optional run store shared by all runs of the batch.
+        otel_exporter: How to export the spans of every run (see run_workflow).
+        otel_endpoint: The OTLP/HTTP traces endpoint.
+        preload: Load the step modules and models before the workers start.
+        step_timeout: The timeout of steps without one of their own. A timed-out step
+            fails its run but keeps its pool worker busy until it ends.
+
+    Returns:
+        The portfolio summary (see write_portfolio_summary).
+    """
+    workflow_file = os.path.join(WORKFLOW_DIR, f"{workflow_name}.json")
+    if not os.path.exists(workflow_file):
+        raise FileNotFoundError(f"Workflow file not found at {workflow_file}")
+    os.makedirs(output_dir, exist_ok=True)
+    repositories = assign_names(repositories)
+    if preload:
+        preload_steps(WORKFLOW_DIR, [workflow_name])
+
+    def scan(executor, repository):
+        log_dir = os.path.join(output_dir, repository["name"])
+        os.makedirs(log_dir, exist_ok=True)
+        workflow_inputs = {"path": repository["path"], "offline": offline, "live_fallback": live_fallback}
+        if vulndb_path:
+            workflow_inputs["vulndb_path"] = vulndb_path
+        if patterns_file:
+            workflow_inputs["patterns_file"] = patterns_file
+        started = time.perf_counter()
+        try:
+            run = run_workflow(
+                workflow_file, workflow_inputs, True, log_dir,
+                use_cache=use_cache, run_store_path=run_store_path,
+                otel_exporter=otel_exporter, otel_endpoint=otel_endpoint,
+                executor=executor, line_prefix=f"[{repository['name']}] ", step_timeout=step_timeout,
+            )
+        except Exception as e:
+            return summarize_run(repository, None, log_dir, time.perf_counter() - started, e)
+        return summarize_run(repository, run, log_dir, time.perf_counter() - started)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        _start_workers(executor)
+        with ThreadPoolExecutor(max_workers=max(1, concurrent_repos)) as repo_executor:
+            entries = list(repo_executor.map(lambda repository: scan(executor, repository), repositories))
+    return write_portfolio_summary(workflow_name, entries, output_dir)
+
+
+def build_batch_arg_parser() -> argparse.ArgumentParser:
+    """Returns the argument parser of the `batch` command."""
+    parser = argparse.ArgumentParser(prog="ai_safe_ops.main batch", description="Run a workflow on many repositories with shared warm workers.")
+    parser.add_argument("workflow_name", help="The name of the workflow JSON file.")
+    parser.add_argument("paths", nargs="*", help="The repositories to scan.")
+    parser.add_argument("--repos-file", help="A file listing the repositories to scan: one path per line, or a JSON list of paths or {path, name} objects.")
+    parser.add_argument("--output-dir", default=os.path.join(".ai-safe-ops", "batch", time.strftime("%Y%m%d_%H%M%S")), help="The directory for the per-repository reports and the portfolio summary.")
+    parser.add_argument("--max-workers", type=int, default=None, help="The number of worker processes shared by all repositories. Defaults to the number of CPUs.")
+    parser.add_argument("--concurrent-repos", type=int, default=DEFAULT_CONCURRENT_REPOS, help="The number of repositories scanned at the same time.")
+    parser.add_argument("--no-cache", action="store_true", help="Run every step, ignoring and not updating the step result cache.")
+    parser.add_argument("--no-preload", action="store_true", help="Do not import step modules and models before the workers start.")
+    parser.add_argument("--vulndb", help="A local vulnerability database for dependency scans. Defaults to .ai-safe-ops/vulndb.sqlite if it exists.", default=None)
+    parser.add_argument("--offline", action="store_true", help="Never query live vulnerability services.")
+    parser.add_argument("--live-fallback", action="store_true", help="Look up packages missing from the local vulnerability database on PyPI.")
+    parser.add_argument("--patterns-file", help="A YAML or JSON file with additional PII patterns for the data handling scan.", default=None)
+    parser.add_argument("--run-store", default=None, help="Record all runs of the batch in this SQLite run store.")
+    parser.add_argument("--otel-exporter", choices=OTEL_EXPORTERS, default="auto", help="How to export the OpenTelemetry spans of every run.")
+    parser.add_argument("--otel-endpoint", default=None, help="The OTLP/HTTP traces endpoint.")
+    parser.add_argument("--step-timeout", type=float, default=None, help="The timeout in seconds of every step without a timeout of its own in the workflow.")
+    return parser
+
+
+def run_batch_cli(args: argparse.Namespace) -> int:
+    """Runs a batch from parsed command line arguments. Returns 1 if any repository failed."""
+    repositories = [{"path": os.path.abspath(path)} for path in args.paths]
+    if args.repos_file:
+        repositories += read_repository_list(args.repos_file)
+    if not repositories:
+        print("Error: no repositories given; pass paths or --repos-file.", file=sys.stderr, flush=True)
+        return 1
+    vulndb_path = args.vulndb or (default_vulndb_path() if os.path.exists(default_vulndb_path()) else None)
+    output_dir = os.path.abspath(args.output_dir)
+    summary = run_batch(
+        args.workflow_name, repositories, output_dir,
+        max_workers=args.max_workers, concurrent_repos=args.concurrent_repos,
+        use_cache=not args.no_cache, offline=args.offline, vulndb_path=vulndb_path, live_fallback=args.live_fallback,
+        patterns_file=os.path.abspath(args.patterns_file) if args.patterns_file else None,
+        run_store_path=args.run_store, otel_exporter=args.otel_exporter, otel_endpoint=args.otel_endpoint,
+        preload=not args.no_preload, step_timeout=args.step_timeout,
+    )
+    print(f"BATCH_COMPLETE:{summary['completed']}/{summary['repositories']};;{os.path.join(output_dir, PORTFOLIO_MARKDOWN)}", flush=True)
+    return 1 if summary["failed"] else 0
@@ -0,0 +1,333 @@
+import argparse
+import errno
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ai_safe_ops.artifacts import artifact_file_name, read_artifact
+from ai_safe_ops.benchmarks.synthetic_repo import PINNED_PACKAGES, generate_repo, write_requirements
+from ai_safe_ops.main import resolve_input
+
+WORKFLOW_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "workflows")
+DEFAULT_WORKFLOWS = ("simple_ingestion_and_scan", "governance_workflow")
+DEFAULT_SCALES = (1000,)
+DEFAULT_WORKDIR = os.path.join(os.getcwd(), ".ai-safe-ops", "bench")
+# The number of pinned packages audited against the PyPI stand-in.
+DEFAULT_REQUIREMENTS = 200
+# Simulated round trip of a PyPI lookup, so the audit is not measured against a free network.
+DEFAULT_PYPI_LATENCY_MS = 20
+DEFAULT_TOLERANCE = 0.2
+# A metric only regresses if it also changed by more than this, so that tiny steps do not flap.
+NOISE_FLOORS = {"wall_s": 0.05, "cpu_s": 0.05, "peak_rss_mb": 5.0, "mb_per_s": 0.1}
+# Metrics where a lower value is worse; for all others a higher value is.
+HIGHER_IS_BETTER = {"mb_per_s"}
+
+# Runs a step function in a fresh interpreter with the (module, function, kwargs) read from stdin.
+STEP_RUNNER = "import json, sys; from ai_safe_ops.scheduler import execute_step; execute_step(*json.load(sys.stdin))"
+
+class _PyPIHandler(BaseHTTPRequestHandler):
+    """Answers /<name>/<version>/json like the PyPI JSON API; PINNED_PACKAGES are vulnerable."""
+
+    latency = 0.0
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 3 or parts[2] != "json":
+            self.send_error(404)
+            return
+        time.sleep(self.latency)
+        name, version = parts[:2]
+        vulnerabilities = []
+        if PINNED_PACKAGES.get(name) == version:
+            vulnerabilities.append({
+                "id": f"BENCH-{name.upper()}-1",
+                "fixed_in": ["999.0"],
+                "summary": f"Planted vulnerability in {name} {version}.",
+                "aliases": [],
+            })
+        body = json.dumps({"info": {"name": name, "version": version}, "vulnerabilities": vulnerabilities}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class PyPIStandIn:
+    """
+    A local stand-in for the PyPI JSON API, served from a background thread. Use as a
+    context manager; `url` is the base URL for PyPIVulnerabilityService or the
+    AI_SAFE_OPS_PYPI_URL environment variable.
+    """
+
+    def __init__(self, latency_ms: float = DEFAULT_PYPI_LATENCY_MS):
+        handler = type("PyPIHandler", (_PyPIHandler,), {"latency": latency_ms / 1000})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/pypi"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+def audit_pinned_requirements(requirements_file: str, output_file: str, pypi_url: str, max_workers: int = 10):
+    """
+    Audits a fully pinned requirements file against a PyPI service. This is the
+    lookup half of scan_dependencies; resolving a manifest with pip-audit needs a
+    real package index and is not part of the benchmark.
+    """
+    from ai_safe_ops.steps.scan.scan_dependencies import audit_dependencies
+    from ai_safe_ops.vulndb import PyPIVulnerabilityService, normalize_name
+
+    dependencies = {}
+    with open(requirements_file, "r") as f:
+        for line in f:
+            name, _, version = line.strip().partition("==")
+            if name and version:
+                dependencies[(normalize_name(name), version)] = {"name": name, "manifests": [os.path.basename(requirements_file)]}
+    with PyPIVulnerabilityService(pypi_url, pool_size=max_workers) as service:
+        results = audit_dependencies(dependencies, service, max_workers)
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=4)
+
+def measure(command: list[str], stdin_data: str = None, cwd: str = None, env: dict = None) -> dict:
+    """
+    Runs a command and measures it with the rusage of the child process.
+
+    On Linux the rusage of a child includes the CPU time of the processes it waited
+    for (e.g. the workers of a process pool) and its peak RSS is that of the largest
+    of them.
+
+    Returns:
+        wall_s, cpu_s (user + system) and peak_rss_mb, plus an "error" with the last
+        line of stderr if the command failed.
+    """
+    with open(os.devnull, "w") as devnull, tempfile.TemporaryFile() as stderr_file:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=devnull, stderr=stderr_file, cwd=cwd, env=env, text=True
+        )
+        if stdin_data is not None:
+            process.stdin.write(stdin_data)
+        process.stdin.close()
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        rss_bytes = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        result = {
+            "wall_s": round(wall, 3),
+            "cpu_s": round(usage.ru_utime + usage.ru_stime, 3),
+            "peak_rss_mb": round(rss_bytes / (1024 * 1024), 1),
+        }
+        if process.returncode != 0:
+            stderr_file.seek(0)
+            lines = [line for line in stderr_file.read().decode("utf-8", "replace").splitlines() if line.strip()]
+            result["error"] = lines[-1] if lines else f"exit code {process.returncode}"
+    return result
+
+def _with_throughput(result: dict, repo_bytes: int) -> dict:
+    if "error" not in result and result["wall_s"] > 0:
+        result["mb_per_s"] = round(repo_bytes / (1024 * 1024) / result["wall_s"], 2)
+    return result
+
+def load_workflow(workflow_name: str) -> dict:
+    with open(os.path.join(WORKFLOW_DIR, f"{workflow_name}.json"), "r") as f:
+        return json.load(f)
+
+def step_kwargs(step: dict, workflow: dict, workflow_inputs: dict, source_dir: str, output_dir: str) -> dict:
+    """
+    Resolves the inputs of a workflow step like the workflow runner does, reading the
+    outputs of upstream steps from `source_dir` (the log directory of a workflow run)
+    and writing the step's own outputs to `output_dir`. Returned artifacts are read
+    back from the files the workflow run persisted them to.
+    """
+    def output_path(value):
+        return os.path.join(source_dir, value.replace("{workflow.outputs.", "").replace("}", "") + ".txt")
+
+    steps_by_name = {s["name"]: s for s in workflow["steps"]}
+
+    def output_file(step_name, output_key):
+        return output_path(steps_by_name[step_name]["outputs"][output_key])
+
+    def artifact_value(step_name, output_key):
+        artifact_path = os.path.join(source_dir, artifact_file_name(step_name, output_key))
+        if not os.path.exists(artifact_path):
+            raise FileNotFoundError(errno.ENOENT, "Artifact not written by the workflow run", artifact_path)
+        return read_artifact(steps_by_name[step_name]["returns"][output_key], artifact_path)
+
+    kwargs = {
+        key: resolve_input(key, value, workflow, workflow_inputs, output_dir, output_file, artifact_value)
+        for key, value in step["inputs"].items()
+    }
+    for key, value in step["outputs"].items():
+        kwargs[key] = os.path.join(output_dir, os.path.basename(output_path(value)))
+    return kwargs
+
+def benchmark_workflow(workflow_name: str, repo: dict, workdir: str, env: dict) -> dict:
+    """
+    Runs a workflow end to end, then each of its steps on its own in a fresh
+    interpreter, reusing the outputs of the workflow run as the inputs of each step.
+    The step result cache is disabled throughout.
+    """
+    workflow = load_workflow(workflow_name)
+    log_dir = os.path.join(workdir, workflow_name, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    command = [sys.executable, "-m", "ai_safe_ops.main", workflow_name, repo["root"], "--no-cache", "--enable-local-logs", "--log-dir", log_dir]
+    result = {"workflow": _with_throughput(measure(command, cwd=workdir, env=env), repo["bytes"]), "steps": {}}
+
+    workflow_inputs = {"path": repo["root"], "offline": False}
+    for step in workflow["steps"]:
+        step_dir = os.path.join(workdir, workflow_name, "steps", step["name"])
+        os.makedirs(step_dir, exist_ok=True)
+        try:
+            kwargs = step_kwargs(step, workflow, workflow_inputs, log_dir, step_dir)
+        except FileNotFoundError as e:
+            result["steps"][step["name"]] = {"error": f"Missing input from the workflow run: {e.filename}"}
+            continue
+        payload = json.dumps([step["module"], step["function"], kwargs])
+        measured = measure([sys.executable, "-c", STEP_RUNNER], payload, cwd=workdir, env=env)
+        result["steps"][step["name"]] = _with_throughput(measured, repo["bytes"])
+    return result
+
+def benchmark_dependency_audit(workdir: str, count: int, pypi_url: str, env: dict) -> dict:
+    """Audits `count` pinned requirements against the PyPI stand-in, in a fresh interpreter."""
+    requirements_file = os.path.join(workdir, "requirements.txt")
+    write_requirements(requirements_file, count)
+    kwargs = {"requirements_file": requirements_file, "output_file": os.path.join(workdir, "audit.json"), "pypi_url": pypi_url}
+    payload = json.dumps(["ai_safe_ops.benchmarks.pipeline", "audit_pinned_requirements", kwargs])
+    result = measure([sys.executable, "-c", STEP_RUNNER], payload, cwd=workdir, env=env)
+    result["packages"] = count
+    if "error" not in result and result["wall_s"] > 0:
+        result["packages_per_s"] = round(count / result["wall_s"], 1)
+    return result
+
+def prepare_repo(workdir: str, num_files: int, seed: int) -> dict:
+    """Generates the synthetic repository of a scale, or reuses the one generated before with the same seed."""
+    root = os.path.join(workdir, f"repo-{num_files}-{seed}")
+    description_file = root + ".json"
+    if os.path.exists(description_file):
+        with open(description_file, "r") as f:
+            return json.load(f)
+    repo = generate_repo(root, num_files, seed)
+    with open(description_file, "w") as f:
+        json.dump(repo, f, indent=4)
+    return repo
+
+def run_pipeline_benchmark(
+    scales: list[int],
+    workflows: list[str] = DEFAULT_WORKFLOWS,
+    workdir: str = DEFAULT_WORKDIR,
+    seed: int = 0,
+    requirements: int = DEFAULT_REQUIREMENTS,
+    pypi_latency_ms: float = DEFAULT_PYPI_LATENCY_MS,
+) -> dict:
+    """
+    Benchmarks every workflow and every step on synthetic repositories of the given
+    sizes (in files). Dependency lookups go to a local PyPI stand-in, which the
+    workflows are also pointed at, so nothing reaches pypi.org.
+
+    Returns:
+        The results, keyed by scale: the repository description, and wall time, CPU
+        time, peak RSS and throughput (MB of repository per second) of every workflow
+        and step, plus the dependency audit.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    results = {"python": sys.version.split()[0], "platform": sys.platform, "cpus": os.cpu_count(), "scales": {}}
+    with PyPIStandIn(pypi_latency_ms) as pypi:
+        env = {**os.environ, "AI_SAFE_OPS_PYPI_URL": pypi.url}
+        for num_files in scales:
+            repo = prepare_repo(workdir, num_files, seed)
+            scale_dir = os.path.join(workdir, f"run-{num_files}")
+            scale = {"repo": repo, "workflows": {}}
+            for workflow_name in workflows:
+                scale["workflows"][workflow_name] = benchmark_workflow(workflow_name, repo, scale_dir, env)
+            scale["dependency_audit"] = benchmark_dependency_audit(scale_dir, requirements, pypi.url, env)
+            results["scales"][str(num_files)] = scale
+    return results
+
+def _measurements(results: dict):
+    """Yields (name, measurement) for every workflow, step and audit measurement in the results."""
+    for scale, entry in results.get("scales", {}).items():
+        for workflow_name, workflow in entry.get("workflows", {}).items():
+            yield f"{scale}/{workflow_name}", workflow["workflow"]
+            for step_name, measured in workflow["steps"].items():
+                yield f"{scale}/{workflow_name}/{step_name}", measured
+        if "dependency_audit" in entry:
+            yield f"{scale}/dependency_audit", entry["dependency_audit"]
+
+def compare_results(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[dict]:
+    """
+    Compares benchmark results with a baseline. A metric regresses if it is worse by
+    more than `tolerance` (a fraction of the baseline) and by more than its noise floor.
+    A measurement that failed now but not in the baseline is a regression as well.
+
+    Returns:
+        The regressions, each with its measurement name, metric, baseline and current value.
+    """
+    baseline_measurements = dict(_measurements(baseline))
+    regressions = []
+    for name, measured in _measurements(current):
+        before = baseline_measurements.get(name)
+        if before is None or "error" in before:
+            continue
+        if "error" in measured:
+            regressions.append({"name": name, "metric": "error", "baseline": None, "current": measured["error"]})
+            continue
+        for metric, floor in NOISE_FLOORS.items():
+            if metric not in measured or metric not in before:
+                continue
+            change = measured[metric] - before[metric]
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > floor and change > tolerance * before[metric]:
+                regressions.append({"name": name, "metric": metric, "baseline": before[metric], "current": measured[metric]})
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the workflows and their steps on synthetic repositories.")
+    parser.add_argument("--files", type=int, nargs="+", default=list(DEFAULT_SCALES), help="The repository sizes to benchmark, in files (e.g. 1000 100000 1000000).")
+    parser.add_argument("--workflow", action="append", default=None, help="A workflow to benchmark (repeatable). Defaults to all.")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR, help="The directory for the generated repositories and run outputs.")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed of the generated repositories.")
+    parser.add_argument("--requirements", type=int, default=DEFAULT_REQUIREMENTS, help="The number of pinned packages in the dependency audit.")
+    parser.add_argument("--pypi-latency-ms", type=float, default=DEFAULT_PYPI_LATENCY_MS, help="The simulated latency of the PyPI stand-in.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results with this results file and exit with 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="The relative slowdown tolerated before a metric regresses.")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir)
+    results = run_pipeline_benchmark(args.files, args.workflow or DEFAULT_WORKFLOWS, workdir, args.seed, args.requirements, args.pypi_latency_ms)
+
+    for name, measured in _measurements(results):
+        if "error" in measured:
+            print(f"{name:<70} failed: {measured['error']}")
+            continue
+        throughput = f"{measured['mb_per_s']:>8.2f} MB/s" if "mb_per_s" in measured else f"{measured.get('packages_per_s', 0):>8.1f} pkg/s"
+        print(f"{name:<70} {measured['wall_s']:>8.2f}s wall {measured['cpu_s']:>8.2f}s cpu {measured['peak_rss_mb']:>8.1f} MB  {throughput}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare_results(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']} {regression['metric']}: {regression['baseline']} -> {regression['current']}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+WORKFLOW_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "workflows")
+DEFAULT_BUDGET_FILE = os.path.join(os.path.dirname(__file__), "import_budgets.json")
+# The workflow runner itself is measured along with the step modules.
+RUNNER_MODULE = "ai_safe_ops.main"
+
+# Matches a line of `python -X importtime` output, e.g. "import time:   512 |   1830 |   json".
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+def step_modules(workflow_dir: str = WORKFLOW_DIR) -> list[str]:
+    """Returns the step modules used by the workflows in `workflow_dir`."""
+    modules = set()
+    for file_name in os.listdir(workflow_dir):
+        if file_name.endswith(".json"):
+            with open(os.path.join(workflow_dir, file_name), "r") as f:
+                modules.update(step["module"] for step in json.load(f)["steps"])
+    return sorted(modules)
+
+def parse_import_times(output: str, package: str = "ai_safe_ops") -> tuple[float, list]:
+    """
+    Parses `-X importtime` output. Returns the total import time in milliseconds of
+    the top-level imports of `package` (which includes everything they import), and
+    the (module, self time in ms) of every import made on their behalf, heaviest first.
+    Interpreter startup imports are not counted.
+    """
+    total_us = 0
+    imports = []
+    # Nested imports are listed before the import that triggered them.
+    nested = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        nested.append((name, int(self_us) / 1000))
+        if indent:
+            continue
+        if name == package or name.startswith(package + "."):
+            total_us += int(cumulative_us)
+            imports.extend(nested)
+        nested = []
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, imports
+
+def measure_import_time(module_name: str, repeat: int = 3, top: int = 5) -> dict:
+    """
+    Imports a module in `repeat` fresh interpreters with `-X importtime` and keeps the
+    fastest run.
+
+    Returns:
+        A dict with the module, its import time in milliseconds and its `top` heaviest
+        imports, or an "error" if the module cannot be imported.
+    """
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return {"module": module_name, "error": result.stderr.strip().splitlines()[-1]}
+        total_ms, imports = parse_import_times(result.stderr)
+        if best is None or total_ms < best[0]:
+            best = (total_ms, imports)
+
+    return {
+        "module": module_name,
+        "import_ms": round(best[0], 1),
+        "heaviest": [{"module": name, "self_ms": round(self_ms, 1)} for name, self_ms in best[1][:top]],
+    }
+
+def load_budgets(budget_file: str) -> dict:
+    """Loads an import budget file: {"default_ms": ..., "modules": {module: ms}}."""
+    with open(budget_file, "r") as f:
+        return json.load(f)
+
+def run_startup_benchmark(modules: list[str], budgets: dict, repeat: int = 3) -> list[dict]:
+    """
+    Measures the import time of every module and compares it with its budget.
+    Each result has "over_budget" set if the import took longer than its budget
+    or failed.
+    """
+    results = []
+    for module_name in modules:
+        result = measure_import_time(module_name, repeat)
+        result["budget_ms"] = budgets.get("modules", {}).get(module_name, budgets["default_ms"])
+        result["over_budget"] = "error" in result or result["import_ms"] > result["budget_ms"]
+        results.append(result)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the import time of the workflow runner and every step module.")
+    parser.add_argument("--budget-file", default=DEFAULT_BUDGET_FILE, help="A JSON file with the import time budgets in ms.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Override the default budget of every module without its own budget.")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of imports per module; the fastest is reported.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    budgets = load_budgets(args.budget_file)
+    if args.budget_ms is not None:
+        budgets["default_ms"] = args.budget_ms
+    results = run_startup_benchmark([RUNNER_MODULE, *step_modules()], budgets, args.repeat)
+
+    for result in results:
+        status = "OVER BUDGET" if result["over_budget"] else "ok"
+        if "error" in result:
+            print(f"{result['module']:<55} {'failed':>10}  {status}: {result['error']}")
+            continue
+        heaviest = ", ".join(f"{item['module']} {item['self_ms']}ms" for item in result["heaviest"][:3])
+        print(f"{result['module']:<55} {result['import_ms']:>8.1f}ms / {result['budget_ms']}ms  {status}  ({heaviest})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if any(result["over_budget"] for result in results):
+        sys.exit(1)
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import random
+import string
+
+# Files per directory of the generated tree.
+FILES_PER_DIR = 200
+# The share of files of each kind; everything else is Python source.
+FILE_KINDS = (("yaml", 0.08), ("json", 0.05), ("env", 0.02), ("md", 0.10))
+# Real packages pinned in generated requirements, at versions with known advisories.
+PINNED_PACKAGES = {"requests": "2.19.0", "pyyaml": "5.3", "jinja2": "2.10", "urllib3": "1.24.1", "flask": "0.12"}
+BIAS_TERMS = ("master", "slave", "blacklist", "whitelist")
+CONFIG_SECRET_KEYS = ("password", "api_key", "secret_key")
+
+WORDS = (
+    "alpha beta gamma delta request response handler client server record value index "
+    "buffer stream parse render update delete create fetch store cache queue worker"
+).split()
+
+def _aws_key(rng: random.Random) -> str:
+    return "AKIA" + "".join(rng.choices(string.ascii_uppercase + string.digits, k=16))
+
+def _email(rng: random.Random) -> str:
+    return f"{rng.choice(WORDS)}.{rng.randrange(10_000)}@example.com"
+
+def _identifier(rng: random.Random) -> str:
+    return f"{rng.choice(WORDS)}_{rng.choice(WORDS)}"
+
+class _Planter:
+    """Decides, with a fixed rate, which generated lines carry a planted finding, and counts them."""
+
+    def __init__(self, rng: random.Random, rate: float):
+        self.rng = rng
+        self.rate = rate
+        self.planted = {"pii": 0, "secrets": 0, "config_keys": 0, "bias_terms": 0}
+
+    def plant(self, kind: str) -> bool:
+        if self.rng.random() < self.rate:
+            self.planted[kind] += 1
+            return True
+        return False
+
+def _python_file(rng: random.Random, planter: _Planter, lines: int) -> str:
+    out = ["import os", "import json", ""]
+    for i in range(lines):
+        name = _identifier(rng)
+        if planter.plant("secrets"):
+            out.append(f'AWS_ACCESS_KEY_ID_{i} = "{_aws_key(rng)}"')
+        elif planter.plant("pii"):
+            out.append(f'CONTACT_{i} = "{_email(rng)}"')
+        elif planter.plant("bias_terms"):
+            out.append(f"# TODO: rename the {rng.choice(BIAS_TERMS)} branch handling")
+        elif i % 6 == 0:
+            out.append(f"def {name}_{i}(value):")
+        else:
+            out.append(f"    {name} = json.dumps({{'{rng.choice(WORDS)}': value, 'n': {i}}})  # {rng.choice(WORDS)}")
+    return "\n".join(out) + "\n"
+
+def _config_entries(rng: random.Random, planter: _Planter, count: int) -> dict:
+    entries = {}
+    for i in range(count):
+        if planter.plant("config_keys"):
+            entries[f"{rng.choice(CONFIG_SECRET_KEYS)}_{i}"] = "changeme"
+        else:
+            entries[f"{rng.choice(WORDS)}_{i}"] = rng.choice(WORDS)
+    return entries
+
+def _markdown_file(rng: random.Random, planter: _Planter, lines: int) -> str:
+    out = [f"# {rng.choice(WORDS).title()}", ""]
+    for _ in range(lines):
+        sentence = " ".join(rng.choices(WORDS, k=10))
+        if planter.plant("pii"):
+            sentence += f" Contact {_email(rng)} or call 555-123-{rng.randrange(1000, 9999)}."
+        elif planter.plant("bias_terms"):
+            sentence += f" Push to the {rng.choice(BIAS_TERMS)} node."
+        out.append(sentence)
+    return "\n".join(out) + "\n"
+
+def generate_repo(root: str, num_files: int, seed: int = 0, plant_rate: float = 0.02, lines_per_file: int = 40) -> dict:
+    """
+    Generates a synthetic repository with planted PII, secrets, secret config keys and
+    biased terms.
+
+    The tree holds Python sources, YAML/JSON/dotenv configuration and Markdown
+    documents in directories of FILES_PER_DIR files, plus a README. It has no
+    dependency manifest, as resolving one needs a package index (see
+    write_requirements). The same arguments always produce the same tree.
+
+    Args:
+        root: The directory to generate the repository in.
+        num_files: The number of generated files (besides the README).
+        seed: The random seed.
+        plant_rate: The probability of a generated line (or config entry) carrying a
+            planted finding of each kind.
+        lines_per_file: The number of lines (or config entries) per file.
+
+    Returns:
+        A description of the repository: its file count, total size and the number of
+        planted findings of each kind.
+    """
+    rng = random.Random(seed)
+    planter = _Planter(rng, plant_rate)
+    os.makedirs(root, exist_ok=True)
+    total_bytes = 0
+
+    for index in range(num_files):
+        directory = os.path.join(root, f"pkg_{index // FILES_PER_DIR:05d}")
+        if index % FILES_PER_DIR == 0:
+            os.makedirs(directory, exist_ok=True)
+        draw = rng.random()
+        kind = "py"
+        for candidate, share in FILE_KINDS:
+            if draw < share:
+                kind = candidate
+                break
+            draw -= share
+
+        if kind == "py":
+            name, content = f"module_{index}.py", _python_file(rng, planter, lines_per_file)
+        elif kind == "yaml":
+            entries = _config_entries(rng, planter, lines_per_file // 4)
+            name, content = f"config_{index}.yaml", "".join(f"{key}: {value}\n" for key, value in entries.items())
+        elif kind == "json":
+            name, content = f"settings_{index}.json", json.dumps(_config_entries(rng, planter, lines_per_file // 4), indent=2)
+        elif kind == "env":
+            entries = _config_entries(rng, planter, lines_per_file // 4)
+            name, content = f"service_{index}.env", "".join(f"{key.upper()}={value}\n" for key, value in entries.items())
+        else:
+            name, content = f"notes_{index}.md", _markdown_file(rng, planter, lines_per_file // 2)
+
+        data = content.encode("utf-8")
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+        total_bytes += len(data)
+
+    readme = "# Synthetic benchmark repository\n"
+    with open(os.path.join(root, "README.md"), "w") as f:
+        f.write(readme)
+    total_bytes += len(readme)
+
+    return {"root": os.path.abspath(root), "files": num_files + 1, "bytes": total_bytes, "seed": seed, "planted": planter.planted}
+
+def write_requirements(output_file: str, count: int) -> dict:
+    """
+    Writes a fully pinned requirements file with PINNED_PACKAGES followed by synthetic
+    packages, `count` entries in total. Returns the pinned {name: version}.
+    """
+    pins = dict(list(PINNED_PACKAGES.items())[:count])
+    for i in range(count - len(pins)):
+        pins[f"synthetic-lib-{i}"] = f"1.0.{i % 50}"
+    with open(output_file, "w") as f:
+        f.write("".join(f"{name}=={version}\n" for name, version in pins.items()))
+    return pins
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic repository for benchmarks.")
+    parser.add_argument("root", help="The directory to generate the repository in.")
+    parser.add_argument("--files", type=int, default=1000, help="The number of files to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed.")
+    parser.add_argument("--plant-rate", type=float, default=0.02, help="The probability of a line carrying a planted finding.")
+    args = parser.parse_args()
+    print(json.dumps(generate_repo(args.root, args.files, args.seed, args.plant_rate), indent=4))
@@ -0,0 +1,338 @@
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import time
+import uuid
+from functools import lru_cache
+
+DEFAULT_CACHE_MAX_SIZE_MB = 1024
+PACKAGE_NAME = "ai_safe_ops"
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Directories that never influence step results and are skipped when fingerprinting a codebase.
+FINGERPRINT_SKIP_DIRS = {".git", ".ai-safe-ops"}
+# The number of files whose stat fingerprints an ignored directory (virtualenvs and
+# build output can hold hundreds of thousands).
+IGNORED_DIR_MAX_FILES = 10000
+
+@lru_cache(maxsize=None)
+def package_version() -> str:
+    """Returns the installed ai-safe-ops version (importlib.metadata is slow to import, so it is loaded on first use)."""
+    from importlib import metadata
+
+    try:
+        return metadata.version("ai-safe-ops")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def file_digest(file_path: str) -> str:
+    """Returns the SHA-256 digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_porcelain(status: str) -> list[tuple[str, str, str]]:
+    """
+    Parses `git status --porcelain -z` output into (code, path, original path)
+    records. Renames and copies carry their original path as an extra NUL-separated
+    field; the original path is None for every other record.
+    """
+    fields = status.split("\0")
+    records = []
+    index = 0
+    while index < len(fields):
+        entry = fields[index]
+        index += 1
+        if not entry:
+            continue
+        code, path = entry[:2], entry[3:]
+        original = None
+        if "R" in code or "C" in code:
+            original = fields[index]
+            index += 1
+        records.append((code, path, original))
+    return records
+
+
+def _git_fingerprint(directory: str):
+    """
+    Fingerprints a git work tree by its HEAD commit plus the content of all modified
+    and untracked files, and the size and mtime of ignored files (steps such as
+    scan_config_files read ignored files like .env). Git lists an ignored directory
+    as a single entry; the files underneath it are fingerprinted by their stat, up
+    to IGNORED_DIR_MAX_FILES of them. Returns None if the directory is not inside a
+    git work tree.
+    """
+    try:
+        top_level, head = subprocess.run(
+            ["git", "-C", directory, "rev-parse", "--show-toplevel", "HEAD"],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        status = subprocess.run(
+            ["git", "-C", directory, "status", "--porcelain", "-z", "--untracked-files=all", "--", "."],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        # With --untracked-files=all git would list every file of an ignored tree;
+        # without it, an ignored directory is a single entry.
+        ignored = subprocess.run(
+            ["git", "-C", directory, "status", "--porcelain", "-z", "--ignored", "--", "."],
+            check=True, capture_output=True, text=True,
+        ).stdout
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return None
+
+    records = _parse_porcelain(status) + [record for record in _parse_porcelain(ignored) if record[0] == "!!"]
+    digest = hashlib.sha256(head.encode())
+    for code, relative_path, original_path in sorted(records, key=lambda record: record[1]):
+        # Porcelain paths are relative to the repository root.
+        if FINGERPRINT_SKIP_DIRS & set(relative_path.split("/")):
+            continue
+        digest.update(f"{code} {relative_path}\0{original_path or ''}\0".encode())
+        changed_path = os.path.join(top_level, relative_path)
+        if code == "!!":
+            # Ignored trees can be large (virtualenvs, build output); their stat is enough.
+            if os.path.isdir(changed_path):
+                _update_stat_digest(digest, changed_path, IGNORED_DIR_MAX_FILES)
+                continue
+            try:
+                stat = os.stat(changed_path)
+            except OSError:
+                continue
+            digest.update(f"{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        elif os.path.isfile(changed_path):
+            digest.update(file_digest(changed_path).encode())
+    return digest.hexdigest()
+
+
+def _update_stat_digest(digest, directory: str, max_files: int = None):
+    """Adds the relative path, size and mtime of every file in a directory tree, or of its first `max_files`, to a digest."""
+    count = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d not in FINGERPRINT_SKIP_DIRS)
+        for name in sorted(files):
+            if max_files is not None and count >= max_files:
+                return
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(file_path, directory)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+            count += 1
+
+
+def _stat_fingerprint(directory: str) -> str:
+    """Fingerprints a directory tree by the relative path, size and mtime of every file."""
+    digest = hashlib.sha256()
+    _update_stat_digest(digest, directory)
+    return digest.hexdigest()
+
+
+def directory_fingerprint(directory: str) -> str:
+    """Returns a fingerprint that changes whenever the content of a directory tree changes."""
+    return _git_fingerprint(directory) or _stat_fingerprint(directory)
+
+
+def _imported_modules(source_path: str) -> set[str]:
+    """Returns the names of the ai_safe_ops modules a source file imports, including deferred imports."""
+    with open(source_path, "rb") as f:
+        tree = ast.parse(f.read(), filename=source_path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+            # "from ai_safe_ops import progress" imports a submodule.
+            names.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return {name for name in names if name == PACKAGE_NAME or name.startswith(PACKAGE_NAME + ".")}
+
+
+def _module_source(module_name: str):
+    """Returns the source file of a module, or None. ai_safe_ops modules are located without importing them."""
+    if module_name == PACKAGE_NAME or module_name.startswith(PACKAGE_NAME + "."):
+        base = os.path.join(PACKAGE_DIR, *module_name.split(".")[1:])
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                return candidate
+        # A name imported from a module rather than a submodule.
+        return None
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return None
+    return spec.origin
+
+
+@lru_cache(maxsize=None)
+def _module_digest(module_name: str) -> str:
+    """
+    Returns a digest of a step module's source and of every ai_safe_ops module it
+    imports, directly or transitively, so a change to a shared helper (detection
+    patterns, report writers, ...) invalidates the cached results of the steps using it.
+    """
+    pending = [module_name]
+    sources = {}
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        sources[name] = _module_source(name)
+        if sources[name] is not None:
+            pending.extend(_imported_modules(sources[name]) - sources.keys())
+
+    digest = hashlib.sha256()
+    for name in sorted(name for name, source in sources.items() if source is not None):
+        digest.update(f"{name}\0{file_digest(sources[name])}\n".encode())
+    return digest.hexdigest() if sources.get(module_name) else module_name
+
+
+def _fingerprint_input(value, artifact_paths: set):
+    if isinstance(value, list):
+        return [_fingerprint_input(item, artifact_paths) for item in value]
+    if isinstance(value, str):
+        if value in artifact_paths:
+            # Artifact paths differ on every run; only their content matters.
+            return {"artifact": file_digest(value) if os.path.isfile(value) else None}
+        if os.path.isfile(value):
+            return {"file": os.path.abspath(value), "digest": file_digest(value)}
+        if os.path.isdir(value):
+            return {"dir": os.path.abspath(value), "fingerprint": directory_fingerprint(value)}
+    return value
+
+
+def compute_step_key(module_name: str, function_name: str, inputs: dict, artifact_paths: set) -> str:
+    """
+    Computes the cache key of a step from its module source, the package version,
+    the resolved inputs and the content of every input file or directory.
+
+    Args:
+        module_name: The step's module.
+        function_name: The step's function.
+        inputs: The resolved step inputs (without outputs).
+        artifact_paths: Paths of outputs produced by other steps in this run.
+    """
+    material = {
+        "module": module_name,
+        "module_digest": _module_digest(module_name),
+        "function": function_name,
+        "version": package_version(),
+        "inputs": {key: _fingerprint_input(value, artifact_paths) for key, value in sorted(inputs.items())},
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _place_file(source: str, destination: str):
+    """Hard-links source to destination, falling back to a copy across file systems."""
+    if os.path.lexists(destination):
+        os.remove(destination)
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def restore_step(cache_dir: str, key: str, outputs: dict, ttl: float = None) -> bool:
+    """
+    Restores the cached outputs of a step.
+
+    Args:
+        cache_dir: The cache directory.
+        key: The step's cache key.
+        outputs: A dict mapping output keys to the output file paths of this run.
+        ttl: The maximum age of a cache entry in seconds. None never expires.
+
+    Returns:
+        True on a cache hit, False otherwise.
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    meta_file = os.path.join(entry_dir, "meta.json")
+    try:
+        with open(meta_file, "r") as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+
+    if ttl is not None and time.time() - meta.get("created", 0) > ttl:
+        return False
+    if set(meta.get("outputs", {})) != set(outputs):
+        return False
+
+    for output_key, output_path in outputs.items():
+        if meta["outputs"][output_key]:
+            _place_file(os.path.join(entry_dir, output_key), output_path)
+        elif os.path.lexists(output_path):
+            # The step did not write this output when it was cached.
+            os.remove(output_path)
+
+    # The meta file's mtime records the last access for LRU eviction.
+    os.utime(meta_file)
+    return True
+
+
+def store_step(cache_dir: str, key: str, outputs: dict, max_size_mb: float = DEFAULT_CACHE_MAX_SIZE_MB):
+    """
+    Stores the outputs of a completed step and evicts least recently used entries
+    until the cache is within `max_size_mb`.
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    if os.path.exists(entry_dir):
+        return
+    staging_dir = os.path.join(cache_dir, f".tmp-{uuid.uuid4().hex}")
+    os.makedirs(staging_dir)
+
+    meta = {"created": time.time(), "outputs": {}, "size": 0}
+    for output_key, output_path in outputs.items():
+        exists = os.path.isfile(output_path)
+        meta["outputs"][output_key] = exists
+        if exists:
+            # Copy rather than link: the run directory may be modified or deleted later.
+            shutil.copyfile(output_path, os.path.join(staging_dir, output_key))
+            meta["size"] += os.path.getsize(output_path)
+    with open(os.path.join(staging_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    try:
+        os.rename(staging_dir, entry_dir)
+    except OSError:
+        # Another run stored the same entry first.
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return
+    evict(cache_dir, max_size_mb)
+
+
+def evict(cache_dir: str, max_size_mb: float):
+    """Removes least recently used cache entries until the cache is within `max_size_mb`."""
+    entries = []
+    total_size = 0
+    for entry in os.scandir(cache_dir):
+        if not entry.is_dir() or entry.name.startswith("."):
+            continue
+        meta_file = os.path.join(entry.path, "meta.json")
+        try:
+            with open(meta_file, "r") as f:
+                size = json.load(f).get("size", 0)
+            last_access = os.stat(meta_file).st_mtime
+        except (OSError, json.JSONDecodeError):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            continue
+        entries.append((last_access, size, entry.path))
+        total_size += size
+
+    max_size = max_size_mb * 1024 * 1024
+    for _, size, entry_path in sorted(entries):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(entry_path, ignore_errors=True)
+        total_size -= size
@@ -0,0 +1,78 @@
+import mmap
+import os
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_CHUNK_OVERLAP = 4096
+
+
+class Corpus:
+    """
+    Read-only, memory-mapped access to an ingest corpus.
+
+    The corpus file is mapped rather than read, so every step process that opens it
+    shares the same page-cache copy instead of holding a private string. `data` can be
+    searched directly with bytes regexes; `iter_chunks` and `file_view` hand out
+    zero-copy memoryviews for streaming.
+
+    Use as a context manager, and release any memoryviews before the corpus is closed.
+    """
+
+    def __init__(self, corpus_file: str, manifest: dict = None):
+        """
+        Args:
+            corpus_file: The path to the ingest corpus.
+            manifest: The ingest manifest, required for per-file access.
+        """
+        if not os.path.exists(corpus_file):
+            raise FileNotFoundError(f"Gitingest file not found: {corpus_file}")
+        self.path = corpus_file
+        self.files = manifest.get("files", []) if manifest else []
+        self._file = open(corpus_file, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            # mmap cannot map empty files.
+            self.data = b""
+        else:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.data)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP):
+        """
+        Yields (offset, memoryview) windows over the corpus. Consecutive windows overlap
+        by `overlap` bytes so matches up to that length that cross a chunk boundary are
+        seen whole; a match starting in the overlap is seen by both windows and should
+        only be kept by the first (i.e. where offset + start < next offset).
+        """
+        if overlap >= chunk_size:
+            raise ValueError("The chunk overlap must be smaller than the chunk size.")
+        view = memoryview(self.data)
+        try:
+            offset = 0
+            while offset < len(view):
+                yield offset, view[offset:offset + chunk_size]
+                if offset + chunk_size >= len(view):
+                    break
+                offset += chunk_size - overlap
+        finally:
+            view.release()
+
+    def file_view(self, entry: dict) -> memoryview:
+        """Returns a zero-copy view of one ingested file's content, given its manifest entry."""
+        return memoryview(self.data)[entry["start"]:entry["end"]]
+
+    def iter_files(self):
+        """Yields (manifest entry, memoryview) for every ingested file."""
+        for entry in self.files:
+            yield entry, self.file_view(entry)
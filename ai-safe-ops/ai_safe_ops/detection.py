@@ -0,0 +1,111 @@
+import json
+import os
+import re
+
+# Global inline flags at the start of a pattern, e.g. "(?i)".
+GLOBAL_FLAGS_PATTERN = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+def _scoped_pattern(name: str, pattern: str) -> str:
+    """
+    Returns a pattern that can be embedded in an alternation: global inline flags at
+    its start are only allowed at the start of the whole regex, so they are rewritten
+    as a scoped group ("(?i)abc" becomes "(?i:abc)").
+
+    Raises:
+        ValueError: If the pattern does not compile, e.g. because of global flags
+            that are not at its start.
+    """
+    flags = ""
+    while match := GLOBAL_FLAGS_PATTERN.match(pattern):
+        flags += match.group(1)
+        pattern = pattern[match.end():]
+    if flags:
+        # A verbose pattern may end in a comment, which would swallow the closing parenthesis.
+        pattern = f"(?{flags}:{pattern}\n)" if "x" in flags else f"(?{flags}:{pattern})"
+    try:
+        re.compile(pattern.encode())
+    except re.error as e:
+        raise ValueError(f"Invalid pattern '{name}': {e}") from None
+    return pattern
+
+
+class PatternSet:
+    """
+    Compiles a set of named regex patterns into a single alternation, so a corpus is
+    scanned once no matter how many patterns there are.
+
+    Patterns are tried in definition order at each position; the first that matches
+    wins. Each pattern may declare a `prefilter`, a regex (usually a literal or
+    character class such as "@" or "[0-9]") that every line containing a match must
+    also contain. If all patterns declare one, only lines that pass the combined
+    prefilter are handed to the full alternation, and matches are line-scoped.
+    Inline flags such as "(?i)" apply to their own pattern only.
+    """
+
+    def __init__(self, patterns: dict):
+        """
+        Args:
+            patterns: A dict mapping pattern names to a regex string, or to a dict
+                with a "pattern" and an optional "prefilter" regex.
+
+        Raises:
+            ValueError: If a pattern or prefilter is not a valid regex.
+        """
+        self.names = []
+        alternatives = []
+        prefilters = []
+        for i, (name, spec) in enumerate(patterns.items()):
+            if isinstance(spec, str):
+                spec = {"pattern": spec}
+            self.names.append(name)
+            alternatives.append(f"(?P<p{i}>{_scoped_pattern(name, spec['pattern'])})")
+            prefilters.append(spec.get("prefilter") and _scoped_pattern(f"{name} prefilter", spec["prefilter"]))
+
+        self.regex = re.compile("|".join(alternatives).encode())
+        self._group_names = {f"p{i}": name for i, name in enumerate(self.names)}
+        if prefilters and all(prefilters):
+            self.prefilter = re.compile("|".join(f"(?:{p})" for p in prefilters).encode())
+        else:
+            self.prefilter = None
+
+    def finditer(self, data):
+        """
+        Yields (pattern_name, match) for every match in `data` (bytes or mmap),
+        in order of position.
+        """
+        if self.prefilter is None:
+            for match in self.regex.finditer(data):
+                yield self._group_names[match.lastgroup], match
+            return
+
+        position = 0
+        length = len(data)
+        while position < length:
+            candidate = self.prefilter.search(data, position)
+            if candidate is None:
+                return
+            line_start = data.rfind(b"\n", 0, candidate.start()) + 1
+            line_end = data.find(b"\n", candidate.end())
+            if line_end == -1:
+                line_end = length
+            for match in self.regex.finditer(data, line_start, line_end):
+                yield self._group_names[match.lastgroup], match
+            position = line_end + 1
+
+
+def load_patterns(patterns_file: str) -> dict:
+    """
+    Loads user-defined patterns from a YAML or JSON file. The file maps pattern names
+    to a regex string or to {"pattern": ..., "prefilter": ...}.
+    """
+    with open(patterns_file, "r") as f:
+        if os.path.splitext(patterns_file)[1].lower() == ".json":
+            patterns = json.load(f)
+        else:
+            import yaml
+
+            patterns = yaml.safe_load(f)
+    if not isinstance(patterns, dict):
+        raise ValueError(f"Pattern file must contain a mapping of pattern names to patterns: {patterns_file}")
+    return patterns
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+import subprocess
+
+# Matches a unified diff hunk header, e.g. "@@ -12,3 +14,5 @@".
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def _git(codebase_path: str, *args) -> str:
+    command = ["git", "-c", "core.quotePath=false", "-C", codebase_path, *args]
+    try:
+        return subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"git {' '.join(args)} failed: {e.stderr.strip()}") from e
+    except FileNotFoundError as e:
+        raise Exception("Command not found: git. Is git installed and in your PATH?") from e
+
+
+def compute_diff_scope(codebase_path: str, since: str) -> dict:
+    """
+    Lists the files changed in a git work tree since `since`, including uncommitted
+    and untracked files, together with the line ranges that were added or modified.
+
+    Args:
+        codebase_path: The path to the codebase (a git work tree or a directory in one).
+        since: The git ref to diff against, e.g. "origin/main".
+
+    Returns:
+        A dict with the ref, the codebase root, "files" mapping each changed path
+        (relative to the codebase) to a list of inclusive [first, last] changed line
+        ranges, or to None if the whole file is new, and "renames" mapping new to old paths.
+    """
+    scope = {"since": since, "root": os.path.abspath(codebase_path), "files": {}, "renames": {}}
+
+    # --relative limits the diff to the codebase directory and makes paths relative to it.
+    tokens = _git(codebase_path, "diff", "--name-status", "-z", "-M", "--relative", since).split("\0")
+    i = 0
+    while i < len(tokens) - 1:
+        status = tokens[i]
+        if status.startswith(("R", "C")):
+            old_path, new_path = tokens[i + 1], tokens[i + 2]
+            if status.startswith("R"):
+                scope["renames"][new_path] = old_path
+            scope["files"][new_path] = []
+            i += 3
+            continue
+        path = tokens[i + 1]
+        if status.startswith("A"):
+            scope["files"][path] = None
+        elif not status.startswith("D"):
+            scope["files"][path] = []
+        i += 2
+
+    current_file = None
+    for line in _git(codebase_path, "diff", "-U0", "-M", "--relative", "--no-color", "--no-ext-diff", since).splitlines():
+        if line.startswith("+++ "):
+            target = line[4:]
+            current_file = target[2:] if target.startswith("b/") else None
+            continue
+        match = HUNK_HEADER_PATTERN.match(line)
+        if match and current_file and scope["files"].get(current_file) is not None:
+            first = int(match.group(1))
+            count = int(match.group(2)) if match.group(2) is not None else 1
+            if count:
+                scope["files"][current_file].append([first, first + count - 1])
+
+    for path in _git(codebase_path, "ls-files", "--others", "--exclude-standard", "-z").split("\0"):
+        if path:
+            scope["files"][path] = None
+
+    return scope
+
+
+def write_diff_scope(codebase_path: str, since: str, output_file: str) -> dict:
+    """Computes the diff scope of a codebase and writes it to `output_file` as JSON."""
+    scope = compute_diff_scope(codebase_path, since)
+    with open(output_file, "w") as f:
+        json.dump(scope, f, indent=4)
+    return scope
+
+
+def load_diff_scope(diff_scope_file: str):
+    """Loads a diff scope file. Returns None if no file is given (full scan)."""
+    if not diff_scope_file:
+        return None
+    with open(diff_scope_file, "r") as f:
+        return json.load(f)
+
+
+def relative_to_scope(scope: dict, file_path: str) -> str:
+    """Returns a finding's file path relative to the scope root, using "/" as separator."""
+    if os.path.isabs(file_path):
+        file_path = os.path.relpath(file_path, scope["root"])
+    return file_path.replace(os.sep, "/")
+
+
+def in_scope(scope: dict, file_path: str) -> bool:
+    """Returns True if a file is part of the diff scope, or if there is no scope."""
+    if scope is None:
+        return True
+    return relative_to_scope(scope, file_path) in scope["files"]
+
+
+def diff_status(scope: dict, file_path: str, line: int = None) -> str:
+    """
+    Labels a finding as "new" if it lies on a line added or modified in the diff,
+    and as "existing" otherwise.
+    """
+    if not file_path:
+        return "existing"
+    relative_path = relative_to_scope(scope, file_path)
+    if relative_path not in scope["files"]:
+        return "existing"
+    ranges = scope["files"][relative_path]
+    if ranges is None:
+        return "new"
+    if line is None:
+        return "new" if ranges else "existing"
+    return "new" if any(first <= line <= last for first, last in ranges) else "existing"
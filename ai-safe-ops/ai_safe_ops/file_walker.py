@@ -0,0 +1,130 @@
+import os
+import re
+
+# Directories that hold VCS data, dependencies, virtualenvs or caches rather than project code.
+DEFAULT_SKIP_DIRS = {
+    ".git", ".hg", ".svn", ".ai-safe-ops",
+    "node_modules", "bower_components", "vendor", "third_party",
+    ".venv", "venv", "env", "site-packages",
+    "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox",
+}
+
+
+def _translate_pattern(pattern: str) -> str:
+    """Translates a gitignore glob into a regular expression matching a relative path."""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            regex += re.escape(pattern[i])
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+def parse_gitignore(file_path: str) -> list[tuple]:
+    """
+    Parses a .gitignore file into a list of (regex, negate, dir_only) rules.
+    Rules match paths relative to the directory containing the .gitignore file.
+    """
+    rules = []
+    try:
+        with open(file_path, "r", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # Patterns without an inner slash match at any depth.
+        anchored = "/" in line
+        line = line.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        rules.append((re.compile(f"^{prefix}{_translate_pattern(line)}$"), negate, dir_only))
+    return rules
+
+
+def _is_ignored(relative_path: str, is_dir: bool, ignore_stack: list) -> bool:
+    ignored = False
+    for base, rules in ignore_stack:
+        path = relative_path[len(base) + 1:] if base else relative_path
+        for regex, negate, dir_only in rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path):
+                ignored = not negate
+    return ignored
+
+
+def walk_files(root: str, skip_dirs: set = DEFAULT_SKIP_DIRS, respect_gitignore: bool = True):
+    """
+    Walks a directory tree with os.scandir and yields (relative_path, os.DirEntry) for
+    every regular file. Directories in `skip_dirs` are pruned, and .gitignore files are
+    honored at every level. Relative paths always use "/" as separator.
+    """
+    # Each stack entry is (directory relative to root, [ignore stack for that directory]).
+    stack = [("", [])]
+    while stack:
+        directory, ignore_stack = stack.pop()
+        absolute_dir = os.path.join(root, directory) if directory else root
+        try:
+            entries = sorted(os.scandir(absolute_dir), key=lambda e: e.name)
+        except OSError:
+            continue
+
+        if respect_gitignore and any(entry.name == ".gitignore" for entry in entries):
+            ignore_stack = ignore_stack + [(directory, parse_gitignore(os.path.join(absolute_dir, ".gitignore")))]
+
+        subdirectories = []
+        for entry in entries:
+            relative_path = f"{directory}/{entry.name}" if directory else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = entry.is_file(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in skip_dirs or _is_ignored(relative_path, True, ignore_stack):
+                    continue
+                subdirectories.append(relative_path)
+            elif is_file and not _is_ignored(relative_path, False, ignore_stack):
+                yield relative_path, entry
+
+        # Push in reverse so directories are visited in sorted order.
+        for subdirectory in reversed(subdirectories):
+            stack.append((subdirectory, ignore_stack))
@@ -0,0 +1,88 @@
+import argparse
+import json
+
+
+class FindingWriter:
+    """
+    Writes findings as newline-delimited JSON, one compact finding per line.
+
+    Findings are appended as they are produced, so a step never holds its full result
+    list in memory. Use as a context manager.
+    """
+
+    def __init__(self, output_file: str):
+        self.path = output_file
+        self.count = 0
+        self._file = open(output_file, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, finding: dict):
+        self._file.write(json.dumps(finding, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+        self.count += 1
+
+    def write_all(self, findings):
+        for finding in findings:
+            self.write(finding)
+
+    def close(self):
+        self._file.close()
+
+
+def iter_findings(findings_file: str):
+    """
+    Yields the findings of a findings file one at a time.
+
+    Newline-delimited JSON is streamed line by line. A JSON document of the older
+    {"findings": [...]} format is still accepted, but is loaded as a whole.
+    """
+    with open(findings_file, "r", encoding="utf-8") as f:
+        first_line = f.readline()
+        try:
+            first = json.loads(first_line) if first_line.strip() else None
+        except json.JSONDecodeError:
+            first = None
+        # An indented document does not parse line by line; a compact one has a "findings" list.
+        legacy = (first is None and first_line.strip()) or (isinstance(first, dict) and isinstance(first.get("findings"), list))
+        if legacy:
+            f.seek(0)
+            yield from json.load(f).get("findings", [])
+            return
+        if first is not None:
+            yield first
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def convert_to_json(findings_file: str, output_file: str, indent: int = 4) -> int:
+    """
+    Converts a findings file into the {"findings": [...]} JSON document written by
+    earlier versions. The document is written incrementally, one finding at a time.
+
+    Returns:
+        The number of findings.
+    """
+    count = 0
+    pad = " " * indent
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write('{\n' + pad + '"findings": [')
+        for finding in iter_findings(findings_file):
+            body = json.dumps(finding, indent=indent).replace("\n", "\n" + pad * 2)
+            f.write(("," if count else "") + "\n" + pad * 2 + body)
+            count += 1
+        f.write(("\n" + pad if count else "") + "]\n}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a newline-delimited JSON findings file into a JSON document.")
+    parser.add_argument("findings_file", help="The findings file to convert.")
+    parser.add_argument("output_file", help="The path of the JSON document.")
+    args = parser.parse_args()
+    print(f"Converted {convert_to_json(args.findings_file, args.output_file)} finding(s) to {args.output_file}")
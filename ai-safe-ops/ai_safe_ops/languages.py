@@ -0,0 +1,143 @@
+import os
+import re
+
+# Maps file extensions (lower case) to the language they are written in.
+LANGUAGE_BY_EXTENSION = {
+    ".py": "python",
+    ".pyi": "python",
+    ".pyx": "python",
+    ".ipynb": "python",
+    ".go": "go",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".java": "java",
+    ".rb": "ruby",
+    ".php": "php",
+    ".cs": "c#",
+    ".cpp": "c++",
+    ".cc": "c++",
+    ".cxx": "c++",
+    ".hpp": "c++",
+    ".hh": "c++",
+    ".c": "c",
+    ".h": "c",
+    ".swift": "swift",
+    ".kt": "kotlin",
+    ".kts": "kotlin",
+    ".scala": "scala",
+    ".rs": "rust",
+    ".dart": "dart",
+    ".sh": "shell",
+    ".bash": "shell",
+    ".sql": "sql",
+    ".html": "html",
+    ".css": "css",
+    ".md": "markdown",
+    ".rst": "restructuredtext",
+    ".json": "json",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".toml": "toml",
+    ".ini": "ini",
+    ".cfg": "ini",
+}
+
+# Files that are recognized by their full name rather than by extension.
+LANGUAGE_BY_FILENAME = {
+    "dockerfile": "dockerfile",
+    "makefile": "make",
+}
+
+# Extensions shared by several languages. Files with these extensions, and files
+# without any extension, are classified from the first HEAD_SIZE bytes of their content.
+AMBIGUOUS_EXTENSIONS = {".h", ".m"}
+HEAD_SIZE = 1024
+
+# Maps the interpreter named in a "#!" line (without version suffix) to a language.
+LANGUAGE_BY_INTERPRETER = {
+    "python": "python",
+    "node": "javascript",
+    "deno": "typescript",
+    "ts-node": "typescript",
+    "ruby": "ruby",
+    "php": "php",
+    "perl": "perl",
+    "sh": "shell",
+    "bash": "shell",
+    "zsh": "shell",
+    "dash": "shell",
+    "ksh": "shell",
+}
+
+# Package manifests (lower case file names) that mark a language's ecosystem as in use.
+MANIFEST_LANGUAGES = {
+    "go.mod": "go",
+    "package.json": "javascript",
+    "tsconfig.json": "typescript",
+    "cargo.toml": "rust",
+    "pyproject.toml": "python",
+    "setup.py": "python",
+    "requirements.txt": "python",
+    "pom.xml": "java",
+    "build.gradle": "java",
+    "build.gradle.kts": "kotlin",
+    "gemfile": "ruby",
+    "composer.json": "php",
+    "pubspec.yaml": "dart",
+    "package.swift": "swift",
+}
+
+SHEBANG_PATTERN = re.compile(rb"#![ \t]*(\S+)(?:[ \t]+(\S+))?")
+CPP_HEADER_PATTERN = re.compile(rb"^\s*(?:class|namespace|template\s*<)|std::|#include\s*<[a-z_]+>\s*$", re.MULTILINE)
+OBJECTIVE_C_PATTERN = re.compile(rb"^\s*(?:@interface|@implementation|@protocol|#import)\b", re.MULTILINE)
+
+
+def detect_language(path: str):
+    """Returns the language of a file based on its name, or None if it is unknown."""
+    name = os.path.basename(path).lower()
+    if name in LANGUAGE_BY_FILENAME:
+        return LANGUAGE_BY_FILENAME[name]
+    return LANGUAGE_BY_EXTENSION.get(os.path.splitext(name)[1])
+
+
+def needs_content(path: str) -> bool:
+    """Returns True if a file's language can only be told from its content."""
+    name = os.path.basename(path).lower()
+    extension = os.path.splitext(name)[1]
+    if extension:
+        return extension in AMBIGUOUS_EXTENSIONS
+    return name not in LANGUAGE_BY_FILENAME
+
+
+def language_from_shebang(head: bytes):
+    """Returns the language named by a "#!" interpreter line, or None."""
+    match = SHEBANG_PATTERN.match(head)
+    if match is None:
+        return None
+    interpreter = os.path.basename(match.group(1).decode("utf-8", errors="replace"))
+    if interpreter == "env" and match.group(2):
+        interpreter = match.group(2).decode("utf-8", errors="replace")
+    return LANGUAGE_BY_INTERPRETER.get(interpreter.rstrip("0123456789.") or interpreter)
+
+
+def classify_file(path: str, head: bytes = None):
+    """
+    Returns the language of a file. `head`, the first HEAD_SIZE bytes of the file,
+    is only used for files where `needs_content` is True: C and C++ headers and
+    Objective-C and MATLAB ".m" files are told apart by their syntax, and files
+    without an extension by their shebang line.
+    """
+    if head is None or not needs_content(path):
+        return detect_language(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".h":
+        if OBJECTIVE_C_PATTERN.search(head):
+            return "objective-c"
+        return "c++" if CPP_HEADER_PATTERN.search(head) else "c"
+    if extension == ".m":
+        return "objective-c" if OBJECTIVE_C_PATTERN.search(head) else "matlab"
+    return language_from_shebang(head)
@@ -1,114 +1,418 @@
 import json
-import importlib
 import argparse
+import contextlib
 import os
+import shutil
 import sys
 import uuid
 from datetime import datetime
 
-def run_workflow(workflow_file: str, workflow_inputs: dict, enable_local_logs: bool, log_dir: str = None):
+from ai_safe_ops.artifacts import artifact_file_name, check_artifact, read_artifact, write_artifact
+from ai_safe_ops.cache import DEFAULT_CACHE_MAX_SIZE_MB, compute_step_key, restore_step, store_step
+from ai_safe_ops.diff_scope import write_diff_scope
+from ai_safe_ops.registry import validate_steps
+from ai_safe_ops.run_store import RunStore, default_run_store_path
+from ai_safe_ops.scheduler import build_step_graph, run_step_graph
+from ai_safe_ops.telemetry import OTEL_EXPORTERS, TRACE_FILE_NAME, RunTracer, count_findings, create_span_exporter
+from ai_safe_ops.vulndb import default_vulndb_path
+
+PATH_INPUT_SUFFIXES = ("_path", "_file", "_files")
+
+def resolve_input(key: str, value, workflow: dict, workflow_inputs: dict, log_dir: str, output_file, artifact_value):
+    """
+    Resolves the value of a step input as given in the workflow definition. Lists are
+    resolved item by item and values without a reference are returned unchanged.
+
+    Args:
+        key: The name of the input.
+        value: The value of the input in the workflow definition.
+        workflow: The workflow definition.
+        workflow_inputs: The values of the `{workflow.inputs.X}` references; missing ones resolve to None.
+        log_dir: The value of `{workflow.log_dir}`.
+        output_file: Called with a step name and output name; returns the file the output was written to.
+            A `{steps.S.outputs.K}` reference resolves to that path for inputs named like a
+            path (see PATH_INPUT_SUFFIXES) and to the file's stripped content otherwise.
+        artifact_value: Called with a step name and output name; returns the value of an
+            output the step returns (see ai_safe_ops.artifacts).
+    """
+    if isinstance(value, list):
+        return [resolve_input(key, item, workflow, workflow_inputs, log_dir, output_file, artifact_value) for item in value]
+    if not isinstance(value, str):
+        return value
+    if value.startswith("{workflow.inputs."):
+        return workflow_inputs.get(value.replace("{workflow.inputs.", "").replace("}", ""))
+    if value == "{workflow.log_dir}":
+        return log_dir
+    if value == "{workflow.all_steps}":
+        return [step["name"] for step in workflow["steps"]]
+    if value.startswith("{steps."):
+        step_name, output_key = value.replace("{steps.", "").replace("}", "").split(".outputs.")
+        step = next(step for step in workflow["steps"] if step["name"] == step_name)
+        if output_key in step.get("returns", {}):
+            return artifact_value(step_name, output_key)
+        if key.endswith(PATH_INPUT_SUFFIXES):
+            return output_file(step_name, output_key)
+        with open(output_file(step_name, output_key), "r") as f_in:
+            return f_in.read().strip()
+    return value
+
+def run_workflow(
+    workflow_file: str,
+    workflow_inputs: dict,
+    enable_local_logs: bool,
+    log_dir: str = None,
+    max_workers: int = None,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    cache_max_size_mb: float = DEFAULT_CACHE_MAX_SIZE_MB,
+    since: str = None,
+    run_store_path: str = None,
+    otel_exporter: str = "auto",
+    otel_endpoint: str = None,
+    executor=None,
+    line_prefix: str = "",
+    step_timeout: float = None,
+) -> dict:
     """
     Runs a workflow defined in a JSON file.
+
+    Steps are scheduled by their "{steps.X.outputs.Y}" references: a step starts as soon
+    as every step it depends on has completed, and independent steps run concurrently.
+    `max_workers` limits the number of concurrently running steps (1 runs them sequentially).
+
+    With `use_cache`, step outputs are stored in `cache_dir` keyed by the step's module,
+    the package version and its inputs. A step whose key is already cached is not run;
+    its outputs are restored and a STEP_CACHED line is emitted instead. Steps can opt out
+    with `"cache": false` or limit the age of cached results with `"cache_ttl"` (seconds).
+
+    With `since` (a git ref), only files changed since that ref are scanned: the diff
+    scope is written to the run directory and passed to the steps as the
+    `{workflow.inputs.diff_scope_file}` input. Workflow inputs that are not provided
+    resolve to None.
+
+    With `run_store_path`, every step output is recorded in a SQLite run store once the
+    step has completed (an empty string stores the run in its own database under
+    .ai-safe-ops/runs). Outputs listed in a step's "store" field are also loaded into
+    indexed tables: "findings" and "bandit" outputs into the findings table and the
+    ingest "manifest" into the files table. Reports can then aggregate with SQL through
+    the `{workflow.inputs.run_store_path}` and `{workflow.inputs.run_id}` inputs. Only
+    report outputs are written to the log directory (or, without local logs, to
+    reports/<run id> next to the run store); the other artifacts live in a
+    temporary directory that is removed after a successful run.
+
+    Every step that runs is measured (wall time, CPU time, peak RSS, bytes read and,
+    for outputs stored as "findings" or "bandit", the number of findings) and a
+    `STEP_METRICS:<step>;;<json>` line is emitted before its STEP_DONE line. One
+    OpenTelemetry span is exported per run and per step with `otel_exporter` (see
+    ai_safe_ops.telemetry.create_span_exporter); "auto" uses OTLP if `otel_endpoint`
+    or the OTEL_EXPORTER_OTLP_* variables are set, else traces.jsonl in the log
+    directory when local logs are enabled.
+
+    With `executor`, steps run in that process pool (e.g. one shared by the runs of a
+    batch, see ai_safe_ops.batch) instead of one of their own. Steps marked with
+    `"process_pool": true` start a pool of their own sized by their `max_workers`
+    argument; inside the shared pool they get `max_workers=1` and run serially, so
+    every worker does not fork a full pool of its own. `line_prefix` is put in front
+    of every protocol line, so concurrent runs can be told apart.
+
+    A step may set a "timeout" (seconds per attempt; `step_timeout` is the default for
+    steps without one) and a number of "retries". A step that fails or times out after
+    its retries emits `STEP_FAILED:<step>;;<error>` (a retry emits
+    `STEP_RETRY:<step>;;<error>`), and the steps depending on it emit STEP_CANCELLED
+    lines; independent steps still complete, and their outputs are kept (and recorded
+    in the run store) for a partial report before the run fails.
+
+    A step with a "returns" field ({"<output>": "<artifact type>"}, see
+    ai_safe_ops.artifacts) publishes its function's return value as that output.
+    Steps still run in processes of their own: the value is pickled once over the
+    step's result pipe (or pool future) to the runner, which passes it to the
+    consumers referencing it, whatever their input is called. It is written to a
+    file only when the step is cached, local logs are enabled or the run is recorded
+    in a run store.
+
+    Returns:
+        A summary of the run: its ID, the metrics of every step that ran (cached
+        steps are marked as such) and the paths of the report outputs by output name.
     """
     with open(workflow_file, "r") as f:
         workflow = json.load(f)
 
     all_step_names = [step["name"] for step in workflow["steps"]]
-    print(f"ALL_STEPS:{','.join(all_step_names)}", file=sys.stdout, flush=True)
+    print(f"{line_prefix}ALL_STEPS:{','.join(all_step_names)}", file=sys.stdout, flush=True)
 
     run_id = str(uuid.uuid4())
-    step = {} 
+    steps_by_name = {step["name"]: step for step in workflow["steps"]}
+    if max_workers is None:
+        max_workers = workflow.get("max_workers")
+    if cache_dir is None:
+        cache_dir = os.path.join(os.getcwd(), ".ai-safe-ops", "cache")
+    step_cache_keys = {}
+    step_metrics = {}
+    store = None
+    # The log is opened once per run; line buffering keeps it current if the run dies.
+    log_file = open(os.path.join(log_dir, "workflow_log.txt"), "a", buffering=1) if enable_local_logs and log_dir else None
 
+    def write_log(message: str):
+        if log_file is not None:
+            log_file.write(f"{message}\n")
+
+    trace_file = os.path.join(log_dir, TRACE_FILE_NAME) if log_file is not None else None
     try:
-        if enable_local_logs and log_dir:
-            with open(os.path.join(log_dir, "workflow_log.txt"), "a") as log_f:
-                log_f.write(f"Running workflow: {workflow['name']} (Run ID: {run_id})\n")
-                log_f.write(f"Log directory: {log_dir}\n")
+        tracer = RunTracer(create_span_exporter(otel_exporter, otel_endpoint, trace_file))
+    except (ImportError, ValueError) as e:
+        tracer = RunTracer()
+        if otel_exporter != "auto":
+            print(f"Warning: OpenTelemetry tracing is disabled: {e}", file=sys.stderr, flush=True)
 
-        step_outputs = {}
+    try:
+        write_log(f"Running workflow: {workflow['name']} (Run ID: {run_id})")
+        write_log(f"Log directory: {log_dir}")
+        tracer.start_run(run_id, workflow["name"], workflow_inputs.get("path"))
 
-        for step_data in workflow["steps"]:
-            step = step_data
-            print(f"STEP_START:{step['name']}", file=sys.stdout, flush=True)
-            
-            if enable_local_logs and log_dir:
-                 with open(os.path.join(log_dir, "workflow_log.txt"), "a") as log_f:
-                    log_f.write(f"Running step: {step['name']}\n")
-            
-            module_name = step["module"]
-            function_name = step["function"]
-            
-            module = importlib.import_module(module_name)
-            function = getattr(module, function_name)
-            
-            inputs = {}
-            for key, value in step["inputs"].items():
-                if isinstance(value, str) and value.startswith("{workflow.inputs."):
-                    input_key = value.replace("{workflow.inputs.", "").replace("}", "")
-                    inputs[key] = workflow_inputs[input_key]
-                # --- KORREKTUR HIER ---
-                elif value == "{workflow.log_dir}":
-                    inputs[key] = log_dir
-                elif value == "{workflow.all_steps}":
-                    inputs[key] = all_step_names
-                elif isinstance(value, str) and value.startswith("{steps."):
-                    parts = value.replace("{steps.", "").replace("}", "").split(".outputs.")
-                    step_name = parts[0]
-                    output_key = parts[1]
-                    if key.endswith("_path") or key.endswith("_file"):
-                        inputs[key] = step_outputs[step_name][output_key]
-                    else:
-                        with open(step_outputs[step_name][output_key], "r") as f_in:
-                            inputs[key] = f_in.read().strip()
-                else:
-                    inputs[key] = value
+        graph = build_step_graph(workflow["steps"])
+        validate_steps(workflow["steps"])
 
-            outputs = {}
-            step_outputs[step['name']] = {}
+        workflow_inputs = dict(workflow_inputs)
+        if run_store_path is not None:
+            store = RunStore(run_store_path or default_run_store_path(run_id))
+            store.start_run(run_id, workflow["name"], workflow_inputs.get("path"))
+            workflow_inputs["run_store_path"] = store.path
+            workflow_inputs["run_id"] = run_id
+            write_log(f"Recording the run in {store.path}")
+
+        # Output paths are fixed before any step runs, so dependents can be
+        # prepared without waiting on anything but their dependencies.
+        temp_dir = os.path.join(os.getcwd(), ".ai-safe-ops", "temp", run_id)
+        if enable_local_logs and log_dir:
+            output_dir = log_dir
+        elif store is not None:
+            # temp_dir is removed after the run, so the reports are kept next to the run store.
+            output_dir = os.path.join(os.path.dirname(os.path.abspath(store.path)), "reports", run_id)
+        else:
+            output_dir = temp_dir
+        # With a run store, intermediate artifacts are kept in the store rather than the log directory.
+        artifact_dir = temp_dir if store is not None else output_dir
+        step_outputs = {}
+        for step in workflow["steps"]:
+            step_outputs[step["name"]] = {}
+            step_dir = output_dir if step.get("type") == "report" else artifact_dir
             for key, value in step["outputs"].items():
                 if isinstance(value, str) and value.startswith("{workflow.outputs."):
                     output_key = value.replace("{workflow.outputs.", "").replace("}", "")
-                    output_dir = log_dir if enable_local_logs and log_dir else os.path.join(os.getcwd(), ".ai-safe-ops", "temp", run_id)
-                    if not os.path.exists(output_dir):
-                        os.makedirs(output_dir, exist_ok=True)
-                    output_file = os.path.join(output_dir, f"{output_key}.txt")
-                    outputs[key] = output_file
-                    step_outputs[step['name']][key] = output_file
+                    step_outputs[step["name"]][key] = os.path.join(step_dir, f"{output_key}.txt")
+            for key in step.get("returns", {}):
+                step_outputs[step["name"]][key] = os.path.join(step_dir, artifact_file_name(step["name"], key))
+        artifact_paths = {path for outputs in step_outputs.values() for path in outputs.values()}
+        # Values returned by steps, by step and output name.
+        artifact_values = {step["name"]: {} for step in workflow["steps"]}
+        persist_artifacts = bool(enable_local_logs and log_dir) or store is not None
+
+        if since:
+            os.makedirs(artifact_dir, exist_ok=True)
+            diff_scope_file = os.path.join(artifact_dir, "diff_scope.json")
+            scope = write_diff_scope(workflow_inputs["path"], since, diff_scope_file)
+            workflow_inputs["diff_scope_file"] = diff_scope_file
+            artifact_paths.add(diff_scope_file)
+            write_log(f"Scanning {len(scope['files'])} file(s) changed since {since}.")
+
+        def output_file(step_name, output_key):
+            return step_outputs[step_name][output_key]
+
+        def artifact_value(step_name, output_key):
+            return artifact_values[step_name].get(output_key)
+
+        def prepare_step(step_name):
+            step = steps_by_name[step_name]
+            inputs = {
+                key: resolve_input(key, value, workflow, workflow_inputs, log_dir, output_file, artifact_value)
+                for key, value in step["inputs"].items()
+            }
+
+            outputs = {}
+            for key, value in step["outputs"].items():
+                if key in step_outputs[step_name]:
+                    os.makedirs(os.path.dirname(step_outputs[step_name][key]), exist_ok=True)
+                    outputs[key] = step_outputs[step_name][key]
                 else:
                     outputs[key] = value
 
-            function(**inputs, **outputs)
+            if use_cache and step.get("cache", True):
+                cache_key = compute_step_key(step["module"], step["function"], inputs, artifact_paths)
+                if restore_step(cache_dir, cache_key, step_outputs[step_name], ttl=step.get("cache_ttl")):
+                    print(f"{line_prefix}STEP_CACHED:{step_name}", file=sys.stdout, flush=True)
+                    write_log(f"Step '{step_name}' restored from cache ({cache_key}).")
+                    for key, artifact_type in step.get("returns", {}).items():
+                        artifact_values[step_name][key] = read_artifact(artifact_type, step_outputs[step_name][key])
+                    record_step(step_name)
+                    tracer.end_step(step_name, cached=True)
+                    step_metrics[step_name] = {"cached": True}
+                    return None
+                step_cache_keys[step_name] = cache_key
+                # Outputs restored by an earlier run may be hard links into the cache;
+                # remove them so the step cannot write through to a cache entry.
+                for output_path in step_outputs[step_name].values():
+                    if os.path.lexists(output_path):
+                        os.remove(output_path)
+            kwargs = {**inputs, **outputs}
+            if executor is not None and step.get("process_pool"):
+                # Not part of the cache key: the worker count does not change the outputs.
+                kwargs["max_workers"] = 1
+            return step["module"], step["function"], kwargs
+
+        def record_step(step_name):
+            if store is None:
+                return
+            kinds = steps_by_name[step_name].get("store", {})
+            for key, output_path in step_outputs[step_name].items():
+                store.record_output(run_id, step_name, key, output_path, kinds.get(key))
+
+        def on_step_start(step_name):
+            print(f"{line_prefix}STEP_START:{step_name}", file=sys.stdout, flush=True)
+            write_log(f"Running step: {step_name}")
+            tracer.start_step(step_name)
+
+        def on_step_done(step_name, metrics, result):
+            for key, artifact_type in steps_by_name[step_name].get("returns", {}).items():
+                check_artifact(artifact_type, result)
+                artifact_values[step_name][key] = result
+                artifact_path = step_outputs[step_name][key]
+                if os.path.lexists(artifact_path):
+                    os.remove(artifact_path)
+                if persist_artifacts or step_name in step_cache_keys:
+                    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+                    write_artifact(artifact_type, result, artifact_path)
+            if step_name in step_cache_keys:
+                store_step(cache_dir, step_cache_keys[step_name], step_outputs[step_name], cache_max_size_mb)
+            record_step(step_name)
+            kinds = steps_by_name[step_name].get("store", {})
+            returns = steps_by_name[step_name].get("returns", {})
+            counts = [
+                len(artifact_values[step_name][key] or []) if returns.get(key) == "findings" else count_findings(output_path, kinds[key])
+                for key, output_path in step_outputs[step_name].items()
+                if kinds.get(key) in ("findings", "bandit")
+            ]
+            metrics["findings"] = sum(count for count in counts if count is not None) if counts else None
+            metrics_line = json.dumps(metrics, separators=(",", ":"))
+            print(f"{line_prefix}STEP_METRICS:{step_name};;{metrics_line}", file=sys.stdout, flush=True)
+            print(f"{line_prefix}STEP_DONE:{step_name}", file=sys.stdout, flush=True)
+            write_log(f"Step '{step_name}' completed successfully: {metrics_line}")
+            tracer.end_step(step_name, metrics)
+            step_metrics[step_name] = metrics
+
+        def on_step_event(step_name, event, error):
+            # Protocol lines are single lines; the full error is in the log.
+            message = str(error).splitlines()[0] if str(error) else type(error).__name__
+            if event == "cancelled":
+                print(f"{line_prefix}STEP_CANCELLED:{step_name}", file=sys.stdout, flush=True)
+                write_log(f"Step '{step_name}' cancelled: a step it depends on failed.")
+                return
+            print(f"{line_prefix}STEP_{event.upper()}:{step_name};;{message}", file=sys.stdout, flush=True)
+            if event == "retry":
+                write_log(f"Step '{step_name}' failed, retrying: {error}")
+            else:
+                write_log(f"Step '{step_name}' failed: {error}")
+                tracer.end_step(step_name, error=error)
+
+        step_options = {
+            step["name"]: {"timeout": step.get("timeout", step_timeout), "retries": step.get("retries", 0)}
+            for step in workflow["steps"]
+        }
+        run_step_graph(
+            graph, prepare_step, on_step_start, on_step_done,
+            max_workers=max_workers, executor=executor, line_prefix=line_prefix,
+            step_options=step_options, on_step_event=on_step_event,
+        )
+        if store is not None:
+            store.finish_run(run_id, "completed")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        tracer.finish_run("completed")
 
-            print(f"STEP_DONE:{step['name']}", file=sys.stdout, flush=True)
-            if enable_local_logs and log_dir:
-                with open(os.path.join(log_dir, "workflow_log.txt"), "a") as log_f:
-                    log_f.write(f"Step '{step['name']}' completed successfully.\n")
-        
         log_path_info = os.path.abspath(log_dir) if log_dir else "Disabled"
-        print(f"WORKFLOW_COMPLETE:{workflow['name']};;{log_path_info}", file=sys.stdout, flush=True)
+        print(f"{line_prefix}WORKFLOW_COMPLETE:{workflow['name']};;{log_path_info}", file=sys.stdout, flush=True)
+        reports = {
+            key: path for step in workflow["steps"] if step.get("type") == "report"
+            for key, path in step_outputs[step["name"]].items()
+        }
+        return {"run_id": run_id, "workflow": workflow["name"], "steps": step_metrics, "reports": reports}
 
     except Exception as e:
-        step_name = step.get('name', 'Unknown')
+        step_name = getattr(e, "step_name", "Unknown")
         error_message = f"Error during step '{step_name}': {e}"
         if log_dir:
-            with open(os.path.join(log_dir, "workflow_log.txt"), "a") as log_f:
+            log_context = contextlib.nullcontext(log_file) if log_file is not None else open(os.path.join(log_dir, "workflow_log.txt"), "a")
+            with log_context as log_f:
                 import traceback
                 log_f.write(f"{error_message}\n")
                 traceback.print_exc(file=log_f)
-        print(f"WORKFLOW_ERROR:{error_message}", file=sys.stderr, flush=True)
+        print(f"{line_prefix}WORKFLOW_ERROR:{error_message}", file=sys.stderr, flush=True)
+        if store is not None:
+            store.finish_run(run_id, "failed")
+        tracer.finish_run("failed", e)
         raise
+    finally:
+        if store is not None:
+            store.close()
+        if log_file is not None:
+            log_file.close()
 
-if __name__ == "__main__":
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Returns the argument parser of the workflow runner command line."""
     parser = argparse.ArgumentParser()
     parser.add_argument("workflow_name", help="The name of the workflow JSON file.")
     parser.add_argument("path", help="The path to the codebase to analyze.")
     parser.add_argument("--enable-local-logs", action="store_true", help="Enable writing local log files.")
     parser.add_argument("--log-dir", help="The directory to store logs.", default=None)
-    args = parser.parse_args()
+    parser.add_argument("--max-workers", type=int, default=None, help="The maximum number of steps to run in parallel (1 runs steps sequentially). Defaults to the number of CPUs.")
+    parser.add_argument("--no-cache", action="store_true", help="Run every step, ignoring and not updating the step result cache.")
+    parser.add_argument("--cache-dir", help="The directory of the step result cache. Defaults to .ai-safe-ops/cache.", default=None)
+    parser.add_argument("--cache-max-size", type=float, default=DEFAULT_CACHE_MAX_SIZE_MB, help="The maximum size of the step result cache in MB.")
+    parser.add_argument("--since", help="Only scan files changed since this git ref (e.g. origin/main).", default=None)
+    parser.add_argument("--vulndb", help="A local vulnerability database for dependency scans. Defaults to .ai-safe-ops/vulndb.sqlite if it exists.", default=None)
+    parser.add_argument("--offline", action="store_true", help="Never query live vulnerability services.")
+    parser.add_argument("--live-fallback", action="store_true", help="Look up packages missing from the local vulnerability database on PyPI.")
+    parser.add_argument("--patterns-file", help="A YAML or JSON file with additional PII patterns for the data handling scan.", default=None)
+    parser.add_argument("--otel-exporter", choices=OTEL_EXPORTERS, default="auto", help="How to export the OpenTelemetry spans of the run and its steps. auto uses OTLP if an endpoint is set, else traces.jsonl in the log directory.")
+    parser.add_argument("--otel-endpoint", default=None, help="The OTLP/HTTP traces endpoint, e.g. http://localhost:4318/v1/traces.")
+    parser.add_argument("--step-timeout", type=float, default=None, help="The timeout in seconds of every step without a timeout of its own in the workflow.")
+    parser.add_argument("--run-store", nargs="?", const="", default=None, help="Record outputs and findings in a SQLite run store at this path (shared across runs), or without a path in .ai-safe-ops/runs/<run id>.sqlite.")
+    return parser
+
+def run_cli(args: argparse.Namespace) -> int:
+    """Runs the workflow selected by parsed command line arguments. Returns the exit code."""
     script_dir = os.path.dirname(__file__)
     workflow_file_path = os.path.join(script_dir, "workflows", f"{args.workflow_name}.json")
     if not os.path.exists(workflow_file_path):
         print(f"Error: Workflow file not found at {workflow_file_path}", file=sys.stderr, flush=True)
-        exit(1)
-    workflow_inputs = {"path": args.path}
-    run_workflow(workflow_file_path, workflow_inputs, args.enable_local_logs, args.log_dir)
\ No newline at end of file
+        return 1
+    workflow_inputs = {"path": args.path, "offline": args.offline, "live_fallback": args.live_fallback}
+    if args.vulndb or os.path.exists(default_vulndb_path()):
+        workflow_inputs["vulndb_path"] = args.vulndb or default_vulndb_path()
+    if args.patterns_file:
+        workflow_inputs["patterns_file"] = os.path.abspath(args.patterns_file)
+    run_workflow(
+        workflow_file_path,
+        workflow_inputs,
+        args.enable_local_logs,
+        args.log_dir,
+        max_workers=args.max_workers,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        cache_max_size_mb=args.cache_max_size,
+        since=args.since,
+        run_store_path=args.run_store,
+        otel_exporter=args.otel_exporter,
+        otel_endpoint=args.otel_endpoint,
+        step_timeout=args.step_timeout,
+    )
+    return 0
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        from ai_safe_ops.server import build_serve_arg_parser, serve
+        serve_args = build_serve_arg_parser().parse_args(sys.argv[2:])
+        serve(serve_args.socket, preload=not serve_args.no_preload)
+    elif sys.argv[1:2] == ["batch"]:
+        from ai_safe_ops.batch import build_batch_arg_parser, run_batch_cli
+        sys.exit(run_batch_cli(build_batch_arg_parser().parse_args(sys.argv[2:])))
+    else:
+        sys.exit(run_cli(build_arg_parser().parse_args()))
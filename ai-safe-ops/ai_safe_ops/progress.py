@@ -0,0 +1,114 @@
+import contextlib
+import json
+import os
+import sys
+import time
+
+# The minimum time between two STEP_PROGRESS lines of a step.
+PROGRESS_INTERVAL = 1.0
+
+# The reporter of the step running in this process, if any.
+_current = None
+
+
+def _write_line(line: str):
+    """Writes a protocol line to stdout in one write, so lines of concurrent steps never interleave."""
+    sys.stdout.flush()
+    os.write(sys.stdout.fileno(), f"{line}\n".encode("utf-8"))
+
+
+class ProgressReporter:
+    """
+    Coalesces the progress updates of one step into STEP_PROGRESS lines.
+
+    Updates only add to counters. A line is written when a phase begins and then at
+    most every `interval` seconds, so reporting from a hot loop costs a clock read per
+    call. A line carries `STEP_PROGRESS:<step>;;<json>` with the units done, the total
+    (if known), the unit name, the bytes processed, the rates since the phase began
+    and, with a total, the estimated seconds remaining.
+    """
+
+    def __init__(self, step_name: str, interval: float = PROGRESS_INTERVAL, emit=_write_line, line_prefix: str = ""):
+        self.step_name = step_name
+        self.line_prefix = line_prefix
+        self.interval = interval
+        self.emit = emit
+        self.done = 0
+        self.total = None
+        self.unit = "items"
+        self.bytes_done = 0
+        self._started = None
+        self._next_emit = 0.0
+        self._emitted = None
+
+    def begin(self, total: int = None, unit: str = "items"):
+        """Starts a phase of `total` units (None if unknown), resetting the counters and rates."""
+        self.total = total
+        self.unit = unit
+        self.done = self.bytes_done = 0
+        self._started = time.monotonic()
+        self._emitted = None
+        self.flush(self._started)
+
+    def advance(self, units: int = 1, nbytes: int = 0):
+        self.done += units
+        self.bytes_done += nbytes
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+            self._next_emit = now + self.interval
+        elif now >= self._next_emit:
+            self.flush(now)
+
+    def snapshot(self, now: float = None) -> dict:
+        """Returns the current progress with rates and ETA."""
+        elapsed = (now or time.monotonic()) - self._started if self._started is not None else 0.0
+        state = {"done": self.done, "total": self.total, "unit": self.unit, "bytes": self.bytes_done}
+        if elapsed > 0:
+            state["rate"] = round(self.done / elapsed, 2)
+            state["bytes_per_s"] = round(self.bytes_done / elapsed)
+            if self.total is not None and self.done:
+                state["eta_s"] = round(max(self.total - self.done, 0) * elapsed / self.done, 1)
+        return state
+
+    def flush(self, now: float = None):
+        """Writes a line now if anything changed since the last one."""
+        if self._started is None or (self.done, self.bytes_done, self.total) == self._emitted:
+            return
+        now = now or time.monotonic()
+        self._emitted = (self.done, self.bytes_done, self.total)
+        self._next_emit = now + self.interval
+        self.emit(f"{self.line_prefix}STEP_PROGRESS:{self.step_name};;{json.dumps(self.snapshot(now), separators=(',', ':'))}")
+
+
+@contextlib.contextmanager
+def tracking(step_name: str = None, interval: float = PROGRESS_INTERVAL, line_prefix: str = ""):
+    """
+    Routes the progress calls made in this process to a reporter for `step_name` while
+    the block runs, and writes the final state at the end. Without a step name (e.g.
+    when a step module is run as a script) progress calls do nothing.
+    """
+    global _current
+    previous = _current
+    _current = ProgressReporter(step_name, interval, line_prefix=line_prefix) if step_name else None
+    try:
+        yield _current
+    finally:
+        if _current is not None:
+            _current.flush()
+        _current = previous
+
+
+def begin(total: int = None, unit: str = "items"):
+    """
+    Starts reporting the progress of the running step over `total` units, e.g.
+    begin(len(files), "files"). A step with several phases calls it once per phase.
+    """
+    if _current is not None:
+        _current.begin(total, unit)
+
+
+def advance(units: int = 1, nbytes: int = 0):
+    """Reports `units` more units and `nbytes` more bytes processed by the running step."""
+    if _current is not None:
+        _current.advance(units, nbytes)
@@ -0,0 +1,61 @@
+import importlib
+import importlib.util
+
+from ai_safe_ops.artifacts import ARTIFACT_TYPES
+
+# Step functions resolved in this process, keyed by (module name, function name).
+_step_functions = {}
+
+
+def validate_steps(steps: list[dict]):
+    """
+    Checks that the module of every workflow step exists, without importing it, so a
+    misspelled module fails before the run starts rather than when the step is reached.
+    Only the module's parent packages are imported; heavy dependencies of a step are
+    not loaded until the step runs. A step's optional "timeout" must be a positive
+    number of seconds and its "retries" a non-negative integer. Its optional "returns"
+    names the output its function returns and that output's artifact type, and its
+    optional "process_pool" (a boolean) marks a step that starts a process pool sized
+    by its `max_workers` argument.
+
+    Args:
+        steps: The "steps" list of a workflow definition.
+    """
+    for step in steps:
+        try:
+            spec = importlib.util.find_spec(step["module"])
+        except ModuleNotFoundError:
+            spec = None
+        if spec is None:
+            raise ValueError(f"Step '{step['name']}' references unknown module '{step['module']}'.")
+        timeout = step.get("timeout")
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise ValueError(f"Step '{step['name']}' has an invalid timeout {timeout!r}; expected a positive number of seconds.")
+        retries = step.get("retries", 0)
+        if isinstance(retries, bool) or not isinstance(retries, int) or retries < 0:
+            raise ValueError(f"Step '{step['name']}' has an invalid retries value {retries!r}; expected a non-negative integer.")
+        if not isinstance(step.get("process_pool", False), bool):
+            raise ValueError(f"Step '{step['name']}' has an invalid process_pool value {step['process_pool']!r}; expected true or false.")
+        returns = step.get("returns", {})
+        if not isinstance(returns, dict) or len(returns) > 1:
+            raise ValueError(f"Step '{step['name']}' must return at most one output, as {{\"<output>\": \"<type>\"}}.")
+        for output_key, artifact_type in returns.items():
+            if artifact_type not in ARTIFACT_TYPES:
+                raise ValueError(f"Step '{step['name']}' returns '{output_key}' of unknown artifact type '{artifact_type}'. Choose one of: {', '.join(ARTIFACT_TYPES)}.")
+            if output_key in step.get("outputs", {}):
+                raise ValueError(f"Step '{step['name']}' declares '{output_key}' both as an output file and as its return value.")
+
+
+def resolve_step(module_name: str, function_name: str):
+    """
+    Returns the function of a step, importing its module on first use. The function is
+    looked up once per process and reused for later runs of the same step.
+    """
+    key = (module_name, function_name)
+    if key not in _step_functions:
+        module = importlib.import_module(module_name)
+        try:
+            _step_functions[key] = getattr(module, function_name)
+        except AttributeError:
+            raise ValueError(f"Module '{module_name}' has no step function '{function_name}'.") from None
+    return _step_functions[key]
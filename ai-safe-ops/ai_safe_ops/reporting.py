@@ -0,0 +1,195 @@
+import heapq
+import json
+import os
+import posixpath
+from collections import Counter
+from pathlib import Path
+from urllib.parse import quote
+
+from ai_safe_ops.run_store import RISK_LEVELS
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+TOOL_NAME = "AI Safe Ops 360"
+# SARIF result levels of our risk levels.
+SARIF_LEVELS = {"High": "error", "Medium": "warning", "Low": "note", "Info": "none"}
+# Finding fields copied into the properties of a SARIF result. PII values are left out
+# on purpose, as SARIF files are uploaded to code scanning services.
+SARIF_PROPERTIES = ("risk_level", "diff_status", "pii_type", "term", "key", "key_path", "rule", "secret_type")
+
+DEFAULT_SECTION_CAP = 50
+DEFAULT_TOP_N = 10
+
+_RISK_RANK = {level: rank for rank, level in enumerate(RISK_LEVELS)}
+
+
+def risk_rank(finding: dict) -> int:
+    """Returns the sort rank of a finding's risk level, most severe first."""
+    return _RISK_RANK.get(finding.get("risk_level", "Info"), len(RISK_LEVELS))
+
+
+def describe(finding: dict) -> str:
+    """Returns a one-line description of a finding."""
+    if finding.get("description"):
+        return finding["description"]
+    if finding.get("pii_type"):
+        return f"Possible {finding['pii_type'].replace('_', ' ').lower()} in source."
+    return finding.get("type", "Finding").replace("_", " ").capitalize() + "."
+
+
+def relative_file(file_path: str, root: str = None) -> str:
+    """
+    Returns a finding's file path as a POSIX path relative to the codebase `root`.
+    Absolute paths outside the root (or without one) are returned unchanged.
+    """
+    if os.path.isabs(file_path) and root:
+        relative = os.path.relpath(file_path, root)
+        if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+            file_path = relative
+    if os.path.isabs(file_path):
+        return file_path
+    return posixpath.normpath(file_path.replace("\\", "/"))
+
+
+class FindingAggregator:
+    """
+    Aggregates a stream of classified findings in one pass: counts by type and risk
+    level, the files with the most findings, and, per finding type, the `section_cap`
+    most severe findings (earlier findings win ties). Memory use is bounded by the
+    number of types and files, not by the number of findings.
+    """
+
+    def __init__(self, section_cap: int = DEFAULT_SECTION_CAP, top_n: int = DEFAULT_TOP_N, root: str = None):
+        self.section_cap = section_cap
+        self.top_n = top_n
+        self.root = root
+        self.total = 0
+        self.new = 0
+        self.counts = Counter()
+        self.new_counts = Counter()
+        self.file_counts = Counter()
+        self.high_file_counts = Counter()
+        self.type_counts = Counter()
+        # Per type, a heap of (-rank, -sequence, finding) holding the kept findings;
+        # its root is the least severe, latest finding, which is dropped first.
+        self._kept = {}
+
+    def add(self, finding: dict):
+        finding_type = finding.get("type")
+        risk_level = finding.get("risk_level", "Info")
+        is_new = finding.get("diff_status") == "new"
+        self.total += 1
+        self.new += is_new
+        self.counts[finding_type, risk_level] += 1
+        self.new_counts[finding_type, risk_level] += is_new
+        self.type_counts[finding_type] += 1
+        if finding.get("file"):
+            file_path = relative_file(finding["file"], self.root)
+            self.file_counts[file_path] += 1
+            self.high_file_counts[file_path] += risk_level == "High"
+
+        if self.section_cap <= 0:
+            return
+        kept = self._kept.setdefault(finding_type, [])
+        entry = (-risk_rank(finding), -self.total, finding)
+        if len(kept) < self.section_cap:
+            heapq.heappush(kept, entry)
+        elif entry[:2] > kept[0][:2]:
+            heapq.heapreplace(kept, entry)
+
+    def by_type(self) -> list[tuple]:
+        """Returns (type, risk_level, count, new_count) rows like RunStore.count_findings."""
+        rows = sorted(
+            self.counts.items(),
+            key=lambda item: (_RISK_RANK.get(item[0][1], len(RISK_LEVELS)), -item[1], item[0][0] or ""),
+        )
+        return [(finding_type, risk_level, count, self.new_counts[finding_type, risk_level]) for (finding_type, risk_level), count in rows]
+
+    def top_files(self) -> list[tuple]:
+        """Returns (file, count, high_count) rows like RunStore.top_files."""
+        files = sorted(self.file_counts.items(), key=lambda item: (-item[1], item[0]))[:self.top_n]
+        return [(file, count, self.high_file_counts[file]) for file, count in files]
+
+    def section(self, finding_type: str) -> list[dict]:
+        """Returns the kept findings of a type, most severe first."""
+        return [finding for _, _, finding in sorted(self._kept.get(finding_type, []), reverse=True)]
+
+    def summary(self) -> dict:
+        """Returns the aggregation as a JSON-serializable summary."""
+        by_risk = Counter()
+        by_type = {}
+        for finding_type, risk_level, count, _ in self.by_type():
+            by_risk[risk_level] += count
+            by_type.setdefault(finding_type, {})[risk_level] = count
+        return {
+            "total": self.total,
+            "new": self.new,
+            "by_risk": {level: by_risk[level] for level in RISK_LEVELS if by_risk[level]},
+            "by_type": by_type,
+            "top_files": [{"file": file, "findings": count, "high": high} for file, count, high in self.top_files()],
+            "listed": {finding_type: min(count, self.section_cap) for finding_type, count in self.type_counts.items()},
+        }
+
+
+class SarifWriter:
+    """
+    Streams findings into a SARIF 2.1.0 log with a single run. Results are written as
+    they are added; the rules, one per finding type, are written when the log is closed.
+    Use as a context manager.
+
+    File locations are relative to %SRCROOT%, the codebase `root`; absolute paths
+    below it are made relative, others are written as file URIs without a base.
+    """
+
+    def __init__(self, output_file: str, root: str = None):
+        self.path = output_file
+        self.root = root
+        self.count = 0
+        self._rules = {}
+        self._file = open(output_file, "w", encoding="utf-8")
+        self._file.write(f'{{"$schema": "{SARIF_SCHEMA}", "version": "{SARIF_VERSION}", "runs": [{{"results": [')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, finding: dict):
+        rule_id = finding.get("type") or "FINDING"
+        level = SARIF_LEVELS.get(finding.get("risk_level"), "none")
+        self._rules.setdefault(rule_id, level)
+        result = {"ruleId": rule_id, "level": level, "message": {"text": describe(finding)}}
+        if finding.get("file"):
+            file_path = relative_file(finding["file"], self.root)
+            if os.path.isabs(file_path):
+                location = {"artifactLocation": {"uri": Path(file_path).as_uri()}}
+            else:
+                location = {"artifactLocation": {"uri": quote(file_path), "uriBaseId": "%SRCROOT%"}}
+            if finding.get("line"):
+                location["region"] = {"startLine": finding["line"]}
+                if finding.get("column"):
+                    location["region"]["startColumn"] = finding["column"]
+            result["locations"] = [{"physicalLocation": location}]
+        properties = {key: finding[key] for key in SARIF_PROPERTIES if finding.get(key) is not None}
+        if properties:
+            result["properties"] = properties
+
+        self._file.write(("," if self.count else "") + "\n" + json.dumps(result, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        rules = [
+            {
+                "id": rule_id,
+                "name": rule_id.title().replace("_", ""),
+                "shortDescription": {"text": rule_id.replace("_", " ").capitalize()},
+                "defaultConfiguration": {"level": level},
+            }
+            for rule_id, level in sorted(self._rules.items())
+        ]
+        tool = {"driver": {"name": TOOL_NAME, "rules": rules}}
+        self._file.write(f'\n], "tool": {json.dumps(tool)}}}]}}\n')
+        self._file.close()
@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import time
+
+from ai_safe_ops.findings import iter_findings
+
+# Outputs larger than this are recorded without their content (e.g. the ingest corpus).
+MAX_STORED_OUTPUT_SIZE = 8 * 1024 * 1024
+# How an output is recorded besides its content, set per output in a step's "store" field.
+OUTPUT_KINDS = ("findings", "bandit", "manifest")
+# Risk levels from most to least severe.
+RISK_LEVELS = ("High", "Medium", "Low", "Info")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    codebase TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    run_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    kind TEXT,
+    size INTEGER,
+    content BLOB,
+    PRIMARY KEY (run_id, step, name)
+);
+CREATE TABLE IF NOT EXISTS files (
+    run_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER,
+    sha256 TEXT,
+    language TEXT,
+    lines INTEGER,
+    PRIMARY KEY (run_id, path)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    output TEXT,
+    type TEXT,
+    risk_level TEXT,
+    file TEXT,
+    line INTEGER,
+    diff_status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outputs_path ON outputs (run_id, path);
+CREATE INDEX IF NOT EXISTS files_language ON files (run_id, language);
+CREATE INDEX IF NOT EXISTS findings_type ON findings (run_id, step, type, risk_level);
+CREATE INDEX IF NOT EXISTS findings_risk ON findings (run_id, step, risk_level);
+CREATE INDEX IF NOT EXISTS findings_file ON findings (run_id, step, file);
+"""
+
+
+def default_run_store_path(run_id: str) -> str:
+    """Returns the location of a per-run store, next to the step result cache."""
+    return os.path.join(os.getcwd(), ".ai-safe-ops", "runs", f"{run_id}.sqlite")
+
+
+def _bandit_findings(output_path: str):
+    """Turns the results of a Bandit JSON report into findings."""
+    with open(output_path, "r") as f:
+        report = json.load(f)
+    for result in report.get("results", []):
+        yield {
+            "type": "STATIC_CODE",
+            "risk_level": result.get("issue_severity", "").title() or None,
+            "file": result.get("filename"),
+            "line": result.get("line_number"),
+            **result,
+        }
+
+
+class RunStore:
+    """
+    Records the outputs and findings of workflow runs in one SQLite database.
+
+    The database can hold a single run or be shared by many runs; it is opened in WAL
+    mode so reports and ad-hoc queries can read while a run is being recorded. Only
+    the workflow runner writes to it, after each step has completed.
+    """
+
+    def __init__(self, db_path: str):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.path = db_path
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        # Stores written before findings were keyed on their output lack the column.
+        if "output" not in {row[1] for row in self.connection.execute("PRAGMA table_info(findings)")}:
+            self.connection.execute("ALTER TABLE findings ADD COLUMN output TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def start_run(self, run_id: str, workflow: str, codebase: str = None):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, NULL, 'running')",
+                (run_id, workflow, os.path.abspath(codebase) if codebase else None, time.time()),
+            )
+
+    def finish_run(self, run_id: str, status: str):
+        with self.connection:
+            self.connection.execute("UPDATE runs SET finished_at = ?, status = ? WHERE id = ?", (time.time(), status, run_id))
+
+    def record_output(self, run_id: str, step: str, name: str, output_path: str, kind: str = None):
+        """
+        Records a step output. Its content is stored if it is small enough; "findings"
+        and "bandit" outputs are also loaded into the findings table and a "manifest"
+        output (the ingest manifest) into the files table.
+        """
+        if kind is not None and kind not in OUTPUT_KINDS:
+            raise ValueError(f"Unknown output kind '{kind}' for output '{name}' of step '{step}'.")
+        exists = os.path.isfile(output_path)
+        size = os.path.getsize(output_path) if exists else None
+        content = None
+        if exists and size <= MAX_STORED_OUTPUT_SIZE:
+            with open(output_path, "rb") as f:
+                content = f.read()
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, step, name, os.path.abspath(output_path), kind, size, content),
+            )
+            if not exists:
+                return
+            if kind in ("findings", "bandit"):
+                # Re-recording an output replaces its findings, not those of the step's other outputs.
+                self.connection.execute("DELETE FROM findings WHERE run_id = ? AND step = ? AND output = ?", (run_id, step, name))
+                findings = iter_findings(output_path) if kind == "findings" else _bandit_findings(output_path)
+                self.connection.executemany(
+                    "INSERT INTO findings (run_id, step, output, type, risk_level, file, line, diff_status, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (run_id, step, name, finding.get("type"), finding.get("risk_level"), finding.get("file"),
+                         finding.get("line"), finding.get("diff_status"), json.dumps(finding))
+                        for finding in findings
+                    ),
+                )
+            elif kind == "manifest":
+                with open(output_path, "r") as f:
+                    manifest = json.load(f)
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (run_id, entry["path"], entry.get("size"), entry.get("sha256"), entry.get("language"), entry.get("lines"))
+                        for entry in manifest.get("files", [])
+                    ),
+                )
+
+    def step_of_output(self, run_id: str, output_path: str):
+        """Returns the name of the step that wrote `output_path` in a run, or None."""
+        row = self.connection.execute(
+            "SELECT step FROM outputs WHERE run_id = ? AND path = ?", (run_id, os.path.abspath(output_path))
+        ).fetchone()
+        return row[0] if row else None
+
+    def count_findings(self, run_id: str, step: str) -> list[tuple]:
+        """Returns (type, risk_level, count, new_count) rows, most severe risk first."""
+        return self.connection.execute(
+            f"""
+            SELECT type, risk_level, COUNT(*), SUM(CASE WHEN diff_status = 'new' THEN 1 ELSE 0 END)
+            FROM findings WHERE run_id = ? AND step = ?
+            GROUP BY type, risk_level
+            ORDER BY {self._risk_order("risk_level")}, COUNT(*) DESC, type
+            """,
+            (run_id, step),
+        ).fetchall()
+
+    def count_by_field(self, run_id: str, step: str, field: str) -> list[tuple]:
+        """Returns (value, count) rows for a field of the findings' JSON data, most frequent first."""
+        return self.connection.execute(
+            """
+            SELECT json_extract(data, ?) AS value, COUNT(*) FROM findings
+            WHERE run_id = ? AND step = ? GROUP BY value ORDER BY COUNT(*) DESC, value
+            """,
+            (f"$.{field}", run_id, step),
+        ).fetchall()
+
+    def top_files(self, run_id: str, step: str, limit: int = 10) -> list[tuple]:
+        """Returns the (file, count, high_count) rows of the files with the most findings."""
+        return self.connection.execute(
+            """
+            SELECT file, COUNT(*), SUM(CASE WHEN risk_level = 'High' THEN 1 ELSE 0 END) FROM findings
+            WHERE run_id = ? AND step = ? AND file IS NOT NULL
+            GROUP BY file ORDER BY COUNT(*) DESC, file LIMIT ?
+            """,
+            (run_id, step, limit),
+        ).fetchall()
+
+    def count_by_location(self, run_id: str, step: str):
+        """Yields (file, line, count) rows for every location of a step's findings, in file and line order."""
+        yield from self.connection.execute(
+            "SELECT file, line, COUNT(*) FROM findings WHERE run_id = ? AND step = ? GROUP BY file, line ORDER BY file, line",
+            (run_id, step),
+        )
+
+    @staticmethod
+    def _risk_order(column: str) -> str:
+        cases = " ".join(f"WHEN '{level}' THEN {rank}" for rank, level in enumerate(RISK_LEVELS))
+        return f"CASE {column} {cases} ELSE {len(RISK_LEVELS)} END"
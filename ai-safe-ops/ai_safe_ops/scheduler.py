@@ -0,0 +1,324 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from ai_safe_ops import progress
+from ai_safe_ops.registry import resolve_step
+from ai_safe_ops.telemetry import StepMeter
+
+# Matches a reference to another step's output, e.g. "{steps.ingest_codebase.outputs.output_file}".
+STEP_REFERENCE_PATTERN = re.compile(r"\{steps\.([^.}]+)\.outputs\.([^}]+)\}")
+# Seconds a timed-out or cancelled step gets to exit after SIGTERM before it is killed.
+TERMINATE_GRACE_PERIOD = 5.0
+# Seconds to wait before the first retry of a failed step; doubled for every further retry.
+RETRY_DELAY = 1.0
+
+
+class StepFailedError(Exception):
+    """Raised when a workflow step fails. Carries the name of the failing step."""
+
+    def __init__(self, step_name: str, error: Exception):
+        super().__init__(str(error))
+        self.step_name = step_name
+
+
+class StepTimeoutError(TimeoutError):
+    """Raised when a step runs longer than its timeout."""
+
+
+class StepCancelledError(Exception):
+    """Raised for a step that does not run because a step it depends on failed."""
+
+
+def find_step_references(value) -> list[tuple[str, str]]:
+    """
+    Returns all (step_name, output_key) references contained in an input value.
+    Lists and dicts are searched recursively.
+    """
+    if isinstance(value, str):
+        return STEP_REFERENCE_PATTERN.findall(value)
+    if isinstance(value, list):
+        return [ref for item in value for ref in find_step_references(item)]
+    if isinstance(value, dict):
+        return [ref for item in value.values() for ref in find_step_references(item)]
+    return []
+
+
+def build_step_graph(steps: list[dict]) -> dict[str, set[str]]:
+    """
+    Builds the dependency graph of a workflow from its "{steps.X.outputs.Y}" references.
+
+    Args:
+        steps: The "steps" list of a workflow definition.
+
+    Returns:
+        A dict mapping each step name to the set of step names it depends on,
+        in workflow order.
+    """
+    step_names = [step["name"] for step in steps]
+    graph = {}
+    for step in steps:
+        dependencies = set()
+        for step_name, _ in find_step_references(step.get("inputs", {})):
+            if step_name not in step_names:
+                raise ValueError(f"Step '{step['name']}' references unknown step '{step_name}'.")
+            dependencies.add(step_name)
+        graph[step["name"]] = dependencies
+
+    # Detect cycles up front so the scheduler can never stall.
+    resolved = set()
+    remaining = dict(graph)
+    while remaining:
+        ready = [name for name, deps in remaining.items() if deps <= resolved]
+        if not ready:
+            raise ValueError(f"Workflow contains a dependency cycle between steps: {', '.join(remaining)}")
+        for name in ready:
+            resolved.add(name)
+            del remaining[name]
+    return graph
+
+
+def execute_step(module_name: str, function_name: str, kwargs: dict, step_name: str = None, line_prefix: str = "") -> tuple[dict, object]:
+    """
+    Resolves and calls a step function. This is the entry point for worker processes.
+    With a `step_name`, the step's calls to ai_safe_ops.progress are written as
+    STEP_PROGRESS lines, prefixed with `line_prefix`.
+
+    Returns:
+        A (metrics, result) tuple: the resources the step used, as measured by
+        StepMeter (importing the step's module is not counted), and the value the
+        step function returned.
+    """
+    try:
+        step_function = resolve_step(module_name, function_name)
+        with progress.tracking(step_name, line_prefix=line_prefix), StepMeter() as meter:
+            result = step_function(**kwargs)
+        return meter.metrics, result
+    finally:
+        # Steps print progress messages; flush them before the parent reports the step as done
+        # so they never interleave with protocol lines.
+        sys.stdout.flush()
+
+
+def _run_in_child(connection, module_name: str, function_name: str, kwargs: dict, step_name: str, line_prefix: str):
+    """Entry point of a step process: runs the step and sends ("ok", (metrics, result)) or ("error", exception) back."""
+    # A process group of its own lets the runner stop the step together with the
+    # subprocesses it started (pip-audit, bandit), and keeps Ctrl-C away from it: the
+    # runner handles the interrupt and cancels the step.
+    os.setpgid(0, 0)
+    try:
+        outcome = ("ok", execute_step(module_name, function_name, kwargs, step_name, line_prefix))
+    except BaseException as e:
+        outcome = ("error", e)
+    try:
+        connection.send(outcome)
+    except Exception as e:
+        # The exception or the step's return value cannot be pickled; send the error instead.
+        error = outcome[1] if outcome[0] == "error" else e
+        connection.send(("error", RuntimeError(f"{type(error).__name__}: {error}")))
+    connection.close()
+
+
+async def _stop_step_process(process: multiprocessing.Process):
+    """Terminates a step process and its subprocesses, killing whatever outlives TERMINATE_GRACE_PERIOD."""
+    loop = asyncio.get_running_loop()
+    for signum, grace_period in ((signal.SIGTERM, TERMINATE_GRACE_PERIOD), (signal.SIGKILL, None)):
+        try:
+            os.killpg(process.pid, signum)
+        except ProcessLookupError:
+            # The group is gone, or the step has not moved to its own group yet.
+            if process.is_alive():
+                os.kill(process.pid, signum)
+        await loop.run_in_executor(None, process.join, grace_period)
+
+
+async def _run_step_process(module_name: str, function_name: str, kwargs: dict, step_name: str, line_prefix: str) -> tuple[dict, object]:
+    """Runs a step in a process of its own, which is stopped if the awaiting task is cancelled."""
+    loop = asyncio.get_running_loop()
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_run_in_child,
+        args=(sender, module_name, function_name, kwargs, step_name, line_prefix),
+        name=f"ai-safe-ops step {step_name}",
+    )
+    process.start()
+    sender.close()
+    try:
+        readable = loop.create_future()
+        loop.add_reader(receiver.fileno(), lambda: readable.done() or readable.set_result(None))
+        try:
+            await readable
+        except asyncio.CancelledError:
+            await _stop_step_process(process)
+            raise
+        finally:
+            loop.remove_reader(receiver.fileno())
+        try:
+            status, value = receiver.recv()
+        except EOFError:
+            await loop.run_in_executor(None, process.join)
+            status, value = "error", RuntimeError(f"The step process exited with code {process.exitcode}.")
+    finally:
+        receiver.close()
+    await loop.run_in_executor(None, process.join)
+    if status == "error":
+        raise value
+    return value
+
+
+async def _run_attempt(run, step_name: str, timeout: float = None) -> tuple[dict, object]:
+    """Awaits one attempt of a step, cancelling it if it takes longer than `timeout` seconds."""
+    task = asyncio.ensure_future(run)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+    except asyncio.CancelledError:
+        task.cancel()
+        await asyncio.wait({task})
+        raise
+    if not done:
+        task.cancel()
+        await asyncio.wait({task})
+        raise StepTimeoutError(f"Step '{step_name}' did not finish within {timeout:g} seconds.")
+    return task.result()
+
+
+async def run_step_graph_async(
+    graph: dict[str, set[str]],
+    prepare_step,
+    on_step_start,
+    on_step_done,
+    max_workers: int = None,
+    executor: ProcessPoolExecutor = None,
+    line_prefix: str = "",
+    step_options: dict[str, dict] = None,
+    on_step_event=None,
+):
+    """
+    Runs the steps of a dependency graph as asyncio tasks. See run_step_graph.
+
+    Every step runs in a process of its own, so a step that exceeds its timeout, or
+    is cancelled, is terminated along with its subprocesses. With `executor`, steps
+    run in that pool instead; a timed-out step is then abandoned rather than stopped
+    and keeps its worker busy until it ends.
+    """
+    step_options = step_options or {}
+    slots = asyncio.Semaphore(max_workers or os.cpu_count() or 1)
+    tasks = {}
+    failures = []
+
+    def notify(step_name, event, detail=None):
+        if on_step_event is not None:
+            on_step_event(step_name, event, detail)
+
+    def fail(step_name, error):
+        failures.append(StepFailedError(step_name, error))
+        notify(step_name, "failed", error)
+        return failures[-1]
+
+    async def run_step(step_name):
+        try:
+            await asyncio.gather(*(tasks[name] for name in graph[step_name]))
+        except Exception as e:
+            notify(step_name, "cancelled", e)
+            raise StepCancelledError(f"Step '{step_name}' was cancelled because a step it depends on failed.") from e
+
+        try:
+            prepared = prepare_step(step_name)
+        except Exception as e:
+            raise fail(step_name, e) from e
+        if prepared is None:
+            return
+        module_name, function_name, kwargs = prepared
+        options = step_options.get(step_name, {})
+        timeout = options.get("timeout")
+        retries = options.get("retries", 0)
+
+        async with slots:
+            on_step_start(step_name)
+            for attempt in range(retries + 1):
+                if executor is not None:
+                    future = executor.submit(execute_step, module_name, function_name, kwargs, step_name, line_prefix)
+                    run = asyncio.wrap_future(future)
+                else:
+                    run = _run_step_process(module_name, function_name, kwargs, step_name, line_prefix)
+                try:
+                    metrics, result = await _run_attempt(run, step_name, timeout)
+                    break
+                except Exception as e:
+                    error = e
+                if attempt == retries:
+                    raise fail(step_name, error) from error
+                notify(step_name, "retry", error)
+                await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+        try:
+            on_step_done(step_name, metrics, result)
+        except Exception as e:
+            raise fail(step_name, e) from e
+
+    for step_name in graph:
+        tasks[step_name] = asyncio.create_task(run_step(step_name), name=step_name)
+    try:
+        # Steps that do not depend on a failed step run to completion, so their
+        # outputs are available for a partial report.
+        await asyncio.wait(tasks.values())
+    except asyncio.CancelledError:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.wait(tasks.values())
+        raise
+    # Retrieve every task's exception so none is reported as never retrieved.
+    for task in tasks.values():
+        if not task.cancelled():
+            task.exception()
+    if failures:
+        raise failures[0]
+
+
+def run_step_graph(
+    graph: dict[str, set[str]],
+    prepare_step,
+    on_step_start,
+    on_step_done,
+    max_workers: int = None,
+    executor: ProcessPoolExecutor = None,
+    line_prefix: str = "",
+    step_options: dict[str, dict] = None,
+    on_step_event=None,
+):
+    """
+    Runs the steps of a dependency graph, starting every step as soon as all of its
+    dependencies have completed. Independent steps run concurrently, each in a process
+    of its own.
+
+    When a step fails, the steps that depend on it are cancelled while the others run
+    to completion; the first failure is then raised as a StepFailedError. On Ctrl-C,
+    all running steps are stopped and KeyboardInterrupt is raised.
+
+    Args:
+        graph: The dependency graph as returned by build_step_graph.
+        prepare_step: Called with a step name right before it runs. Returns a
+            (module_name, function_name, kwargs) tuple, or None if the step's outputs
+            are already available (e.g. from the cache) and it does not need to run.
+        on_step_start: Called with a step name when the step is started.
+        on_step_done: Called with a step name, the step's metrics and the value
+            its function returned (see execute_step) when the step has completed.
+        max_workers: The maximum number of steps running at the same time.
+            1 runs the steps one after another, still with timeouts and retries.
+        executor: A process pool to run the steps in, e.g. one shared by several
+            runs. It is left running afterwards.
+        line_prefix: Put in front of the STEP_PROGRESS lines of the steps.
+        step_options: Maps step names to their "timeout" (seconds per attempt) and
+            "retries" (further attempts after a failure or timeout).
+        on_step_event: Called with a step name, an event and the error causing it
+            when a step is retried ("retry"), fails ("failed") or is cancelled
+            because a dependency failed ("cancelled").
+    """
+    asyncio.run(run_step_graph_async(
+        graph, prepare_step, on_step_start, on_step_done,
+        max_workers=max_workers, executor=executor, line_prefix=line_prefix,
+        step_options=step_options, on_step_event=on_step_event,
+    ))
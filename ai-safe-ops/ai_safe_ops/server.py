@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import traceback
+from contextlib import contextmanager
+
+from ai_safe_ops.main import build_arg_parser, run_cli
+from ai_safe_ops.registry import resolve_step
+
+WORKFLOW_DIR = os.path.join(os.path.dirname(__file__), "workflows")
+DEFAULT_SOCKET_PATH = os.environ.get(
+    "AI_SAFE_OPS_SOCKET", os.path.join(os.path.expanduser("~"), ".ai-safe-ops", "worker.sock")
+)
+# Sent after the last output line of a run, followed by the run's stderr output.
+EXIT_PREFIX = "SERVER_EXIT:"
+
+
+def preload_steps(workflow_dir: str = WORKFLOW_DIR, workflow_names: list[str] = None):
+    """
+    Resolves the step functions of every workflow in `workflow_dir` (or only of
+    `workflow_names`) and calls their modules' optional `preload()` function (e.g. to
+    load a spaCy model). Step processes are forked from the server, so they inherit
+    everything loaded here.
+    """
+    step_functions = set()
+    for file_name in sorted(os.listdir(workflow_dir)):
+        if file_name.endswith(".json") and (workflow_names is None or file_name[:-5] in workflow_names):
+            with open(os.path.join(workflow_dir, file_name), "r") as f:
+                step_functions.update((step["module"], step["function"]) for step in json.load(f)["steps"])
+
+    for module_name, function_name in sorted(step_functions):
+        try:
+            resolve_step(module_name, function_name)
+            preload = getattr(sys.modules[module_name], "preload", None)
+            if preload is not None:
+                preload()
+        except Exception as e:
+            # A step that cannot be preloaded is imported again (and fails properly) when it runs.
+            print(f"Warning: could not preload {module_name}: {e}", file=sys.stderr, flush=True)
+
+
+@contextmanager
+def _redirect_output(stdout_fd: int, stderr_fd: int):
+    """
+    Points file descriptors 1 and 2 at other files for the duration of a run, so the
+    output of step processes and subprocesses is redirected along with our own.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    try:
+        yield
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except OSError:
+                # The client has disconnected.
+                pass
+        os.dup2(saved_stdout, 1)
+        os.dup2(saved_stderr, 2)
+        os.close(saved_stdout)
+        os.close(saved_stderr)
+
+
+def run_request(request: dict, stdout_fd: int, stderr_fd: int) -> int:
+    """
+    Runs one workflow request: `argv` holds the arguments of the ai_safe_ops.main
+    command line and `cwd` the directory to run in. Returns the exit code.
+    """
+    previous_cwd = os.getcwd()
+    with _redirect_output(stdout_fd, stderr_fd):
+        try:
+            os.chdir(request.get("cwd") or previous_cwd)
+            return run_cli(build_arg_parser().parse_args(request["argv"]))
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            os.chdir(previous_cwd)
+
+
+class WorkflowRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one connection: reads a JSON request line, streams the run's stdout
+    (the STEP_* protocol) back as it is produced, then sends an EXIT_PREFIX line with
+    the exit code followed by everything the run wrote to stderr.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except json.JSONDecodeError as e:
+            self.wfile.write(f"{EXIT_PREFIX}2\nInvalid request: {e}\n".encode("utf-8"))
+            return
+
+        with tempfile.TemporaryFile() as stderr_file:
+            exit_code = run_request(request, self.connection.fileno(), stderr_file.fileno())
+            stderr_file.seek(0)
+            errors = stderr_file.read()
+        try:
+            self.wfile.write(f"{EXIT_PREFIX}{exit_code}\n".encode("utf-8"))
+            self.wfile.write(errors)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str):
+    """Removes a socket file left behind by a server that is no longer running."""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.remove(socket_path)
+            return
+    raise RuntimeError(f"A worker is already listening on {socket_path}")
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, preload: bool = True):
+    """
+    Runs a long-lived workflow worker listening on a Unix socket.
+
+    Step modules, models and plugin registries are loaded once at startup and stay
+    warm across runs. Requests are handled one at a time; further clients wait until
+    the current run has finished.
+
+    Args:
+        socket_path: The path of the Unix socket to listen on.
+        preload: Whether to import and preload every workflow's step modules at startup.
+    """
+    socket_dir = os.path.dirname(socket_path)
+    if socket_dir:
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    _remove_stale_socket(socket_path)
+
+    if preload:
+        preload_steps()
+
+    # Turn SIGTERM into a normal exit so the socket file is removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    previous_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, WorkflowRequestHandler)
+    finally:
+        os.umask(previous_umask)
+
+    print(f"Serving workflows on {socket_path}", flush=True)
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def build_serve_arg_parser() -> argparse.ArgumentParser:
+    """Returns the argument parser of the `serve` command."""
+    parser = argparse.ArgumentParser(prog="ai_safe_ops.main serve", description="Run a warm workflow worker on a Unix socket.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"The path of the Unix socket. Defaults to {DEFAULT_SOCKET_PATH}.")
+    parser.add_argument("--no-preload", action="store_true", help="Do not import step modules and models at startup.")
+    return parser
@@ -0,0 +1,100 @@
+import os
+import re
+from array import array
+from bisect import bisect_right
+
+# Size of the blocks read when building an index from a file.
+BLOCK_SIZE = 16 * 1024 * 1024
+NEWLINE = re.compile(rb"\n")
+
+
+def _line_starts(data, base: int = 0) -> list[int]:
+    """
+    Returns the offsets (shifted by `base`) of every byte following a newline in
+    `data`, which can be any buffer, including an mmap. The newlines are searched in
+    place, without copying the data into a list of lines.
+    """
+    return [base + match.end() for match in NEWLINE.finditer(data)]
+
+
+class SourceIndex:
+    """
+    Maps byte offsets in an ingest corpus to (file, line, column).
+
+    The index holds the start offset of every corpus line in a compact array and,
+    if the ingest manifest is given, the byte range of every file in the corpus.
+    Lookups are binary searches, so locating a finding is O(log n) instead of
+    counting newlines from the start of the corpus.
+    """
+
+    def __init__(self, line_starts: array, files: list[dict] = None):
+        self.line_starts = line_starts
+        self.files = files or []
+        self._file_starts = [f["start"] for f in self.files]
+
+    @classmethod
+    def build(cls, data, files: list[dict] = None) -> "SourceIndex":
+        """Builds an index over an in-memory corpus (bytes, bytearray or mmap)."""
+        typecode = "I" if len(data) < 2 ** 32 else "Q"
+        line_starts = array(typecode, [0])
+        line_starts.extend(_line_starts(data))
+        return cls(line_starts, files)
+
+    @classmethod
+    def build_from_file(cls, corpus_file: str, files: list[dict] = None) -> "SourceIndex":
+        """Builds an index by streaming a corpus file in blocks."""
+        typecode = "I" if os.path.getsize(corpus_file) < 2 ** 32 else "Q"
+        line_starts = array(typecode, [0])
+        offset = 0
+        with open(corpus_file, "rb") as f:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+                line_starts.extend(_line_starts(block, offset))
+                offset += len(block)
+        return cls(line_starts, files)
+
+    @classmethod
+    def load(cls, index_file: str, files: list[dict] = None) -> "SourceIndex":
+        """Loads an index written by `save`."""
+        with open(index_file, "rb") as f:
+            typecode = f.read(1).decode("ascii")
+            line_starts = array(typecode)
+            line_starts.frombytes(f.read())
+        return cls(line_starts, files)
+
+    @classmethod
+    def for_corpus(cls, corpus_file: str, index_file: str = None, manifest: dict = None) -> "SourceIndex":
+        """Loads the index of a corpus if `index_file` exists, otherwise builds it."""
+        files = manifest.get("files") if manifest else None
+        if index_file and os.path.exists(index_file):
+            return cls.load(index_file, files)
+        return cls.build_from_file(corpus_file, files)
+
+    def save(self, index_file: str):
+        """Writes the line offsets to `index_file` (one typecode byte, then the raw array)."""
+        with open(index_file, "wb") as f:
+            f.write(self.line_starts.typecode.encode("ascii"))
+            self.line_starts.tofile(f)
+
+    def line_of(self, offset: int) -> int:
+        """Returns the 1-based corpus line containing a byte offset."""
+        return bisect_right(self.line_starts, offset)
+
+    def file_at(self, offset: int):
+        """Returns the manifest entry of the file containing a byte offset, or None."""
+        i = bisect_right(self._file_starts, offset) - 1
+        if i >= 0 and offset < self.files[i]["end"]:
+            return self.files[i]
+        return None
+
+    def locate(self, offset: int) -> tuple:
+        """
+        Maps a corpus byte offset to (file path, line, column), all 1-based.
+        If the offset is not inside an ingested file, the path is None and
+        line and column refer to the corpus itself.
+        """
+        line = self.line_of(offset)
+        column = offset - self.line_starts[line - 1] + 1
+        entry = self.file_at(offset)
+        if entry is None:
+            return None, line, column
+        return entry["path"], line - self.line_of(entry["start"]) + 1, column
@@ -1,63 +1,133 @@
 import argparse
-import json
 import os
-import re
-import spacy
 import sys
 import subprocess
 
+from ai_safe_ops import progress
+from ai_safe_ops.corpus import Corpus
+from ai_safe_ops.findings import FindingWriter
+from ai_safe_ops.source_index import SourceIndex
+from ai_safe_ops.steps.ingest.ingest_codebase import load_manifest
+
 # A simple list of potentially biased terms.
 # This should be expanded and refined based on research.
 BIAS_TERMS = [
     "master", "slave", "blacklist", "whitelist", "guys", "man-hours"
 ]
 
-def download_spacy_model(model_name="en_core_web_sm"):
-    """Downloads the spaCy model if it's not already installed."""
-    try:
-        spacy.load(model_name)
-    except OSError:
-        print(f"Downloading spaCy model: {model_name}")
-        subprocess.check_call([sys.executable, "-m", "spacy", "download", model_name])
+# Term matching only needs the tokenizer, so every trained component is excluded.
+UNUSED_PIPES = ["tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+# Texts are split into chunks of at most this many bytes before they are fed to spaCy.
+CHUNK_SIZE = 100_000
+
+_nlp_cache = {}
 
-def check_bias_heuristics(gitingest_file_path: str, output_file: str):
+def load_nlp(model_name="en_core_web_sm"):
+    """
+    Loads the spaCy model once per process with all unused components excluded,
+    downloading it first if it is not installed.
+    """
+    if model_name not in _nlp_cache:
+        # spaCy takes several hundred milliseconds to import, so it is only loaded when needed.
+        import spacy
+
+        try:
+            nlp = spacy.load(model_name, exclude=UNUSED_PIPES)
+        except OSError:
+            print(f"Downloading spaCy model: {model_name}")
+            subprocess.check_call([sys.executable, "-m", "spacy", "download", model_name])
+            nlp = spacy.load(model_name, exclude=UNUSED_PIPES)
+        _nlp_cache[model_name] = nlp
+    return _nlp_cache[model_name]
+
+def preload():
+    """Loads the spaCy model ahead of time (called by the workflow server at startup)."""
+    load_nlp()
+
+def _iter_texts(corpus: Corpus):
+    """
+    Yields (text, corpus byte offset) for line-aligned chunks of every ingested file,
+    or of the whole corpus if there is no manifest. A line longer than CHUNK_SIZE is
+    split at a UTF-8 character boundary.
+    """
+    ranges = [(entry["start"], entry["end"]) for entry in corpus.files] or [(0, len(corpus))]
+    for start, end in ranges:
+        while start < end:
+            chunk_end = min(start + CHUNK_SIZE, end)
+            if chunk_end < end:
+                newline = corpus.data.rfind(b"\n", start, chunk_end)
+                if newline >= start:
+                    chunk_end = newline + 1
+                else:
+                    # Back off over continuation bytes, so no multi-byte character is cut in two.
+                    while chunk_end > start + 1 and corpus.data[chunk_end] & 0xC0 == 0x80:
+                        chunk_end -= 1
+            yield corpus.data[start:chunk_end].decode("utf-8", errors="replace"), start
+            start = chunk_end
+
+def check_bias_heuristics(
+    gitingest_file_path: str,
+    output_file: str,
+    manifest_file_path: str = None,
+    line_index_file_path: str = None,
+    batch_size: int = 64,
+    n_process: int = 1,
+):
     """
     Scans codebase comments and variable names for potentially biased language.
-    
+
+    Files (or chunks of the corpus) are streamed through `nlp.pipe` with only the
+    tokenizer enabled, and BIAS_TERMS are matched case-insensitively with a PhraseMatcher.
+
     Args:
         gitingest_file_path: The path to the gitingest file containing the codebase content.
-        output_file: The file path to write the JSON results to.
+        output_file: The file path to write the findings to, as newline-delimited JSON.
+        manifest_file_path: Optional path to the ingest manifest, used to split the corpus per file.
+        line_index_file_path: Optional path to the line index written by the ingest step.
+        batch_size: The number of texts spaCy processes per batch.
+        n_process: The number of processes spaCy uses.
     """
-    download_spacy_model()
-    nlp = spacy.load("en_core_web_sm")
-
     if not os.path.exists(gitingest_file_path):
         raise FileNotFoundError(f"Gitingest file not found: {gitingest_file_path}")
 
-    results = {"findings": []}
-    
-    with open(gitingest_file_path, "r") as f:
-        content = f.read()
-
-    # Simple regex to extract comments and variable names (can be improved)
-    # For now, we just scan the whole text
-    doc = nlp(content)
-    
-    for token in doc:
-        if token.text.lower() in BIAS_TERMS:
-            line_number = content.count('\n', 0, token.idx) + 1
-            finding = {
-                "type": "POTENTIAL_BIAS",
-                "term": token.text,
-                "line": line_number,
-                "description": "Found potentially biased language."
-            }
-            results["findings"].append(finding)
-
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=4)
-
-    print(f"Bias heuristics scan completed. Results written to {output_file}")
+    from spacy.matcher import PhraseMatcher
+
+    nlp = load_nlp()
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    matcher.add("BIAS_TERMS", [nlp.make_doc(term) for term in BIAS_TERMS])
+
+    manifest = load_manifest(manifest_file_path) if manifest_file_path else None
+    index = SourceIndex.for_corpus(gitingest_file_path, line_index_file_path, manifest)
+
+    with Corpus(gitingest_file_path, manifest) as corpus, FindingWriter(output_file) as writer:
+        texts = _iter_texts(corpus)
+        # Chunks come back in corpus order, so progress is the offset of the latest one.
+        progress.begin(len(corpus), "bytes")
+        position = 0
+        for doc, base_offset in nlp.pipe(texts, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            progress.advance(base_offset - position, base_offset - position)
+            position = base_offset
+            # Matches come in document order, so character offsets are converted to
+            # byte offsets incrementally.
+            char_offset = byte_offset = 0
+            for _, start, end in sorted(matcher(doc), key=lambda match: match[1]):
+                span = doc[start:end]
+                byte_offset += len(doc.text[char_offset:span.start_char].encode("utf-8"))
+                char_offset = span.start_char
+                file_path, line_number, column = index.locate(base_offset + byte_offset)
+                finding = {
+                    "type": "POTENTIAL_BIAS",
+                    "term": span.text,
+                    "line": line_number,
+                    "column": column,
+                    "description": "Found potentially biased language."
+                }
+                if file_path:
+                    finding["file"] = file_path
+                writer.write(finding)
+        progress.advance(len(corpus) - position, len(corpus) - position)
+
+    print(f"Bias heuristics scan completed: {writer.count} finding(s). Results written to {output_file}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Scan for biased language in code.")
@@ -1,9 +1,20 @@
 import argparse
+import configparser
 import json
 import os
 import re
-import yaml
-from glob import glob
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+from ai_safe_ops import progress
+from ai_safe_ops.diff_scope import in_scope, load_diff_scope
+from ai_safe_ops.file_walker import walk_files
+from ai_safe_ops.findings import FindingWriter
 
 # Define rules for checking config files
 # This is a basic set of rules and can be expanded
@@ -14,69 +25,156 @@ CONFIG_RULES = {
     }
 }
 
-def scan_config_files(gitingest_file_path: str, output_file: str):
+# All rules are combined into one pattern; the named group tells which rule matched.
+RULE_NAMES = list(CONFIG_RULES)
+RULES_PATTERN = re.compile(
+    "|".join(f"(?P<r{i}>{CONFIG_RULES[name]['pattern']})" for i, name in enumerate(RULE_NAMES)),
+    re.IGNORECASE,
+)
+
+CONFIG_EXTENSIONS = {".yaml", ".yml", ".json", ".toml", ".ini", ".env"}
+# Larger files are data rather than configuration and are skipped.
+MAX_CONFIG_FILE_SIZE = 5 * 1024 * 1024
+# Below this many files, parsing in a process pool costs more than it saves.
+PARALLEL_THRESHOLD = 64
+
+def is_config_file(name: str) -> bool:
+    """Returns True for YAML, JSON, TOML, INI and dotenv files (including ".env.local" etc.)."""
+    return os.path.splitext(name)[1].lower() in CONFIG_EXTENSIONS or name == ".env" or name.startswith(".env.")
+
+def _parse_env(f):
+    data = {}
+    for line in f:
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        data[key.replace("export ", "", 1).strip()] = value.strip()
+    return data
+
+def _parse_ini(f):
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    parser.read_file(f)
+    return {section: dict(parser[section]) for section in parser.sections()} | dict(parser.defaults())
+
+def parse_config_file(file_path: str):
+    """Parses a config file by its extension. Returns the parsed data, or None if it is unsupported."""
+    name = os.path.basename(file_path)
+    extension = os.path.splitext(name)[1].lower()
+    if extension in (".yaml", ".yml"):
+        import yaml
+
+        # libyaml's C loader is much faster than the pure-Python one when it is available.
+        with open(file_path, "r") as f:
+            return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    if extension == ".json":
+        with open(file_path, "r") as f:
+            return json.load(f)
+    if extension == ".toml":
+        if tomllib is None:
+            return None
+        with open(file_path, "rb") as f:
+            return tomllib.load(f)
+    if extension == ".ini":
+        with open(file_path, "r") as f:
+            return _parse_ini(f)
+    with open(file_path, "r") as f:
+        return _parse_env(f)
+
+def find_matching_keys(data):
     """
-    Scans configuration files (YAML, JSON) for common misconfigurations.
-    
+    Yields (rule name, key, key path) for every key in a nested structure of dicts
+    and lists that matches a rule. The structure is traversed iteratively.
+    """
+    stack = [((), data)]
+    while stack:
+        path, node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                key_path = path + (str(key),)
+                match = RULES_PATTERN.search(str(key))
+                if match:
+                    yield RULE_NAMES[int(match.lastgroup[1:])], str(key), ".".join(key_path)
+                if isinstance(value, (dict, list)):
+                    stack.append((key_path, value))
+        elif isinstance(node, list):
+            for i, value in enumerate(node):
+                if isinstance(value, (dict, list)):
+                    stack.append((path + (str(i),), value))
+
+def scan_file(file_path: str, codebase_path: str) -> list[dict]:
+    """
+    Parses one config file and returns its findings, with the file's path relative
+    to `codebase_path`. Runs in a worker process.
+    """
+    import yaml
+
+    try:
+        data = parse_config_file(file_path)
+    except (yaml.YAMLError, json.JSONDecodeError, configparser.Error, ValueError, UnicodeDecodeError, OSError) as e:
+        print(f"Error parsing config file {file_path}: {e}")
+        return []
+
+    return [
+        {
+            "type": "CONFIG_MISCONFIGURATION",
+            "file": os.path.relpath(file_path, codebase_path),
+            "rule": rule,
+            "description": CONFIG_RULES[rule]["description"],
+            "key": key,
+            "key_path": key_path
+        }
+        for rule, key, key_path in find_matching_keys(data)
+    ]
+
+def scan_config_files(codebase_path: str, output_file: str, diff_scope_file: str = None, max_workers: int = None):
+    """
+    Scans configuration files (YAML, JSON, TOML, INI, .env) for common misconfigurations.
+
+    The codebase is walked once, skipping VCS, vendored and virtualenv directories.
+    Files are parsed in a process pool and every key, at any nesting depth, is
+    checked against CONFIG_RULES.
+
     Args:
-        gitingest_file_path: The path to the gitingest file to identify config files.
-        output_file: The file path to write the JSON results to.
+        codebase_path: The absolute path to the codebase to scan.
+        output_file: The file path to write the findings to, as newline-delimited JSON.
+        diff_scope_file: Optional diff scope; only changed config files are scanned.
+        max_workers: The number of processes parsing files.
     """
-    if not os.path.exists(gitingest_file_path):
-        raise FileNotFoundError(f"Gitingest file not found: {gitingest_file_path}")
+    if not os.path.isdir(codebase_path):
+        raise ValueError(f"Provided codebase path is not a valid directory: {codebase_path}")
 
-    results = {"findings": []}
-    
-    codebase_path = os.path.abspath(os.path.join(os.path.dirname(gitingest_file_path), "..", ".."))
+    scope = load_diff_scope(diff_scope_file)
+    config_files = []
+    # Config files are often git-ignored (e.g. .env) precisely because they hold secrets.
+    for relative_path, entry in walk_files(codebase_path, respect_gitignore=False):
+        if not is_config_file(entry.name) or not in_scope(scope, relative_path):
+            continue
+        try:
+            if entry.stat().st_size > MAX_CONFIG_FILE_SIZE:
+                continue
+        except OSError:
+            continue
+        config_files.append(entry.path)
 
-    # Find all yaml and json files in the codebase
-    yaml_files = glob(os.path.join(codebase_path, "**/*.yaml"), recursive=True)
-    json_files = glob(os.path.join(codebase_path, "**/*.json"), recursive=True)
+    scan = partial(scan_file, codebase_path=codebase_path)
+    progress.begin(len(config_files), "files")
+    with FindingWriter(output_file) as writer:
+        if len(config_files) < PARALLEL_THRESHOLD or max_workers == 1:
+            for findings in map(scan, config_files):
+                writer.write_all(findings)
+                progress.advance()
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for findings in executor.map(scan, config_files, chunksize=32):
+                    writer.write_all(findings)
+                    progress.advance()
 
-    # Scan YAML files
-    for file_path in yaml_files:
-        with open(file_path, "r") as f:
-            try:
-                data = yaml.safe_load(f)
-                if isinstance(data, dict):
-                    for key in data.keys():
-                        if re.search(CONFIG_RULES["GENERIC_SECRETS"]["pattern"], key, re.IGNORECASE):
-                            results["findings"].append({
-                                "type": "CONFIG_MISCONFIGURATION",
-                                "file": file_path,
-                                "rule": "GENERIC_SECRETS",
-                                "description": CONFIG_RULES["GENERIC_SECRETS"]["description"],
-                                "key": key
-                            })
-            except yaml.YAMLError as e:
-                print(f"Error parsing YAML file {file_path}: {e}")
-
-    # Scan JSON files
-    for file_path in json_files:
-        with open(file_path, "r") as f:
-            try:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    for key in data.keys():
-                        if re.search(CONFIG_RULES["GENERIC_SECRETS"]["pattern"], key, re.IGNORECASE):
-                            results["findings"].append({
-                                "type": "CONFIG_MISCONFIGURATION",
-                                "file": file_path,
-                                "rule": "GENERIC_SECRETS",
-                                "description": CONFIG_RULES["GENERIC_SECRETS"]["description"],
-                                "key": key
-                            })
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON file {file_path}: {e}")
-
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=4)
-
-    print(f"Config file scan completed. Results written to {output_file}")
+    print(f"Config file scan completed: {writer.count} finding(s). Results written to {output_file}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Scan config files for misconfigurations.")
-    parser.add_argument("gitingest_file_path", help="The path to the gitingest file.")
+    parser.add_argument("codebase_path", help="The path to the codebase to analyze.")
     parser.add_argument("output_file", help="The path to save the JSON report.")
     args = parser.parse_args()
-    scan_config_files(args.gitingest_file_path, args.output_file)
+    scan_config_files(args.codebase_path, args.output_file)
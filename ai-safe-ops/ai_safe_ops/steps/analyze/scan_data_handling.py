@@ -1,53 +1,75 @@
 import argparse
-import json
 import os
-import re
 import sys
 
+from ai_safe_ops import progress
+from ai_safe_ops.corpus import Corpus
+from ai_safe_ops.detection import PatternSet, load_patterns
+from ai_safe_ops.findings import FindingWriter
+from ai_safe_ops.source_index import SourceIndex
+from ai_safe_ops.steps.ingest.ingest_codebase import load_manifest
+
 # Basic PII regex patterns
 # This is not an exhaustive list and should be expanded
+# All patterns are matched in a single pass; where two patterns match at the same
+# position, the one listed first wins. The prefilter is a cheap regex that every
+# line containing a match must contain, so lines without it are skipped.
 PII_PATTERNS = {
-    "EMAIL": r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
-    "PHONE_NUMBER": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
-    "CREDIT_CARD": r"\b(?:\d{4}[- ]?){3}\d{4}\b",
-    "IP_ADDRESS": r"\b(?:\d{1,3}\.){3}\d{1,3}\b"
+    "EMAIL": {"pattern": r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", "prefilter": "@"},
+    "CREDIT_CARD": {"pattern": r"\b(?:\d{4}[- ]?){3}\d{4}\b", "prefilter": r"[0-9]"},
+    "IP_ADDRESS": {"pattern": r"\b(?:\d{1,3}\.){3}\d{1,3}\b", "prefilter": r"[0-9]"},
+    "PHONE_NUMBER": {"pattern": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b", "prefilter": r"[0-9]"},
 }
 
-def scan_data_handling(gitingest_file_path: str, output_file: str):
+def scan_data_handling(gitingest_file_path: str, output_file: str, manifest_file_path: str = None, line_index_file_path: str = None, patterns_file: str = None):
     """
     Scans the codebase for potential PII and sensitive data handling issues.
     
     Args:
         gitingest_file_path: The path to the gitingest file containing the codebase content.
-        output_file: The file path to write the JSON results to.
+        output_file: The file path to write the findings to, as newline-delimited JSON.
+        manifest_file_path: Optional path to the ingest manifest, used to report the source file of each finding.
+        line_index_file_path: Optional path to the line index written by the ingest step.
+        patterns_file: Optional YAML or JSON file with additional PII patterns
+            (name -> regex, or name -> {"pattern": ..., "prefilter": ...}).
     """
     if not os.path.exists(gitingest_file_path):
         raise FileNotFoundError(f"Gitingest file not found: {gitingest_file_path}")
 
-    results = {"findings": []}
-    
-    with open(gitingest_file_path, "r") as f:
-        content = f.read()
+    manifest = load_manifest(manifest_file_path) if manifest_file_path else None
+    index = SourceIndex.for_corpus(gitingest_file_path, line_index_file_path, manifest)
 
-    for pii_type, pattern in PII_PATTERNS.items():
-        for match in re.finditer(pattern, content):
-            line_number = content.count('\n', 0, match.start()) + 1
+    patterns = dict(PII_PATTERNS)
+    if patterns_file:
+        patterns.update(load_patterns(patterns_file))
+
+    # The corpus is memory-mapped, so it is never copied into this process.
+    with Corpus(gitingest_file_path, manifest) as corpus, FindingWriter(output_file) as writer:
+        # Progress is the corpus position of the scan, reported at every match.
+        progress.begin(len(corpus), "bytes")
+        position = 0
+        for pii_type, match in PatternSet(patterns).finditer(corpus.data):
+            progress.advance(match.end() - position, match.end() - position)
+            position = match.end()
+            file_path, line_number, column = index.locate(match.start())
             finding = {
                 "type": "PII_EXPOSURE",
                 "pii_type": pii_type,
-                "value": match.group(0),
-                "line": line_number
+                "value": match.group(0).decode("utf-8", errors="replace"),
+                "line": line_number,
+                "column": column
             }
-            results["findings"].append(finding)
-
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=4)
+            if file_path:
+                finding["file"] = file_path
+            writer.write(finding)
+        progress.advance(len(corpus) - position, len(corpus) - position)
 
-    print(f"Data handling scan completed. Results written to {output_file}")
+    print(f"Data handling scan completed: {writer.count} finding(s). Results written to {output_file}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Scan for sensitive data handling issues.")
     parser.add_argument("gitingest_file_path", help="The path to the gitingest file.")
     parser.add_argument("output_file", help="The path to save the JSON report.")
+    parser.add_argument("--patterns-file", help="A YAML or JSON file with additional PII patterns.", default=None)
     args = parser.parse_args()
-    scan_data_handling(args.gitingest_file_path, args.output_file)
+    scan_data_handling(args.gitingest_file_path, args.output_file, patterns_file=args.patterns_file)
@@ -1,64 +1,198 @@
 import argparse
+import datetime
+import hashlib
 import json
 import os
-import subprocess
-import sys
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import lru_cache
 
-def scan_static_code(codebase_path: str, output_file: str):
+from ai_safe_ops import progress
+from ai_safe_ops.cache import file_digest
+from ai_safe_ops.diff_scope import load_diff_scope
+from ai_safe_ops.file_walker import walk_files
+
+# Files are handed to the workers in shards of this size, so each shard builds its
+# Bandit manager once.
+SHARD_SIZE = 32
+# Below this many files to analyze, a process pool costs more than it saves.
+PARALLEL_THRESHOLD = 2 * SHARD_SIZE
+# Cached per-file results not used for this long are dropped.
+FILE_CACHE_TTL = 30 * 24 * 60 * 60
+
+FILE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL, last_used REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+def default_file_cache_path() -> str:
+    """Returns the default location of the per-file Bandit result cache, next to the step result cache."""
+    return os.path.join(os.getcwd(), ".ai-safe-ops", "bandit-cache.sqlite")
+
+@lru_cache(maxsize=None)
+def _bandit_config(config_file: str = None):
+    """Loads a Bandit configuration once per process."""
+    from bandit.core.config import BanditConfig
+
+    return BanditConfig(config_file)
+
+def config_fingerprint(config_file: str = None) -> str:
+    """Returns a digest of the Bandit version and configuration, part of every per-file cache key."""
+    import bandit
+
+    material = f"{bandit.__version__}\0{file_digest(config_file) if config_file else 'default'}"
+    return hashlib.sha256(material.encode()).hexdigest()
+
+def analyze_files(file_paths: list[str], config_file: str = None) -> dict:
+    """
+    Runs Bandit's tests on a shard of files in this process.
+
+    Args:
+        file_paths: The files to analyze.
+        config_file: Optional Bandit configuration file.
+
+    Returns:
+        A dict mapping each file path to its {"results", "metrics", "error"} record.
+        Results are in Bandit's JSON format.
+    """
+    from bandit.core import docs_utils
+    from bandit.core.manager import BanditManager
+
+    manager = BanditManager(_bandit_config(config_file), "file", quiet=True)
+    manager.discover_files(file_paths)
+    manager.run_tests()
+
+    records = {path: {"results": [], "metrics": manager.metrics.data.get(path, {}), "error": None} for path in file_paths}
+    for path, reason in manager.get_skipped():
+        records[path]["error"] = reason
+    for issue in manager.get_issue_list():
+        result = issue.as_dict()
+        result["more_info"] = docs_utils.get_url(result["test_id"])
+        records[issue.fname]["results"].append(result)
+    return records
+
+def _load_cached(connection, keys: list[str]) -> dict:
+    cached = {}
+    # SQLite limits the number of bound parameters per statement.
+    for start in range(0, len(keys), 500):
+        batch = keys[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        for key, result in connection.execute(f"SELECT key, result FROM results WHERE key IN ({placeholders})", batch):
+            cached[key] = result
+    return cached
+
+def _relocate(cached_record: str, file_path: str) -> dict:
+    """Loads a cached record, possibly produced for an identical file elsewhere, and points it at `file_path`."""
+    record = json.loads(cached_record)
+    for result in record["results"]:
+        result["filename"] = file_path
+    return record
+
+def scan_static_code(
+    codebase_path: str,
+    output_file: str,
+    diff_scope_file: str = None,
+    config_file: str = None,
+    file_cache_path: str = None,
+    max_workers: int = None,
+):
     """
     Performs static code analysis using Bandit to find common security issues.
-    
+
+    Bandit runs in-process over the Python files of the codebase (virtualenvs,
+    node_modules and .gitignored paths are skipped), sharded across a process pool.
+    Each file's result is cached by its content hash and the Bandit version and
+    configuration, so unchanged files are not analyzed again. The merged results are
+    written in Bandit's JSON report format.
+
     Args:
         codebase_path: The absolute path to the codebase to scan.
         output_file: The file path to write the JSON results to.
+        diff_scope_file: Optional diff scope; only changed Python files are scanned.
+        config_file: Optional Bandit configuration file.
+        file_cache_path: The per-file result cache. Defaults to .ai-safe-ops/bandit-cache.sqlite.
+        max_workers: The number of processes running Bandit.
     """
     if not os.path.isdir(codebase_path):
         raise ValueError(f"Provided codebase path is not a valid directory: {codebase_path}")
 
-    # The command to run Bandit.
-    # -r: recursive
-    # -f json: format output as JSON
-    # -o -: pipe output to stdout
-    command = [
-        sys.executable,
-        "-m",
-        "bandit",
-        "-r",
-        codebase_path,
-        "-f",
-        "json",
-        "-o",
-        output_file,
-        "--exit-zero" # Always exit with 0, even if issues are found. We handle the results.
-    ]
-
-    try:
-        print(f"Running static code analysis on {codebase_path}...")
-        # We don't need to capture output here as Bandit can write directly to the file.
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        
-        # Optional: Log stdout/stderr for debugging
-        log_dir = os.path.dirname(output_file)
-        with open(os.path.join(log_dir, "bandit_stdout.log"), "w") as f:
-            f.write(result.stdout)
-        if result.stderr:
-             with open(os.path.join(log_dir, "bandit_stderr.log"), "w") as f:
-                f.write(result.stderr)
-
-        print("Static code analysis completed successfully.")
-
-    except (subprocess.CalledProcessError, FileNotFoundError) as e:
-        # This will now be caught by Go and displayed in the TUI
-        error_message = f"Bandit execution failed. Stderr: {e.stderr if hasattr(e, 'stderr') else 'Command not found. Is bandit installed?'}"
-        # Write an empty result file to avoid breaking the workflow
-        with open(output_file, "w") as f:
-            json.dump({"error": error_message}, f)
-        # Re-raise to let the main workflow know something went wrong
-        raise Exception(error_message) from e
+    scope = load_diff_scope(diff_scope_file)
+    if scope is not None:
+        relative_paths = [
+            path for path in scope["files"]
+            if path.endswith(".py") and os.path.isfile(os.path.join(codebase_path, path))
+        ]
+    else:
+        relative_paths = [path for path, _ in walk_files(codebase_path) if path.endswith(".py")]
+    # Bandit reports files by the path it was given; absolute paths keep the report independent of the working directory.
+    codebase_root = os.path.abspath(codebase_path)
+    file_paths = [os.path.join(codebase_root, path) for path in sorted(relative_paths)]
+
+    print(f"Running static code analysis on {len(file_paths)} Python file(s) in {codebase_path}...")
+    config_key = config_fingerprint(config_file)
+    keys = {path: hashlib.sha256(f"{config_key}\0{file_digest(path)}".encode()).hexdigest() for path in file_paths}
+
+    file_cache_path = file_cache_path or default_file_cache_path()
+    os.makedirs(os.path.dirname(file_cache_path) or ".", exist_ok=True)
+    connection = sqlite3.connect(file_cache_path, timeout=30)
+    with closing(connection):
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(FILE_CACHE_SCHEMA)
+        cached = _load_cached(connection, sorted(set(keys.values())))
+
+        records = {path: _relocate(cached[keys[path]], path) for path in file_paths if keys[path] in cached}
+        pending = [path for path in file_paths if path not in records]
+        shards = [pending[start:start + SHARD_SIZE] for start in range(0, len(pending), SHARD_SIZE)]
+        progress.begin(len(pending), "files")
+        if len(pending) < PARALLEL_THRESHOLD or max_workers == 1:
+            for shard in shards:
+                records.update(analyze_files(shard, config_file))
+                progress.advance(len(shard))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for shard_records in executor.map(analyze_files, shards, [config_file] * len(shards)):
+                    records.update(shard_records)
+                    progress.advance(len(shard_records))
+
+        now = time.time()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                [(keys[path], json.dumps(records[path]), now) for path in pending],
+            )
+            connection.executemany(
+                "UPDATE results SET last_used = ? WHERE key = ?",
+                [(now, keys[path]) for path in file_paths if path not in pending],
+            )
+            connection.execute("DELETE FROM results WHERE last_used < ?", (now - FILE_CACHE_TTL,))
+
+    report = {"errors": [], "results": [], "metrics": {}}
+    totals = Counter()
+    for path in file_paths:
+        record = records[path]
+        if record["error"]:
+            report["errors"].append({"filename": path, "reason": record["error"]})
+        report["results"].extend(record["results"])
+        if record["metrics"]:
+            report["metrics"][path] = record["metrics"]
+            totals.update(record["metrics"])
+    report["metrics"]["_totals"] = dict(totals)
+    report["generated_at"] = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"Static code analysis completed: {len(report['results'])} issue(s) in {len(file_paths)} file(s), {len(pending)} analyzed, {len(file_paths) - len(pending)} cached.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Bandit static code analysis.")
     parser.add_argument("codebase_path", help="The path to the codebase to analyze.")
     parser.add_argument("output_file", help="The path to save the JSON report.")
+    parser.add_argument("--config-file", help="A Bandit configuration file.")
+    parser.add_argument("--file-cache", help="The per-file result cache. Defaults to .ai-safe-ops/bandit-cache.sqlite.")
+    parser.add_argument("--max-workers", type=int, help="The number of processes running Bandit.")
     args = parser.parse_args()
-    scan_static_code(args.codebase_path, args.output_file)
\ No newline at end of file
+    scan_static_code(args.codebase_path, args.output_file, config_file=args.config_file, file_cache_path=args.file_cache, max_workers=args.max_workers)
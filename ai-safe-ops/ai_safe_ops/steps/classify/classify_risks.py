@@ -2,6 +2,9 @@ import argparse
 import json
 import os
 
+from ai_safe_ops.diff_scope import diff_status, load_diff_scope
+from ai_safe_ops.findings import FindingWriter, iter_findings
+
 # A simple risk classification mapping.
 # This can be expanded with more sophisticated rules.
 RISK_CLASSIFICATION = {
@@ -11,40 +14,44 @@ RISK_CLASSIFICATION = {
     "DEFAULT": "Info"
 }
 
-def classify_risks(analysis_files: list, output_file: str):
+def classify_risks(analysis_files: list, output_file: str, diff_scope_file: str = None):
     """
     Classifies the findings from various analysis steps into risk categories.
-    
+
+    The analysis files are streamed one finding at a time and the classified findings
+    are appended to `output_file` as newline-delimited JSON, so memory use does not
+    grow with the number of findings.
+
     Args:
-        analysis_files: A list of paths to the JSON output files from analysis steps.
-        output_file: The file path to write the classified results to.
+        analysis_files: A list of paths to the findings files from analysis steps.
+        output_file: The file path to write the classified findings to.
+        diff_scope_file: Optional diff scope. Each finding is labeled with a
+            "diff_status" of "new" (on a changed line) or "existing".
     """
-    classified_results = {"findings": []}
-
-    for file_path in analysis_files:
-        if not os.path.exists(file_path):
-            print(f"Warning: Analysis file not found, skipping: {file_path}")
-            continue
-        
-        with open(file_path, "r") as f:
+    scope = load_diff_scope(diff_scope_file)
+
+    with FindingWriter(output_file) as writer:
+        for file_path in analysis_files:
+            if not os.path.exists(file_path):
+                print(f"Warning: Analysis file not found, skipping: {file_path}")
+                continue
+
             try:
-                data = json.load(f)
-                for finding in data.get("findings", []):
+                for finding in iter_findings(file_path):
                     finding_type = finding.get("type", "")
-                    risk_level = RISK_CLASSIFICATION.get(finding_type, RISK_CLASSIFICATION["DEFAULT"])
-                    finding["risk_level"] = risk_level
-                    classified_results["findings"].append(finding)
+                    finding["risk_level"] = RISK_CLASSIFICATION.get(finding_type, RISK_CLASSIFICATION["DEFAULT"])
+                    if scope is not None:
+                        finding["diff_status"] = diff_status(scope, finding.get("file"), finding.get("line"))
+                    writer.write(finding)
             except json.JSONDecodeError as e:
                 print(f"Error decoding JSON from {file_path}: {e}")
 
-    with open(output_file, "w") as f:
-        json.dump(classified_results, f, indent=4)
-
-    print(f"Risk classification completed. Results written to {output_file}")
+    print(f"Risk classification completed: {writer.count} finding(s). Results written to {output_file}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Classify risks from analysis findings.")
     parser.add_argument("output_file", help="The path to save the classified JSON report.")
     parser.add_argument("analysis_files", nargs='+', help="The paths to the analysis JSON files.")
+    parser.add_argument("--diff-scope-file", help="The diff scope file of an incremental scan.", default=None)
     args = parser.parse_args()
-    classify_risks(args.analysis_files, args.output_file)
+    classify_risks(args.analysis_files, args.output_file, args.diff_scope_file)
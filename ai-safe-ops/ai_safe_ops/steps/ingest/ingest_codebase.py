@@ -1,38 +1,152 @@
+import argparse
+import hashlib
+import json
 import os
-import subprocess
-import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-def ingest_codebase(path: str, output_file: str):
+from ai_safe_ops import progress
+from ai_safe_ops.diff_scope import load_diff_scope
+from ai_safe_ops.file_walker import walk_files
+from ai_safe_ops.languages import detect_language
+from ai_safe_ops.source_index import SourceIndex
+
+# Files larger than this are skipped.
+MAX_FILE_SIZE = 10 * 1024 * 1024
+# Number of bytes inspected to decide whether a file is binary.
+BINARY_SNIFF_SIZE = 8192
+FILE_SEPARATOR = "=" * 48
+
+
+def manifest_path_for(corpus_file: str) -> str:
+    """Returns the path of the per-file manifest written next to an ingest corpus."""
+    return f"{os.path.splitext(corpus_file)[0]}.manifest.json"
+
+
+def load_manifest(manifest_file: str) -> dict:
+    """Loads the per-file manifest written by ingest_codebase."""
+    with open(manifest_file, "r") as f:
+        return json.load(f)
+
+
+def _read_file(file_path: str):
+    """Reads a file and returns (content bytes, sha256), or None if the file is binary or unreadable."""
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:BINARY_SNIFF_SIZE]:
+        return None
+    return data.decode("utf-8", errors="replace").encode("utf-8"), hashlib.sha256(data).hexdigest()
+
+
+def ingest_codebase(
+    path: str,
+    output_file: str,
+    manifest_file: str = None,
+    line_index_file: str = None,
+    diff_scope_file: str = None,
+    max_workers: int = None,
+):
     """
-    Ingests the codebase using repomix to create an AI-ready overview.
-    The output is written to the specified output_file.
+    Ingests the codebase into a single AI-ready text corpus.
+
+    The tree is walked with os.scandir, honoring .gitignore files and skipping VCS,
+    vendored and virtualenv directories as well as binary files. Files are read in
+    parallel and streamed to `output_file` in order. A manifest with the path, size,
+    hash, language, line count and byte offsets of every ingested file is written
+    to `manifest_file`.
+
+    Args:
+        path: The path to the codebase to ingest.
+        output_file: The file path to write the corpus to.
+        manifest_file: The file path to write the manifest to. Defaults to a
+            ".manifest.json" file next to the corpus (see `manifest_path_for`).
+        line_index_file: If given, a SourceIndex of the corpus is written to this
+            path so analyzers can map offsets to lines without rebuilding it.
+        diff_scope_file: Optional diff scope (see ai_safe_ops.diff_scope). Only the
+            changed files it lists are ingested.
+        max_workers: The number of threads reading files.
     """
-    try:
-        # Sicherstellen, dass repomix installiert ist
-        subprocess.run([sys.executable, "-m", "pip", "install", "repomix"], check=True, capture_output=True, text=True)
-        
-        command = [sys.executable, "-m", "repomix", path, "--output", os.path.abspath(output_file)]
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        
-        log_dir = os.path.dirname(output_file)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-
-        with open(os.path.join(log_dir, "repomix_stdout.log"), "w") as f:
-            f.write(result.stdout)
-        if result.stderr:
-            with open(os.path.join(log_dir, "repomix_stderr.log"), "w") as f:
-                f.write(result.stderr)
-        
-    except subprocess.CalledProcessError as e:
-        log_dir = os.path.dirname(output_file)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-            
-        with open(os.path.join(log_dir, "repomix_error_stdout.log"), "w") as f:
-            f.write(e.stdout)
-        with open(os.path.join(log_dir, "repomix_error_stderr.log"), "w") as f:
-            f.write(e.stderr)
-        raise
-    except FileNotFoundError as e:
-        raise Exception(f"Command not found: {e}. Is Python correctly installed and in your PATH?")
\ No newline at end of file
+    if not os.path.isdir(path):
+        raise ValueError(f"Provided codebase path is not a valid directory: {path}")
+
+    root = os.path.abspath(path)
+    scope = load_diff_scope(diff_scope_file)
+    candidates = []
+    for relative_path, entry in walk_files(root):
+        if scope is not None and relative_path not in scope["files"]:
+            continue
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            continue
+        if size <= MAX_FILE_SIZE:
+            candidates.append((relative_path, entry.path, size))
+
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    manifest_file = manifest_file or manifest_path_for(output_file)
+    manifest = {"root": root, "files": []}
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    progress.begin(len(candidates), "files")
+
+    with open(output_file, "wb") as out, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        out.write(b"# Repository Structure\n\n```\n")
+        for relative_path, _, _ in candidates:
+            out.write(f"{relative_path}\n".encode("utf-8"))
+        out.write(b"```\n\n# Files\n")
+
+        # Keep a bounded window of reads in flight so memory stays flat on large trees.
+        window = deque()
+        files = iter(candidates)
+        for candidate in files:
+            window.append((candidate, executor.submit(_read_file, candidate[1])))
+            if len(window) >= max_workers * 4:
+                break
+
+        while window:
+            (relative_path, _, size), future = window.popleft()
+            next_candidate = next(files, None)
+            if next_candidate is not None:
+                window.append((next_candidate, executor.submit(_read_file, next_candidate[1])))
+
+            result = future.result()
+            progress.advance(1, size)
+            if result is None:
+                continue
+            content, digest = result
+            if content and not content.endswith(b"\n"):
+                content += b"\n"
+
+            out.write(f"\n{FILE_SEPARATOR}\nFile: {relative_path}\n{FILE_SEPARATOR}\n".encode("utf-8"))
+            start = out.tell()
+            out.write(content)
+            manifest["files"].append({
+                "path": relative_path,
+                "size": size,
+                "sha256": digest,
+                "language": detect_language(relative_path),
+                "lines": content.count(b"\n"),
+                "start": start,
+                "end": out.tell(),
+            })
+
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f)
+
+    if line_index_file:
+        SourceIndex.build_from_file(output_file).save(line_index_file)
+
+    print(f"Ingested {len(manifest['files'])} files from {root} into {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a codebase into a single text corpus.")
+    parser.add_argument("path", help="The path to the codebase to ingest.")
+    parser.add_argument("output_file", help="The path to save the corpus.")
+    args = parser.parse_args()
+    ingest_codebase(args.path, args.output_file)
@@ -1,77 +1,143 @@
 import argparse
 import json
 import os
+import sqlite3
 
-def generate_governance_report(classified_risks_file: str, output_file: str, log_dir: str, executed_steps: list[str]):
+from ai_safe_ops.diff_scope import load_diff_scope
+from ai_safe_ops.findings import iter_findings
+from ai_safe_ops.reporting import DEFAULT_SECTION_CAP, DEFAULT_TOP_N, FindingAggregator, SarifWriter, describe, relative_file
+from ai_safe_ops.run_store import RunStore
+
+# The finding type each analysis step produces, so every executed step gets its section.
+STEP_FINDING_TYPES = {
+    "scan_data_handling": "PII_EXPOSURE",
+    "scan_config_files": "CONFIG_MISCONFIGURATION",
+    "check_bias_heuristics": "POTENTIAL_BIAS",
+}
+# Steps that do not produce findings of their own.
+NON_ANALYSIS_STEPS = {"ingest_codebase", "classify_risks", "generate_governance_report"}
+
+def _sections(executed_steps: list[str], finding_types) -> list[tuple[str, str]]:
+    """Returns the (title, finding type) of every report section, in step order."""
+    sections = []
+    for step_name in executed_steps:
+        if step_name not in NON_ANALYSIS_STEPS:
+            sections.append((step_name.replace("_", " ").title(), STEP_FINDING_TYPES.get(step_name, step_name.upper())))
+    # Findings of a type no executed step is known for still get a section.
+    listed = {finding_type for _, finding_type in sections}
+    for finding_type in sorted(t for t in finding_types if t not in listed):
+        sections.append(((finding_type or "Other").replace("_", " ").title(), finding_type))
+    return sections
+
+def _write_markdown(f, aggregator: FindingAggregator, by_type, top_files, executed_steps, diff_scope, log_dir):
+    """Writes the Markdown report from the aggregated findings."""
+    f.write("# AI Safe Ops 360 - Governance Report\n---\n")
+    if diff_scope:
+        new_count = sum(new for _, _, _, new in by_type)
+        total = sum(count for _, _, count, _ in by_type)
+        f.write(f"\n*Incremental scan of {len(diff_scope['files'])} file(s) changed since `{diff_scope['since']}`: "
+                f"{new_count} new and {total - new_count} existing finding(s).*\n")
+
+    f.write("\n## Summary\n")
+    if by_type:
+        f.write("\n| Finding Type | Risk | Findings |\n| --- | --- | ---: |\n")
+        for finding_type, risk_level, count, _ in by_type:
+            f.write(f"| {finding_type} | {risk_level} | {count} |\n")
+    else:
+        f.write("*   ✅ No findings.\n")
+    if top_files:
+        f.write("\n### Top Files\n")
+        for file, count, high_count in top_files:
+            f.write(f"*   `{relative_file(file, aggregator.root)}`: {count} finding(s), {high_count} High\n")
+
+    f.write("\n## Scan Results\n")
+    for title, finding_type in _sections(executed_steps, aggregator.type_counts):
+        f.write(f"\n### 🛡️ **{title}**\n")
+        if not aggregator.type_counts[finding_type]:
+            f.write("*   ✅ No issues found.\n")
+            continue
+        findings = aggregator.section(finding_type)
+        for finding in findings:
+            diff_label = " **[New]**" if finding.get("diff_status") == "new" else ""
+            f.write(f"*   **[{finding.get('risk_level', 'Info')}]**{diff_label} {describe(finding)}\n")
+            for field, label in (("file", "File"), ("line", "Line"), ("term", "Term"), ("key", "Key")):
+                if field in finding:
+                    value = relative_file(finding[field], aggregator.root) if field == "file" else finding[field]
+                    f.write(f"    *   **{label}:** {value}\n")
+        omitted = aggregator.type_counts[finding_type] - len(findings)
+        if omitted > 0:
+            f.write(f"*   ... and {omitted} more finding(s) not listed.\n")
+
+    f.write(f"\n---\n\n👉 *For full details, see the log files in:\n{log_dir}")
+
+def generate_governance_report(
+    classified_risks_file: str,
+    output_file: str,
+    log_dir: str,
+    executed_steps: list[str],
+    diff_scope_file: str = None,
+    run_store_path: str = None,
+    run_id: str = None,
+    sarif_file: str = None,
+    summary_file: str = None,
+    section_cap: int = DEFAULT_SECTION_CAP,
+    top_n: int = DEFAULT_TOP_N,
+    codebase_path: str = None,
+):
     """
-    Generates a markdown report from the classified risk findings.
-    
+    Generates the governance reports from the classified risk findings.
+
+    The findings are streamed once: every finding is written to the SARIF log as it is
+    read, while counts, top files and the most severe findings of each section are
+    aggregated. The Markdown report and the JSON summary are written from that
+    aggregation, so the full finding set is never held in memory.
+
     Args:
-        classified_risks_file: The path to the JSON file with classified risks.
+        classified_risks_file: The path to the findings file with classified risks.
         output_file: The file path to write the markdown report to.
         log_dir: The directory where the logs are stored.
         executed_steps: A list of names of the steps that were executed.
+        diff_scope_file: Optional diff scope of an incremental scan.
+        run_store_path: Optional run store. If the classified findings were recorded in
+            it, the summary counts are aggregated with SQL.
+        run_id: The ID of this run in the run store.
+        sarif_file: Optional path to write a SARIF 2.1.0 log of all findings to.
+        summary_file: Optional path to write a JSON summary of the counts to.
+        section_cap: The maximum number of findings listed per section.
+        top_n: The number of files listed under "Top Files".
+        codebase_path: The scanned codebase. Absolute file paths below it are
+            reported relative to it.
     """
-    report_parts = []
-    recommendations = []
-    
-    report_parts.append("# AI Safe Ops 360 - Governance Report")
-    report_parts.append("---")
-
+    aggregator = FindingAggregator(section_cap=section_cap, top_n=top_n, root=codebase_path)
     try:
-        with open(classified_risks_file) as f:
-            data = json.load(f)
-        
-        findings = data.get("findings", [])
-        
-        # Group findings by step type
-        findings_by_step = {}
-        for finding in findings:
-            step_type = finding.get("type")
-            if step_type not in findings_by_step:
-                findings_by_step[step_type] = []
-            findings_by_step[step_type].append(finding)
-
-        # Filter out reporting and classification steps from the executed_steps list
-        steps_to_report = [step for step in executed_steps if step not in ["ingest_codebase", "classify_risks", "generate_governance_report"]]
-
-        report_parts.append("\n## Scan Results")
-        for step_name in steps_to_report:
-            report_parts.append(f"\n### 🛡️ **{step_name.replace('_', ' ').title()}**")
-            if step_name in findings_by_step:
-                # Sort findings by risk level
-                sorted_findings = sorted(findings_by_step[step_name], key=lambda x: ["High", "Medium", "Low", "Info"].index(x.get("risk_level", "Info")))
-                for finding in sorted_findings:
-                    risk_level = finding.get("risk_level", "Info")
-                    report_parts.append(f"*   **[{risk_level}]** {finding.get('description', '')}")
-                    if 'file' in finding:
-                        report_parts.append(f"    *   **File:** {finding.get('file')}")
-                    if 'line' in finding:
-                        report_parts.append(f"    *   **Line:** {finding.get('line')}")
-                    if 'term' in finding:
-                        report_parts.append(f"    *   **Term:** {finding.get('term')}")
-                    if 'key' in finding:
-                        report_parts.append(f"    *   **Key:** {finding.get('key')}")
-            else:
-                report_parts.append("*   ✅ No issues found.")
-
-
-    except (IOError, json.JSONDecodeError) as e:
-        report_parts.append(f"Error generating report: {e}")
+        sarif = SarifWriter(sarif_file, root=codebase_path) if sarif_file else None
+        try:
+            for finding in iter_findings(classified_risks_file):
+                aggregator.add(finding)
+                if sarif is not None:
+                    sarif.add(finding)
+        finally:
+            if sarif is not None:
+                sarif.close()
 
-    # --- Recommendations Section ---
-    if recommendations:
-        report_parts.append("\n## 🚀 Recommendations")
-        for i, rec in enumerate(recommendations, 1):
-            report_parts.append(f"{i}.  **{rec}**")
+        by_type, top_files = aggregator.by_type(), aggregator.top_files()
+        if run_store_path and run_id:
+            with RunStore(run_store_path) as store:
+                step = store.step_of_output(run_id, classified_risks_file)
+                if step is not None:
+                    by_type, top_files = store.count_findings(run_id, step), store.top_files(run_id, step, top_n)
 
-    # --- Log File Path ---
-    report_parts.append("\n---\n")
-    report_parts.append(f"👉 *For full details, see the log files in:\n{log_dir}")
+        with open(output_file, "w") as f:
+            _write_markdown(f, aggregator, by_type, top_files, executed_steps, load_diff_scope(diff_scope_file), log_dir)
+    except (IOError, json.JSONDecodeError, sqlite3.Error) as e:
+        with open(output_file, "w") as f:
+            f.write(f"# AI Safe Ops 360 - Governance Report\n---\nError generating report: {e}\n"
+                    f"\n---\n\n👉 *For full details, see the log files in:\n{log_dir}")
+        return
 
-    # --- Write final report ---
-    with open(output_file, "w") as f:
-        f.write("\n".join(report_parts))
+    if summary_file:
+        with open(summary_file, "w") as f:
+            json.dump(aggregator.summary(), f, indent=4)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate a governance report from classified risks.")
@@ -79,5 +145,17 @@ if __name__ == "__main__":
     parser.add_argument("output_file", help="The path to save the markdown report.")
     parser.add_argument("log_dir", help="The path to the log directory.")
     parser.add_argument('executed_steps', nargs='+', help='A list of executed step names.')
+    parser.add_argument("--diff-scope-file", help="The diff scope file of an incremental scan.", default=None)
+    parser.add_argument("--run-store", help="The run store the classified risks were recorded in.", default=None)
+    parser.add_argument("--run-id", help="The ID of the run in the run store.", default=None)
+    parser.add_argument("--sarif-file", help="Also write a SARIF 2.1.0 log to this path.", default=None)
+    parser.add_argument("--summary-file", help="Also write a JSON summary to this path.", default=None)
+    parser.add_argument("--section-cap", type=int, default=DEFAULT_SECTION_CAP, help="The maximum number of findings listed per section.")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N, help="The number of files listed under Top Files.")
+    parser.add_argument("--codebase-path", help="The scanned codebase; file paths are reported relative to it.", default=None)
     args = parser.parse_args()
-    generate_governance_report(args.classified_risks_file, args.output_file, args.log_dir, args.executed_steps)
\ No newline at end of file
+    generate_governance_report(
+        args.classified_risks_file, args.output_file, args.log_dir, args.executed_steps,
+        args.diff_scope_file, args.run_store, args.run_id,
+        args.sarif_file, args.summary_file, args.section_cap, args.top_n, args.codebase_path,
+    )
\ No newline at end of file
@@ -1,14 +1,41 @@
 import argparse
 import json
 import os
-import re
+import sqlite3
+from collections import Counter
 
-def parse_secret_type(secret_string):
-    """Extracts the 'Secret Type' from the detect-secrets output string."""
-    match = re.search(r"Secret Type: (.*)", secret_string)
-    if match:
-        return match.group(1)
-    return "Unknown Type"
+from ai_safe_ops.diff_scope import diff_status, load_diff_scope
+from ai_safe_ops.findings import iter_findings
+from ai_safe_ops.run_store import RunStore
+
+# Secret locations listed individually in the recommendations.
+MAX_LISTED_SECRETS = 10
+
+def _secret_counts(secrets_file: str, store: RunStore = None, run_id: str = None):
+    """
+    Returns the secret counts by type and by (file, line) location, aggregated with SQL
+    if the secrets were recorded in the run store and from the findings file otherwise.
+    """
+    step = store.step_of_output(run_id, secrets_file) if store is not None else None
+    if step is not None:
+        by_type = dict(store.count_by_field(run_id, step, "secret_type"))
+        by_location = [((file, line), count) for file, line, count in store.count_by_location(run_id, step)]
+        return by_type, by_location
+    by_type = Counter()
+    by_location = Counter()
+    for secret in iter_findings(secrets_file):
+        by_type[secret["secret_type"]] += 1
+        by_location[secret.get("file"), secret.get("line")] += 1
+    return by_type, sorted(by_location.items(), key=lambda item: (item[0][0] or "", item[0][1] or 0))
+
+def _bandit_counts(static_code_analysis_file: str, store: RunStore = None, run_id: str = None):
+    """Returns the Bandit issue counts by (file, line) location."""
+    step = store.step_of_output(run_id, static_code_analysis_file) if store is not None else None
+    if step is not None:
+        return [((file, line), count) for file, line, count in store.count_by_location(run_id, step)]
+    with open(static_code_analysis_file) as f:
+        bandit_data = json.load(f)
+    return list(Counter((issue.get("filename"), issue.get("line_number")) for issue in bandit_data.get("results", [])).items())
 
 def generate_report(
     documentation_file: str,
@@ -16,16 +43,26 @@ def generate_report(
     dependencies_file: str,
     static_code_analysis_file: str,
     output_file: str,
-    log_dir: str
+    log_dir: str,
+    diff_scope_file: str = None,
+    run_store_path: str = None,
+    run_id: str = None,
 ):
     """
     Aggregates results from all scans and generates a detailed markdown report.
+    For incremental scans (`diff_scope_file`), code findings are labeled as new or existing.
+    With a run store (`run_store_path` and `run_id`), findings recorded in the store are
+    counted with SQL instead of being re-read from the step outputs.
     """
     report_parts = []
     recommendations = []
+    scope = load_diff_scope(diff_scope_file)
+    store = RunStore(run_store_path) if run_store_path and run_id else None
     
     report_parts.append("# AI Safe Ops 360 - Executive Summary")
     report_parts.append("---")
+    if scope is not None:
+        report_parts.append(f"*Incremental scan of {len(scope['files'])} file(s) changed since `{scope['since']}`.*")
 
     # --- Documentation Section ---
     report_parts.append("## 📝 Documentation & Transparency")
@@ -45,31 +82,36 @@ def generate_report(
     
     # Secrets
     try:
-        with open(secrets_file) as f:
-            secrets_data = json.load(f)
-        
-        all_secrets = [item for sublist in secrets_data.values() for item in sublist]
-        num_secrets = len(all_secrets)
-        
+        secret_types, secret_locations = _secret_counts(secrets_file, store, run_id)
+        num_secrets = sum(secret_types.values())
+
         if num_secrets > 0:
-            secret_types = list(set(parse_secret_type(s) for s in all_secrets))
-            status = f"🔴 {num_secrets} issue(s) found (Types: {', '.join(secret_types)})"
-            recommendations.append(f"Review the found secret(s) in `{os.path.basename(secrets_file)}`.")
+            status = f"🔴 {num_secrets} issue(s) found (Types: {', '.join(sorted(secret_types))})"
+            if scope is not None:
+                num_new = sum(count for (file, line), count in secret_locations if diff_status(scope, file, line) == "new")
+                status += f" ({num_new} new, {num_secrets - num_new} existing)"
+            locations = [f"{file}:{line}" for (file, line), _ in secret_locations if file]
+            for location in locations[:MAX_LISTED_SECRETS]:
+                recommendations.append(f"Review the secret found at `{location}`.")
+            if len(locations) > MAX_LISTED_SECRETS:
+                recommendations.append(f"Review the {len(locations) - MAX_LISTED_SECRETS} other secret location(s) in `{os.path.basename(secrets_file)}`.")
         else:
             status = "✅ 0 issues found"
         report_parts.append(f"*   **Secrets Found:** {status}")
 
-    except (IOError, json.JSONDecodeError):
+    except (IOError, json.JSONDecodeError, sqlite3.Error):
         report_parts.append("*   **Secrets Found:** Error analyzing secrets.")
 
     # Static Code Analysis (Bandit)
     try:
-        with open(static_code_analysis_file) as f:
-            bandit_data = json.load(f)
-        num_issues = len(bandit_data.get("results", []))
+        issue_locations = _bandit_counts(static_code_analysis_file, store, run_id)
+        num_issues = sum(count for _, count in issue_locations)
         status = f"🔴 {num_issues} issue(s) found" if num_issues > 0 else "✅ 0 issues found"
+        if scope is not None and num_issues > 0:
+            num_new = sum(count for (file, line), count in issue_locations if diff_status(scope, file, line) == "new")
+            status += f" ({num_new} new, {num_issues - num_new} existing)"
         report_parts.append(f"*   **Code Vulnerabilities (Bandit):** {status}")
-    except (IOError, json.JSONDecodeError):
+    except (IOError, json.JSONDecodeError, sqlite3.Error):
          report_parts.append("*   **Code Vulnerabilities (Bandit):** Error analyzing static code.")
 
     # Dependencies (pip-audit)
@@ -82,7 +124,9 @@ def generate_report(
         report_parts.append(f"*   **Dependency Issues:** {status}")
         if num_vulns > 0:
             for dep in vulnerable_deps:
-                recommendations.append(f"Upgrade package `{dep['name']}` to fix known vulnerability.")
+                manifests = ", ".join(f"`{path}`" for path in dep.get("manifests", []))
+                source = f" (used in {manifests})" if manifests else ""
+                recommendations.append(f"Upgrade package `{dep['name']}`{source} to fix known vulnerability.")
     except (IOError, json.JSONDecodeError):
         report_parts.append("*   **Dependency Issues:** Error analyzing dependencies.")
 
@@ -96,6 +140,9 @@ def generate_report(
     report_parts.append("\n---\n")
     report_parts.append(f"👉 *For full details, see the log files in:*\n{log_dir}")
 
+    if store is not None:
+        store.close()
+
     # --- Write final report ---
     with open(output_file, "w") as f:
         f.write("\n".join(report_parts))
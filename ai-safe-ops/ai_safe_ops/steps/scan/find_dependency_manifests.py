@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import re
+
+from ai_safe_ops.corpus import Corpus
+from ai_safe_ops.steps.ingest.ingest_codebase import load_manifest
+
+# requirements.txt, requirements-dev.txt, requirements_test.txt, requirements/base.txt, ...
+REQUIREMENTS_PATTERN = re.compile(r"(?:^|/)(?:requirements[^/]*|requirements/[^/]+)\.txt$", re.IGNORECASE)
+
+def is_dependency_manifest(path: str) -> bool:
+    """Returns True for pyproject.toml and requirements files."""
+    return os.path.basename(path) == "pyproject.toml" or REQUIREMENTS_PATTERN.search(path) is not None
+
+def _listed_paths(gitingest_file_path: str) -> list[str]:
+    """Returns the paths listed in the "Repository Structure" section of the corpus."""
+    with Corpus(gitingest_file_path) as corpus:
+        match = re.search(rb"# Repository Structure\n\n```\n(.*?)```", corpus.data, re.DOTALL)
+        if not match:
+            return []
+        return [line.strip() for line in match.group(1).decode("utf-8", errors="replace").splitlines() if line.strip()]
+
+def find_dependency_manifests(codebase_path: str, gitingest_file_path: str, output_file: str = None, manifest_file_path: str = None) -> list[str]:
+    """
+    Finds every Python dependency manifest (pyproject.toml and requirements*.txt) in the
+    codebase and returns their absolute paths.
+
+    Args:
+        codebase_path: The path to the codebase.
+        gitingest_file_path: The path to the gitingest file.
+        output_file: Optional file path to also write the paths to as a JSON list.
+        manifest_file_path: Optional path to the ingest manifest, used instead of
+            parsing the file list out of the corpus.
+    """
+    if manifest_file_path:
+        paths = [entry["path"] for entry in load_manifest(manifest_file_path)["files"]]
+    else:
+        paths = _listed_paths(gitingest_file_path)
+
+    manifests = [os.path.join(os.path.abspath(codebase_path), path) for path in paths if is_dependency_manifest(path)]
+
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(manifests, f, indent=4)
+
+    print(f"Found {len(manifests)} dependency manifest(s).")
+    return manifests
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("codebase_path", help="The path to the codebase.")
+    parser.add_argument("gitingest_file_path", help="The path to the gitingest file.")
+    parser.add_argument("output_file", help="The path to the output file.")
+    args = parser.parse_args()
+    find_dependency_manifests(args.codebase_path, args.gitingest_file_path, args.output_file)
@@ -2,19 +2,21 @@ import argparse
 import os
 import re
 
+from ai_safe_ops.corpus import Corpus
+
 def find_pyproject(codebase_path: str, gitingest_file_path: str, output_file: str):
     """
     Finds the pyproject.toml file in the codebase.
     """
-    with open(gitingest_file_path, "r") as f:
-        content = f.read()
-
-    # Find the "Repository Structure" section
-    match = re.search(r"# Repository Structure\n\n```\n(.*?)```", content, re.DOTALL)
-    if not match:
-        return
+    # Only the "Repository Structure" section at the top is needed, so the corpus is
+    # memory-mapped and searched in place instead of being read whole.
+    with Corpus(gitingest_file_path) as corpus:
+        # Find the "Repository Structure" section
+        match = re.search(rb"# Repository Structure\n\n```\n(.*?)```", corpus.data, re.DOTALL)
+        if not match:
+            return
 
-    file_tree = match.group(1)
+        file_tree = match.group(1).decode("utf-8", errors="replace")
     for line in file_tree.splitlines():
         if "pyproject.toml" in line:
             # The line might contain indentation, so we strip it.
@@ -2,23 +2,22 @@ import argparse
 import os
 import re
 
+from ai_safe_ops.corpus import Corpus
+
 def find_requirements(gitingest_file: str, output_file: str):
     """
     Finds the requirements.txt file in the codebase.
     """
-    with open(gitingest_file, "r") as f:
-        content = f.read()
-
-    print(f"Content of gitingest_file: {content[:500]}") # Print first 500 chars
-
-    # Find the "Repository Structure" section
-    match = re.search(r"# Repository Structure\n\n```\n(.*?)```", content, re.DOTALL)
-    if not match:
-        print("Repository Structure section not found.")
-        return
+    # Only the "Repository Structure" section at the top is needed, so the corpus is
+    # memory-mapped and searched in place instead of being read whole.
+    with Corpus(gitingest_file) as corpus:
+        # Find the "Repository Structure" section
+        match = re.search(rb"# Repository Structure\n\n```\n(.*?)```", corpus.data, re.DOTALL)
+        if not match:
+            print("Repository Structure section not found.")
+            return
 
-    file_tree = match.group(1)
-    print(f"File tree: {file_tree}")
+        file_tree = match.group(1).decode("utf-8", errors="replace")
 
     for line in file_tree.splitlines():
         if "requirements.txt" in line:
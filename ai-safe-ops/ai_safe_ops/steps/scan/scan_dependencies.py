@@ -1,70 +1,250 @@
 import argparse
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import sys
 
-# Abhängigkeiten werden jetzt über setup.py installiert
-from pip_audit._audit import Auditor
-from pip_audit._dependency_source import requirement, pyproject
-from pip_audit._service import pypi
+from ai_safe_ops import progress
+from ai_safe_ops.vulndb import (
+    DEFAULT_VULNDB_TTL,
+    FallbackVulnerabilityService,
+    PyPIVulnerabilityService,
+    VulnerabilityDatabase,
+    normalize_name,
+)
 
-def scan_dependencies(dependency_file_path: str, output_file: str):
+def read_manifest_paths(dependency_file_path: str) -> list[str]:
     """
-    Scans the dependency file for vulnerable dependencies.
-    The input `dependency_file_path` is the path to an intermediate file
-    that CONTAINS the actual path to the dependency file.
+    Reads the intermediate file written by find_dependency_manifests (a JSON list of
+    paths) or find_pyproject (a single path). Missing files yield no manifests.
     """
-    
-    # --- KORREKTUR HIER ---
-    # Schritt 1: Lies den Pfad aus der Zwischendatei.
     try:
         with open(dependency_file_path, 'r') as f:
-            actual_dependency_file = f.read().strip()
+            content = f.read().strip()
     except FileNotFoundError:
         # Falls die Zwischendatei nicht existiert (z.B. weil kein pyproject gefunden wurde).
-        actual_dependency_file = ""
+        return []
+    if content.startswith("["):
+        return json.loads(content)
+    return [content] if content else []
 
-    # Schritt 2: Überprüfe, ob der ausgelesene Pfad gültig ist.
-    if not actual_dependency_file or not os.path.exists(actual_dependency_file):
-        print(f"Dependency file path not found in '{dependency_file_path}' or path is invalid. Skipping scan.")
-        with open(output_file, "w") as f:
-            json.dump([{"name": "No valid dependency file found", "version": "", "vulns": []}], f)
+def _pinned_version(requirement) -> str:
+    """Returns the version a requirement pins with == or ===, or None if it does not pin exactly one version."""
+    specifiers = list(requirement.specifier)
+    if len(specifiers) != 1 or specifiers[0].operator not in ("==", "===") or "*" in specifiers[0].version:
+        return None
+    return specifiers[0].version
+
+def _requirement_lines(manifest_path: str, seen: set = None):
+    """Yields the requirement strings of a requirements file, following -r/--requirement includes."""
+    seen = seen if seen is not None else set()
+    manifest_path = os.path.abspath(manifest_path)
+    if manifest_path in seen:
         return
+    seen.add(manifest_path)
+    with open(manifest_path, "r") as f:
+        for line in f:
+            line = line.split(" #", 1)[0].strip()
+            if not line or line.startswith("#"):
+                continue
+            for option in ("-r ", "--requirement ", "--requirement="):
+                if line.startswith(option):
+                    included = os.path.join(os.path.dirname(manifest_path), line[len(option):].strip())
+                    yield from _requirement_lines(included, seen)
+                    break
+            else:
+                if not line.startswith("-"):
+                    # Per-requirement options such as --hash are not part of the specifier.
+                    yield line.split(" --", 1)[0].strip()
+
+def collect_pinned_dependencies(manifest_path: str) -> list[tuple[str, str]]:
+    """
+    Returns the (name, version) pairs a manifest pins exactly, read from the file
+    without a package index. Requirements that are not pinned to one version (and
+    their transitive dependencies) cannot be resolved offline and are skipped.
+    """
+    if manifest_path.endswith(".txt"):
+        requirements = list(_requirement_lines(manifest_path))
+    else:
+        import tomllib
+
+        with open(manifest_path, "rb") as f:
+            requirements = tomllib.load(f).get("project", {}).get("dependencies", [])
+
+    from packaging.requirements import InvalidRequirement, Requirement
+
+    dependencies = []
+    for requirement_string in requirements:
+        try:
+            requirement = Requirement(requirement_string)
+        except InvalidRequirement:
+            print(f"Skipping {requirement_string} in {manifest_path}: not a valid requirement.")
+            continue
+        if requirement.marker is not None and not requirement.marker.evaluate():
+            continue
+        version = _pinned_version(requirement)
+        if version is None:
+            print(f"Skipping {requirement_string} in {manifest_path}: not pinned to one version, which cannot be resolved offline.")
+            continue
+        dependencies.append((requirement.name, version))
+    return dependencies
+
+def collect_dependencies(manifest_path: str, offline: bool = False) -> list[tuple[str, str]]:
+    """
+    Returns the (name, version) pairs a manifest resolves to, using pip-audit's
+    dependency sources. These resolve unpinned requirements by installing them from
+    the package index, so with `offline` only exactly pinned requirements are
+    collected instead (see collect_pinned_dependencies).
+    """
+    if offline:
+        return collect_pinned_dependencies(manifest_path)
+
+    # pip-audit is slow to import, so it is only loaded once there is something to audit.
+    from pip_audit._dependency_source import requirement, pyproject
 
-    print(f"Scanning dependency file at actual path: {actual_dependency_file}")
-    
     # Entscheide die Quelle basierend auf dem Dateinamen des *echten* Pfades
-    if os.path.basename(actual_dependency_file) == 'requirements.txt':
-        source = requirement.RequirementSource(Path(actual_dependency_file))
+    if manifest_path.endswith(".txt"):
+        source = requirement.RequirementSource([Path(manifest_path)])
     else:
-        source = pyproject.PyProjectSource(Path(actual_dependency_file))
-
-    service = pypi.PyPIService()
-    auditor = Auditor(service)
-    results = auditor.audit(source)
-    
-    output = []
-    for dependency, vulns in results:
-        output.append({
-            "name": dependency.name,
-            "version": str(dependency.version),
-            "vulns": [
-                {
-                    "id": v.id,
-                    "fix_versions": [str(fv) for fv in v.fix_versions],
-                    "description": v.description,
-                }
-                for v in vulns
-            ],
-        })
+        source = pyproject.PyProjectSource(Path(manifest_path))
+
+    dependencies = []
+    for dependency in source.collect():
+        if dependency.is_skipped():
+            print(f"Skipping {dependency.name} in {manifest_path}: {dependency.skip_reason}")
+            continue
+        dependencies.append((dependency.name, str(dependency.version)))
+    return dependencies
+
+def open_vulnerability_service(vulndb_path: str = None, offline: bool = False, pool_size: int = 10, live_fallback: bool = False):
+    """
+    Returns the local vulnerability database if `vulndb_path` exists, otherwise a
+    pooled client of the PyPI JSON API (unless `offline` is set). A package missing
+    from the database has no known advisories; with `live_fallback` (and without
+    `offline`) it is looked up on PyPI instead.
+    """
+    if vulndb_path and os.path.exists(vulndb_path):
+        database = VulnerabilityDatabase(vulndb_path)
+        if database.is_stale(DEFAULT_VULNDB_TTL):
+            print(f"Warning: the vulnerability database {vulndb_path} is older than a day; run `python -m ai_safe_ops.vulndb refresh`.")
+        if offline or not live_fallback:
+            return database
+        return FallbackVulnerabilityService(database, PyPIVulnerabilityService(pool_size=pool_size))
+    if vulndb_path:
+        print(f"Warning: vulnerability database {vulndb_path} not found.")
+    if offline:
+        raise FileNotFoundError(f"No vulnerability database found at {vulndb_path} and live lookups are disabled (offline).")
+    return PyPIVulnerabilityService(pool_size=pool_size)
+
+def audit_dependencies(dependencies: dict, service, max_workers: int = 10) -> list[dict]:
+    """
+    Looks up every unique dependency with `service` (any object with a
+    `query(name, version)` method returning vulnerability records) concurrently.
+
+    Args:
+        dependencies: Maps (normalized name, version) to {"name": ..., "manifests": [...]}.
+        service: The vulnerability service.
+        max_workers: The number of concurrent lookups.
+
+    Returns:
+        One result per dependency with its name, version, the manifests it came from and its vulnerabilities.
+    """
+    keys = sorted(dependencies)
+    progress.begin(len(keys), "packages")
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        lookups = executor.map(lambda key: service.query(dependencies[key]["name"], key[1]), keys)
+        for key, vulns in zip(keys, lookups):
+            results.append({
+                "name": dependencies[key]["name"],
+                "version": key[1],
+                "manifests": dependencies[key]["manifests"],
+                "vulns": [
+                    {"id": v["id"], "fix_versions": v["fix_versions"], "description": v["description"]}
+                    for v in vulns
+                ],
+            })
+            progress.advance()
+    return results
+
+def scan_dependencies(
+    dependency_file_path: str,
+    output_file: str,
+    vulndb_path: str = None,
+    offline: bool = False,
+    max_workers: int = 10,
+    service=None,
+    *,
+    manifest_paths: list[str] = None,
+    live_fallback: bool = False,
+):
+    """
+    Scans the dependency manifests of a codebase for vulnerable dependencies.
+
+    The manifests are given as `manifest_paths` (the list find_dependency_manifests
+    returns) or, when the step is run on its own, as `dependency_file_path`: an
+    intermediate file that CONTAINS the path of one dependency file, or a JSON list
+    of them. All manifests are resolved concurrently, (name, version) pairs that
+    appear in several manifests are looked up once, and every result lists the
+    manifests it came from.
+
+    Args:
+        dependency_file_path: The intermediate file listing the dependency manifests,
+            or None when `manifest_paths` is given.
+        output_file: The file path to write the JSON results to.
+        vulndb_path: Optional local vulnerability database (see ai_safe_ops.vulndb).
+            Without one, the PyPI JSON API is queried through a pooled session.
+        offline: Never use the network: fail early when there is no local database,
+            and audit only the requirements pinned to one version, as resolving the
+            others (and transitive dependencies) needs the package index.
+        max_workers: The number of manifests resolved and dependencies looked up at a time.
+        service: A vulnerability service to use instead, e.g. a local stand-in.
+        manifest_paths: The paths of the dependency manifests.
+        live_fallback: Look up packages missing from the local database on PyPI.
+    """
+    if manifest_paths is None:
+        manifest_paths = read_manifest_paths(dependency_file_path) if dependency_file_path else []
+    manifests = [path for path in manifest_paths if os.path.exists(path)]
+    if not manifests:
+        print("No valid dependency file found. Skipping scan.")
+        with open(output_file, "w") as f:
+            json.dump([{"name": "No valid dependency file found", "version": "", "vulns": []}], f)
+        return
+
+    print(f"Scanning {len(manifests)} dependency file(s).")
+
+    # The service is opened first, so an offline scan without a database fails before any work.
+    owns_service = service is None
+    if owns_service:
+        service = open_vulnerability_service(vulndb_path, offline, pool_size=max_workers, live_fallback=live_fallback)
+    try:
+        # Results are tagged with manifest paths relative to the directory all manifests share.
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in manifests])
+        dependencies = {}
+        progress.begin(len(manifests), "manifests")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for manifest_path, collected in zip(manifests, executor.map(lambda path: collect_dependencies(path, offline), manifests)):
+                tag = os.path.relpath(os.path.abspath(manifest_path), root)
+                for name, version in collected:
+                    entry = dependencies.setdefault((normalize_name(name), version), {"name": name, "manifests": []})
+                    if tag not in entry["manifests"]:
+                        entry["manifests"].append(tag)
+                progress.advance()
+
+        output = audit_dependencies(dependencies, service, max_workers)
+    finally:
+        if owns_service:
+            service.close()
 
     with open(output_file, "w") as f:
         json.dump(output, f, indent=4)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("dependency_file_path", help="The path to the intermediate file containing the actual dependency file path.")
+    parser.add_argument("dependency_file_path", help="The path to the intermediate file containing the dependency file path(s).")
     parser.add_argument("output_file", help="The path to the output file.")
+    parser.add_argument("--vulndb", help="The path to a local vulnerability database.")
+    parser.add_argument("--offline", action="store_true", help="Never query the live PyPI service.")
+    parser.add_argument("--live-fallback", action="store_true", help="Look up packages missing from the local database on PyPI.")
     args = parser.parse_args()
-    scan_dependencies(args.dependency_file_path, args.output_file)
\ No newline at end of file
+    scan_dependencies(args.dependency_file_path, args.output_file, args.vulndb, args.offline, live_fallback=args.live_fallback)
\ No newline at end of file
@@ -1,46 +1,123 @@
 import argparse
-import json
 import os
-import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from detect_secrets.core.scan import scan_file
-from detect_secrets.settings import transient_settings
+from ai_safe_ops import progress
+from ai_safe_ops.findings import FindingWriter
+from ai_safe_ops.source_index import SourceIndex
+from ai_safe_ops.steps.ingest.ingest_codebase import load_manifest, manifest_path_for
 
-def scan_secrets(gitingest_file_path: str, output_file: str):
+SECRETS_CONFIG = {
+    'plugins_used': [
+        {'name': 'AWSKeyDetector'},
+        {'name': 'Base64HighEntropyString', 'limit': 3},
+        {'name': 'DiscordBotTokenDetector'},
+        {'name': 'GitHubTokenDetector'},
+        {'name': 'HexHighEntropyString', 'limit': 3},
+        {'name': 'JwtTokenDetector'},
+        {'name': 'MailchimpDetector'},
+        {'name': 'NpmDetector'},
+        {'name': 'PrivateKeyDetector'},
+        {'name': 'SendGridDetector'},
+        {'name': 'SlackDetector'},
+        {'name': 'StripeDetector'},
+        {'name': 'TwilioKeyDetector'},
+    ],
+}
+# Below this many files, scanning in a process pool costs more than it saves.
+PARALLEL_THRESHOLD = 32
+
+def preload():
+    """Builds detect-secrets' plugin registry ahead of time (called by the workflow server at startup)."""
+    from detect_secrets.core.plugins.util import get_mapping_from_secret_type_to_class
+
+    get_mapping_from_secret_type_to_class()
+
+def _init_worker():
+    """Configures the detect-secrets plugins once per worker process."""
+    from detect_secrets.settings import configure_settings_from_baseline
+
+    configure_settings_from_baseline(SECRETS_CONFIG)
+
+def _secret_record(secret, file_path: str, line: int) -> dict:
+    record = {
+        "type": "SECRET",
+        "secret_type": secret.type,
+        "line": line,
+        "hashed_secret": secret.secret_hash,
+        "is_verified": secret.is_verified,
+    }
+    if file_path:
+        record["file"] = file_path
+    return record
+
+def scan_source_file(file_path: str, relative_path: str) -> list[dict]:
+    """Scans one source file with the configured plugins and returns its secret records."""
+    # detect-secrets is only imported when the step runs.
+    from detect_secrets.core.scan import scan_file
+
+    return [_secret_record(secret, relative_path, secret.line_number) for secret in scan_file(file_path)]
+
+def scan_secrets(
+    gitingest_file_path: str,
+    output_file: str,
+    manifest_file_path: str = None,
+    line_index_file_path: str = None,
+    max_workers: int = None,
+):
     """
-    Scans the gitingest file for secrets.
+    Scans the ingested codebase for secrets.
+
+    The original files listed in the ingest manifest are scanned in a process pool;
+    each worker configures the detect-secrets plugins once. Without a manifest the
+    corpus is scanned as a whole and findings are mapped back with the line index.
+    The findings are written as newline-delimited JSON, one record per secret with its
+    "secret_type", "file", "line" and "hashed_secret".
+
+    Args:
+        gitingest_file_path: The path to the gitingest file containing the codebase content.
+        output_file: The file path to write the findings to.
+        manifest_file_path: The path to the ingest manifest. Defaults to the manifest
+            written next to the gitingest file, if there is one.
+        line_index_file_path: Optional path to the line index written by the ingest step.
+        max_workers: The number of processes scanning files.
     """
-    config = {
-        'plugins_used': [
-            {'name': 'AWSKeyDetector'},
-            {'name': 'Base64HighEntropyString', 'limit': 3},
-            {'name': 'DiscordBotTokenDetector'},
-            {'name': 'GitHubTokenDetector'},
-            {'name': 'HexHighEntropyString', 'limit': 3},
-            {'name': 'JwtTokenDetector'},
-            {'name': 'MailchimpDetector'},
-            {'name': 'NpmDetector'},
-            {'name': 'PrivateKeyDetector'},
-            {'name': 'SendGridDetector'},
-            {'name': 'SlackDetector'},
-            {'name': 'StripeDetector'},
-            {'name': 'TwilioKeyDetector'},
-        ],
-    }
+    from detect_secrets.core.scan import scan_file
+    from detect_secrets.settings import transient_settings
+
+    if not os.path.exists(gitingest_file_path):
+        raise FileNotFoundError(f"Gitingest file not found: {gitingest_file_path}")
+    manifest_file_path = manifest_file_path or manifest_path_for(gitingest_file_path)
+    manifest = load_manifest(manifest_file_path) if os.path.exists(manifest_file_path) else None
 
-    secrets = {}
-    with transient_settings(config):
-        for secret in scan_file(gitingest_file_path):
-            if gitingest_file_path not in secrets:
-                secrets[gitingest_file_path] = []
-            secrets[gitingest_file_path].append(str(secret))
+    with FindingWriter(output_file) as writer:
+        if manifest is not None:
+            files = [(os.path.join(manifest["root"], entry["path"]), entry["path"]) for entry in manifest["files"]]
+            files = [item for item in files if os.path.isfile(item[0])]
+            progress.begin(len(files), "files")
+            if len(files) < PARALLEL_THRESHOLD or max_workers == 1:
+                with transient_settings(SECRETS_CONFIG):
+                    for item in files:
+                        writer.write_all(scan_source_file(*item))
+                        progress.advance()
+            else:
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+                    for records in executor.map(scan_source_file, *zip(*files), chunksize=16):
+                        writer.write_all(records)
+                        progress.advance()
+        else:
+            index = SourceIndex.for_corpus(gitingest_file_path, line_index_file_path)
+            with transient_settings(SECRETS_CONFIG):
+                for secret in scan_file(gitingest_file_path):
+                    file_path, line, _ = index.locate(index.line_starts[secret.line_number - 1])
+                    writer.write(_secret_record(secret, file_path, line))
 
-    with open(output_file, "w") as f:
-        json.dump(secrets, f, indent=4)
+    print(f"Secret scan completed: {writer.count} secret(s) found. Results written to {output_file}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("gitingest_file_path", help="The path to the gitingest file.")
     parser.add_argument("output_file", help="The path to the output file.")
+    parser.add_argument("--manifest-file", help="The path to the ingest manifest.")
     args = parser.parse_args()
-    scan_secrets(args.gitingest_file_path, args.output_file)
\ No newline at end of file
+    scan_secrets(args.gitingest_file_path, args.output_file, args.manifest_file)
@@ -1,45 +1,83 @@
 import argparse
 import json
+import os
 
-def scan_tech_stack(gitingest_file_path: str, output_file: str):
+from ai_safe_ops.corpus import Corpus
+from ai_safe_ops.languages import (
+    AMBIGUOUS_EXTENSIONS,
+    HEAD_SIZE,
+    LANGUAGE_BY_EXTENSION,
+    LANGUAGE_BY_FILENAME,
+    MANIFEST_LANGUAGES,
+    classify_file,
+)
+from ai_safe_ops.steps.ingest.ingest_codebase import load_manifest, manifest_path_for
+
+def build_inventory(files: list[dict], corpus: Corpus) -> dict:
+    """
+    Classifies every file in an ingest manifest in a single pass and totals files,
+    bytes and lines per language. Files are classified by name and extension; only
+    files with an ambiguous extension or none at all are looked at, and then only
+    their first HEAD_SIZE bytes. Package manifests such as go.mod or package.json
+    are collected per language so ecosystems without source files still show up.
+
+    Args:
+        files: The "files" entries of the ingest manifest.
+        corpus: The ingest corpus the entries point into.
+
+    Returns:
+        A dict with "languages" mapping each language to its "files", "bytes" and
+        "lines", and "manifests" mapping languages to the package manifests found.
+    """
+    languages = {}
+    manifests = {}
+    for entry in files:
+        path = entry["path"]
+        name = path.rpartition("/")[2].lower()
+        if name in MANIFEST_LANGUAGES:
+            manifests.setdefault(MANIFEST_LANGUAGES[name], []).append(path)
+
+        # Same decision as languages.needs_content, inlined for speed on large trees.
+        extension = os.path.splitext(name)[1]
+        if extension in AMBIGUOUS_EXTENSIONS or not extension and name not in LANGUAGE_BY_FILENAME:
+            language = classify_file(path, corpus.data[entry["start"]:min(entry["start"] + HEAD_SIZE, entry["end"])])
+        else:
+            language = entry.get("language") or LANGUAGE_BY_FILENAME.get(name) or LANGUAGE_BY_EXTENSION.get(extension)
+        if language is None:
+            continue
+
+        lines = entry.get("lines")
+        if lines is None:
+            # Manifests written before line counts were recorded.
+            lines = corpus.data[entry["start"]:entry["end"]].count(b"\n")
+        totals = languages.setdefault(language, {"files": 0, "bytes": 0, "lines": 0})
+        totals["files"] += 1
+        totals["bytes"] += entry["size"]
+        totals["lines"] += lines
+
+    for language in manifests:
+        languages.setdefault(language, {"files": 0, "bytes": 0, "lines": 0})
+
+    return {
+        "languages": dict(sorted(languages.items(), key=lambda item: (-item[1]["bytes"], item[0]))),
+        "manifests": dict(sorted(manifests.items())),
+    }
+
+def scan_tech_stack(gitingest_file_path: str, output_file: str, manifest_file_path: str = None):
     """
-    Scans the gitingest file to identify the tech stack.
+    Scans the ingested codebase to identify the tech stack, reporting the number of
+    files, bytes and lines per language.
+
+    Args:
+        gitingest_file_path: The path to the gitingest file containing the codebase content.
+        output_file: The file path to write the JSON results to.
+        manifest_file_path: The path to the ingest manifest. Defaults to the manifest
+            written next to the gitingest file.
     """
-    with open(gitingest_file_path, "r") as f:
-        content = f.read()
-
-    tech_stack = {}
-
-    if "python" in content.lower():
-        tech_stack["python"] = "detected"
-    if "go" in content.lower():
-        tech_stack["go"] = "detected"
-    if "javascript" in content.lower():
-        tech_stack["javascript"] = "detected"
-    if "typescript" in content.lower():
-        tech_stack["typescript"] = "detected"
-    if "java" in content.lower():
-        tech_stack["java"] = "detected"
-    if "ruby" in content.lower():
-        tech_stack["ruby"] = "detected"
-    if "php" in content.lower():
-        tech_stack["php"] = "detected"
-    if "c#" in content.lower():
-        tech_stack["c#"] = "detected"
-    if "c++" in content.lower():
-        tech_stack["c++"] = "detected"
-    if "c" in content.lower():
-        tech_stack["c"] = "detected"
-    if "swift" in content.lower():
-        tech_stack["swift"] = "detected"
-    if "kotlin" in content.lower():
-        tech_stack["kotlin"] = "detected"
-    if "scala" in content.lower():
-        tech_stack["scala"] = "detected"
-    if "rust" in content.lower():
-        tech_stack["rust"] = "detected"
-    if "dart" in content.lower():
-        tech_stack["dart"] = "detected"
+    manifest = load_manifest(manifest_file_path or manifest_path_for(gitingest_file_path))
+
+    with Corpus(gitingest_file_path, manifest) as corpus:
+        tech_stack = build_inventory(corpus.files, corpus)
 
     with open(output_file, "w") as f:
         json.dump(tech_stack, f, indent=4)
@@ -48,5 +86,6 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("gitingest_file_path", help="The path to the gitingest file.")
     parser.add_argument("output_file", help="The path to the output file.")
+    parser.add_argument("--manifest-file", help="The path to the ingest manifest.")
     args = parser.parse_args()
-    scan_tech_stack(args.gitingest_file_path, args.output_file)
+    scan_tech_stack(args.gitingest_file_path, args.output_file, args.manifest_file)
@@ -0,0 +1,215 @@
+import json
+import os
+import resource
+import sys
+import time
+
+from ai_safe_ops.findings import iter_findings
+
+# How spans are exported: "auto" picks OTLP when an endpoint is configured, otherwise a
+# file in the log directory, otherwise nothing.
+OTEL_EXPORTERS = ("auto", "otlp", "console", "file", "none")
+SERVICE_NAME = "ai-safe-ops"
+TRACE_FILE_NAME = "traces.jsonl"
+
+
+def _read_proc_field(path: str, field: str):
+    """Returns an integer field of a /proc status-like file, or None where there is no /proc."""
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name == field:
+                    return int(value.split()[0])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _maxrss_bytes(usage) -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+class StepMeter:
+    """
+    Measures the resources a step uses in the current process: wall time, CPU time,
+    peak RSS and bytes read. Use as a context manager around the step; `metrics`
+    holds the result afterwards.
+
+    CPU time includes the processes the step started and waited for (e.g. a process
+    pool of its own), and so does the peak RSS if one of them used more memory than
+    the step's process. On Linux the peak RSS is reset before the step, so it is the
+    step's own even in a reused worker; elsewhere it is the process high-water mark.
+    Bytes read are counted by the kernel for the step's process only (Linux).
+    """
+
+    def __enter__(self):
+        # Writing 5 to clear_refs resets the peak RSS (VmHWM) of the process.
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+        self._self = resource.getrusage(resource.RUSAGE_SELF)
+        self._children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self._read = _read_proc_field("/proc/self/io", "rchar")
+        self._start = time.perf_counter()
+        self.metrics = {}
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self._start
+        usage_self = resource.getrusage(resource.RUSAGE_SELF)
+        usage_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = sum(
+            after - before
+            for after, before in (
+                (usage_self.ru_utime, self._self.ru_utime),
+                (usage_self.ru_stime, self._self.ru_stime),
+                (usage_children.ru_utime, self._children.ru_utime),
+                (usage_children.ru_stime, self._children.ru_stime),
+            )
+        )
+        peak_kb = _read_proc_field("/proc/self/status", "VmHWM")
+        peak = peak_kb * 1024 if peak_kb is not None else _maxrss_bytes(usage_self)
+        # The children's high-water mark covers every child ever reaped; it only
+        # belongs to this step if it rose during the step.
+        if usage_children.ru_maxrss > self._children.ru_maxrss:
+            peak = max(peak, _maxrss_bytes(usage_children))
+        read = _read_proc_field("/proc/self/io", "rchar")
+
+        self.metrics = {
+            "wall_s": round(wall, 3),
+            "cpu_s": round(cpu, 3),
+            "peak_rss_mb": round(peak / (1024 * 1024), 1),
+            "bytes_read": read - self._read if read is not None and self._read is not None else None,
+        }
+
+
+def count_findings(output_path: str, kind: str):
+    """Returns the number of findings in a "findings" or "bandit" step output, or None if it cannot be read."""
+    try:
+        if kind == "findings":
+            return sum(1 for _ in iter_findings(output_path))
+        if kind == "bandit":
+            with open(output_path, "r") as f:
+                return len(json.load(f).get("results", []))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def create_span_exporter(exporter: str = "auto", endpoint: str = None, trace_file: str = None):
+    """
+    Returns the OpenTelemetry span exporter for an exporter name, or None if tracing is
+    off. "otlp" sends spans over OTLP/HTTP to `endpoint` (or the standard
+    OTEL_EXPORTER_OTLP_* variables); "console" writes them to stderr, as stdout carries
+    the step protocol; "file" appends one JSON span per line to `trace_file`.
+
+    Raises:
+        ImportError: If the OpenTelemetry SDK is not installed.
+    """
+    if exporter not in OTEL_EXPORTERS:
+        raise ValueError(f"Unknown OpenTelemetry exporter '{exporter}'. Choose one of: {', '.join(OTEL_EXPORTERS)}.")
+    if exporter == "auto":
+        if endpoint or os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT") or os.environ.get("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT"):
+            exporter = "otlp"
+        elif trace_file:
+            exporter = "file"
+        else:
+            return None
+    if exporter == "none":
+        return None
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=endpoint) if endpoint else OTLPSpanExporter()
+    if exporter == "console":
+        return ConsoleSpanExporter(out=sys.stderr)
+    if not trace_file:
+        raise ValueError("The file exporter needs a trace file.")
+    return ConsoleSpanExporter(out=open(trace_file, "a"), formatter=lambda span: span.to_json(indent=None) + "\n")
+
+
+class RunTracer:
+    """
+    Exports one span per workflow run and one child span per step. Steps run in
+    worker processes, so their spans are recorded by the runner with the times at
+    which it started them and saw them complete; the step's measured metrics become
+    span attributes. Without an exporter every method is a no-op.
+    """
+
+    def __init__(self, span_exporter=None):
+        self._provider = None
+        self._tracer = None
+        self._exporter = span_exporter
+        self._run_span = None
+        self._step_starts = {}
+        if span_exporter is None:
+            return
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        # A provider of its own rather than the global one, as a warm worker runs many workflows.
+        self._provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+        self._provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        self._tracer = self._provider.get_tracer("ai_safe_ops")
+
+    @property
+    def enabled(self) -> bool:
+        return self._tracer is not None
+
+    def start_run(self, run_id: str, workflow: str, codebase: str = None):
+        if not self.enabled:
+            return
+        attributes = {"ai_safe_ops.run_id": run_id, "ai_safe_ops.workflow": workflow}
+        if codebase:
+            attributes["ai_safe_ops.codebase"] = os.path.abspath(codebase)
+        self._run_span = self._tracer.start_span(f"workflow {workflow}", attributes=attributes)
+
+    def start_step(self, step_name: str):
+        self._step_starts[step_name] = time.time_ns()
+
+    def end_step(self, step_name: str, metrics: dict = None, cached: bool = False, error: BaseException = None):
+        """Records the span of a completed, cached or failed step."""
+        if not self.enabled:
+            return
+        from opentelemetry import trace
+
+        end = time.time_ns()
+        attributes = {"ai_safe_ops.step": step_name, "ai_safe_ops.cached": cached}
+        for key, value in (metrics or {}).items():
+            if value is not None:
+                attributes[f"ai_safe_ops.{key}"] = value
+        span = self._tracer.start_span(
+            f"step {step_name}",
+            context=trace.set_span_in_context(self._run_span),
+            start_time=self._step_starts.pop(step_name, end),
+            attributes=attributes,
+        )
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+        span.end(end_time=end)
+
+    def finish_run(self, status: str, error: BaseException = None):
+        """Ends the run span, marking the spans of steps still running as failed, and flushes the exporter."""
+        if not self.enabled:
+            return
+        from opentelemetry import trace
+
+        for step_name in list(self._step_starts):
+            self.end_step(step_name, error=RuntimeError("The workflow stopped before the step completed."))
+        self._run_span.set_attribute("ai_safe_ops.status", status)
+        if error is not None:
+            self._run_span.record_exception(error)
+            self._run_span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+        self._run_span.end()
+        self._provider.shutdown()
+        out = getattr(self._exporter, "out", None)
+        if out is not None and out not in (sys.stdout, sys.stderr):
+            out.close()
@@ -0,0 +1,377 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import zipfile
+from contextlib import closing
+from pathlib import Path
+
+# The OSV export of every PyPI advisory, one JSON document per vulnerability.
+OSV_PYPI_ARCHIVE_URL = "https://osv-vulnerabilities.storage.googleapis.com/PyPI/all.zip"
+DEFAULT_VULNDB_TTL = 24 * 60 * 60
+# The PyPI JSON API, which lists the known vulnerabilities of every release. Point
+# AI_SAFE_OPS_PYPI_URL at a local stand-in to audit without reaching pypi.org.
+DEFAULT_PYPI_URL = os.environ.get("AI_SAFE_OPS_PYPI_URL", "https://pypi.org/pypi")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS vulns (
+    id TEXT PRIMARY KEY,
+    summary TEXT,
+    aliases TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ranges (
+    vuln_id TEXT NOT NULL,
+    package TEXT NOT NULL,
+    introduced TEXT,
+    fixed TEXT,
+    last_affected TEXT
+);
+CREATE TABLE IF NOT EXISTS affected_versions (
+    vuln_id TEXT NOT NULL,
+    package TEXT NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ranges_package ON ranges (package);
+CREATE INDEX IF NOT EXISTS affected_versions_package ON affected_versions (package, version);
+"""
+
+
+def default_vulndb_path() -> str:
+    """Returns the default location of the vulnerability database, next to the step result cache."""
+    return os.path.join(os.getcwd(), ".ai-safe-ops", "vulndb.sqlite")
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes a package name as PyPI does (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _parse_version(version: str):
+    from packaging.version import InvalidVersion, Version
+
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+def _ranges_of(affected: dict):
+    """Turns the ECOSYSTEM ranges of an OSV "affected" entry into (introduced, fixed, last_affected) tuples."""
+    for version_range in affected.get("ranges", []):
+        if version_range.get("type") != "ECOSYSTEM":
+            continue
+        introduced = None
+        for event in version_range.get("events", []):
+            if "introduced" in event:
+                if introduced is not None:
+                    # An open-ended range followed by a new "introduced" event.
+                    yield introduced, None, None
+                introduced = event["introduced"]
+            elif "fixed" in event or "last_affected" in event:
+                yield introduced or "0", event.get("fixed"), event.get("last_affected")
+                introduced = None
+        if introduced is not None:
+            yield introduced, None, None
+
+
+def _iter_osv_documents(source: str):
+    """Yields the OSV documents of a zip archive, a directory of JSON files, or a JSON file holding one document or a list."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in archive.namelist():
+                if name.endswith(".json"):
+                    yield json.loads(archive.read(name))
+    elif os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".json"):
+                with open(os.path.join(source, name), "r") as f:
+                    yield json.load(f)
+    else:
+        with open(source, "r") as f:
+            data = json.load(f)
+        yield from data if isinstance(data, list) else [data]
+
+
+def import_osv(db_path: str, source: str, ecosystem: str = "PyPI") -> int:
+    """
+    Replaces the content of the vulnerability database with the advisories of an OSV
+    export (e.g. a downloaded all.zip, a directory of OSV JSON files, or a fixture file).
+
+    Args:
+        db_path: The path of the SQLite database; it is created if it does not exist.
+        source: The OSV export to import.
+        ecosystem: Only affected packages of this ecosystem are imported.
+
+    Returns:
+        The number of imported vulnerabilities.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    count = 0
+    connection = sqlite3.connect(db_path)
+    # The import runs in one transaction, so readers never see a half-imported database.
+    with closing(connection), connection:
+        connection.executescript(SCHEMA)
+        for table in ("vulns", "ranges", "affected_versions"):
+            connection.execute(f"DELETE FROM {table}")
+
+        for document in _iter_osv_documents(source):
+            affected = [a for a in document.get("affected", []) if a.get("package", {}).get("ecosystem") == ecosystem]
+            if not affected or document.get("withdrawn"):
+                continue
+            vuln_id = document["id"]
+            connection.execute(
+                "INSERT OR REPLACE INTO vulns VALUES (?, ?, ?)",
+                (vuln_id, document.get("summary") or document.get("details", ""), json.dumps(document.get("aliases", []))),
+            )
+            for entry in affected:
+                package = normalize_name(entry["package"]["name"])
+                connection.executemany(
+                    "INSERT INTO ranges VALUES (?, ?, ?, ?, ?)",
+                    [(vuln_id, package, *bounds) for bounds in _ranges_of(entry)],
+                )
+                connection.executemany(
+                    "INSERT INTO affected_versions VALUES (?, ?, ?)",
+                    [(vuln_id, package, version) for version in entry.get("versions", [])],
+                )
+            count += 1
+
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('imported_at', ?)", (str(time.time()),))
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (os.path.abspath(source),))
+    return count
+
+
+def refresh_vulndb(db_path: str, url: str = OSV_PYPI_ARCHIVE_URL, ttl: float = DEFAULT_VULNDB_TTL, force: bool = False) -> bool:
+    """
+    Downloads and imports the OSV export at `url` if the database is missing or older
+    than `ttl` seconds. Returns True if the database was refreshed.
+    """
+    if not force and os.path.exists(db_path):
+        with VulnerabilityDatabase(db_path) as database:
+            if not database.is_stale(ttl):
+                return False
+
+    import urllib.request
+
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as archive:
+        archive_path = archive.name
+    try:
+        urllib.request.urlretrieve(url, archive_path)
+        import_osv(db_path, archive_path)
+    finally:
+        os.remove(archive_path)
+    return True
+
+
+class VulnerabilityDatabase:
+    """
+    Answers "which advisories affect package X at version Y" from a local SQLite copy
+    of the OSV database, without network access.
+
+    Advisories are indexed by normalized package name; exact affected versions are
+    looked up in the index, version ranges are compared with PEP 440 semantics.
+    """
+
+    def __init__(self, db_path: str):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Vulnerability database not found: {db_path}")
+        self.path = db_path
+        # The connection is read-only, so it can be shared by the threads of a concurrent audit.
+        self.connection = sqlite3.connect(f"{Path(db_path).absolute().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    @property
+    def imported_at(self) -> float:
+        """The time of the last import (seconds since the epoch), or 0 if unknown."""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'imported_at'").fetchone()
+        return float(row[0]) if row else 0.0
+
+    def is_stale(self, ttl: float) -> bool:
+        """Returns True if the database was imported more than `ttl` seconds ago."""
+        return time.time() - self.imported_at > ttl
+
+    def has_package(self, name: str) -> bool:
+        """Returns True if any advisory in the database affects the package."""
+        package = normalize_name(name)
+        return any(
+            self.connection.execute(f"SELECT 1 FROM {table} WHERE package = ? LIMIT 1", (package,)).fetchone()
+            for table in ("ranges", "affected_versions")
+        )
+
+    def query(self, name: str, version: str) -> list[dict]:
+        """
+        Returns the advisories affecting a package version, each with its "id",
+        "fix_versions" (the fixed versions above `version`), "description" and "aliases".
+        """
+        package = normalize_name(name)
+        parsed = _parse_version(version)
+
+        matched = {
+            row[0]
+            for row in self.connection.execute(
+                "SELECT vuln_id FROM affected_versions WHERE package = ? AND version = ?", (package, version)
+            )
+        }
+        fixes = {}
+        for vuln_id, introduced, fixed, last_affected in self.connection.execute(
+            "SELECT vuln_id, introduced, fixed, last_affected FROM ranges WHERE package = ?", (package,)
+        ):
+            if fixed:
+                fixes.setdefault(vuln_id, set()).add(fixed)
+            if parsed is not None and self._in_range(parsed, introduced, fixed, last_affected):
+                matched.add(vuln_id)
+
+        results = []
+        for vuln_id in sorted(matched):
+            summary, aliases = self.connection.execute("SELECT summary, aliases FROM vulns WHERE id = ?", (vuln_id,)).fetchone()
+            fix_versions = [
+                fixed for fixed in fixes.get(vuln_id, ())
+                if _parse_version(fixed) is not None and (parsed is None or _parse_version(fixed) > parsed)
+            ]
+            results.append({
+                "id": vuln_id,
+                "fix_versions": sorted(fix_versions, key=_parse_version),
+                "description": summary,
+                "aliases": json.loads(aliases),
+            })
+        return results
+
+    @staticmethod
+    def _in_range(version, introduced, fixed, last_affected) -> bool:
+        lower = _parse_version(introduced) if introduced and introduced != "0" else None
+        if lower is not None and version < lower:
+            return False
+        if fixed:
+            upper = _parse_version(fixed)
+            return upper is None or version < upper
+        if last_affected:
+            upper = _parse_version(last_affected)
+            return upper is None or version <= upper
+        return True
+
+
+class VulnerabilityServiceError(Exception):
+    """Raised when a live vulnerability service cannot answer a query."""
+
+
+class PyPIVulnerabilityService:
+    """
+    Looks up vulnerabilities with the PyPI JSON API. Requests go through one pooled
+    HTTP session, so concurrent lookups reuse keep-alive connections. `query` returns
+    the same records as VulnerabilityDatabase.query, so either can back an audit.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_PYPI_URL, pool_size: int = 10, timeout: float = 15):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # requests is only loaded with the service, so its errors are kept for query().
+        self._request_errors = (requests.RequestException, ValueError)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=3)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def query(self, name: str, version: str) -> list[dict]:
+        """
+        Returns the vulnerabilities PyPI reports for a release (none if the release is
+        unknown). Raises VulnerabilityServiceError if PyPI cannot be reached or answers
+        with an error.
+        """
+        try:
+            response = self.session.get(f"{self.base_url}/{normalize_name(name)}/{version}/json", timeout=self.timeout)
+            if response.status_code == 404:
+                return []
+            response.raise_for_status()
+            vulnerabilities = response.json().get("vulnerabilities", [])
+        except self._request_errors as e:
+            raise VulnerabilityServiceError(f"PyPI lookup of {name} {version} failed: {e}") from e
+        return [
+            {
+                "id": vuln["id"],
+                "fix_versions": vuln.get("fixed_in", []),
+                "description": vuln.get("summary") or vuln.get("details", ""),
+                "aliases": vuln.get("aliases", []),
+            }
+            for vuln in vulnerabilities
+            if not vuln.get("withdrawn")
+        ]
+
+
+class FallbackVulnerabilityService:
+    """
+    Answers from the local database and asks a live service about the packages the
+    database knows nothing about, e.g. advisories published since the last import.
+    As most packages have no advisories at all, this sends most lookups over the
+    network, so it is only used on request (see open_vulnerability_service). A live
+    lookup that fails falls back to the database's answer with a warning.
+    """
+
+    def __init__(self, database: VulnerabilityDatabase, live):
+        self.database = database
+        self.live = live
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.database.close()
+        self.live.close()
+
+    def query(self, name: str, version: str) -> list[dict]:
+        """Returns the database's advisories for a known package, otherwise those of the live service."""
+        if self.database.has_package(name):
+            return self.database.query(name, version)
+        try:
+            return self.live.query(name, version)
+        except VulnerabilityServiceError as e:
+            print(f"Warning: {e}; using the local database only.")
+            return []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local OSV vulnerability database.")
+    parser.add_argument("--db", default=default_vulndb_path(), help="The path of the vulnerability database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Import an OSV export (zip archive, directory or JSON file).")
+    import_parser.add_argument("source", help="The OSV export to import.")
+    refresh_parser = subparsers.add_parser("refresh", help="Download the PyPI OSV export if the database is older than the TTL.")
+    refresh_parser.add_argument("--url", default=OSV_PYPI_ARCHIVE_URL, help="The URL of the OSV export.")
+    refresh_parser.add_argument("--ttl", type=float, default=DEFAULT_VULNDB_TTL, help="The maximum age of the database in seconds.")
+    refresh_parser.add_argument("--force", action="store_true", help="Refresh even if the database is not stale.")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        print(f"Imported {import_osv(args.db, args.source)} vulnerabilities into {args.db}")
+    elif refresh_vulndb(args.db, args.url, args.ttl, args.force):
+        print(f"Refreshed {args.db} from {args.url}")
+    else:
+        print(f"{args.db} is up to date.")
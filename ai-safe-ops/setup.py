@@ -6,7 +6,6 @@ setup(
     packages=find_packages(),
     install_requires=[
         "pydantic",
-        "repomix",
         "opentelemetry-api",
         "opentelemetry-sdk",
         "opentelemetry-exporter-otlp-proto-http",
@@ -14,6 +13,8 @@ setup(
         "detect-secrets",
         "bandit",
         "pyyaml",
+        "requests",
+        "packaging",
         "spacy",
     ],
     author="AI SafeOps Labs",
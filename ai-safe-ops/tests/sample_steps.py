@@ -0,0 +1,22 @@
+"""Trivial workflow steps for the runner and scheduler tests."""
+
+import os
+
+
+def write_text(text, output_file):
+    with open(output_file, "w") as f:
+        f.write(text)
+
+
+def write_report(input_file_path, output_file):
+    with open(input_file_path, "r") as f_in, open(output_file, "w") as f_out:
+        f_out.write(f_in.read().upper())
+
+
+def list_files(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory))
+
+
+def write_lines(paths, output_file):
+    with open(output_file, "w") as f:
+        f.write("\n".join(paths))
@@ -0,0 +1,137 @@
+import os
+import subprocess
+
+import pytest
+
+from ai_safe_ops import cache
+from ai_safe_ops.cache import compute_step_key, directory_fingerprint, evict, restore_step, store_step
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def commit_all(repo):
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "initial")
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """A stand-in for the ai_safe_ops package: a step module importing a helper that imports another."""
+    package_dir = tmp_path / "package"
+    (package_dir / "steps").mkdir(parents=True)
+    (package_dir / "steps" / "step.py").write_text("from ai_safe_ops import helper\n")
+    (package_dir / "helper.py").write_text("def load():\n    from ai_safe_ops.patterns import PATTERNS\n")
+    (package_dir / "patterns.py").write_text("PATTERNS = {}\n")
+    (package_dir / "unrelated.py").write_text("")
+    monkeypatch.setattr(cache, "PACKAGE_DIR", str(package_dir))
+    cache._module_digest.cache_clear()
+    yield package_dir
+    cache._module_digest.cache_clear()
+
+
+def step_key():
+    cache._module_digest.cache_clear()
+    return compute_step_key("ai_safe_ops.steps.step", "step", {"limit": 3}, set())
+
+
+def test_step_key_changes_with_transitively_imported_modules(package):
+    key = step_key()
+    (package / "unrelated.py").write_text("X = 1\n")
+    assert step_key() == key
+    (package / "patterns.py").write_text("PATTERNS = {'EMAIL': '@'}\n")
+    assert step_key() != key
+
+
+def test_step_key_covers_input_file_content_but_not_artifact_paths(package, tmp_path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("a")
+    first_artifact, second_artifact = tmp_path / "run1.txt", tmp_path / "run2.txt"
+    first_artifact.write_text("same")
+    second_artifact.write_text("same")
+
+    def key(path, artifact_paths=frozenset()):
+        return compute_step_key("ai_safe_ops.steps.step", "step", {"input_file": str(path)}, artifact_paths)
+
+    before = key(input_file)
+    input_file.write_text("b")
+    assert key(input_file) != before
+    assert key(first_artifact, {str(first_artifact)}) == key(second_artifact, {str(second_artifact)})
+
+
+def test_git_fingerprint_covers_files_in_ignored_directories(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "venv" / "lib").mkdir(parents=True)
+    (repo / ".gitignore").write_text("venv/\n")
+    (repo / "venv" / "lib" / "settings.py").write_text("a")
+    commit_all(repo)
+
+    fingerprint = directory_fingerprint(str(repo))
+    assert fingerprint == cache._git_fingerprint(str(repo))
+    (repo / "venv" / "lib" / "settings.py").write_text("changed")
+    assert directory_fingerprint(str(repo)) != fingerprint
+
+
+def test_git_fingerprint_of_an_ignored_directory_is_capped(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / "build").mkdir(parents=True)
+    (repo / ".gitignore").write_text("build/\n")
+    (repo / "build" / "a.txt").write_text("a")
+    (repo / "build" / "b.txt").write_text("b")
+    commit_all(repo)
+    monkeypatch.setattr(cache, "IGNORED_DIR_MAX_FILES", 1)
+
+    fingerprint = directory_fingerprint(str(repo))
+    (repo / "build" / "b.txt").write_text("changed")
+    assert directory_fingerprint(str(repo)) == fingerprint
+    (repo / "build" / "a.txt").write_text("changed")
+    assert directory_fingerprint(str(repo)) != fingerprint
+
+
+def make_outputs(directory, contents):
+    outputs = {}
+    for key, content in contents.items():
+        outputs[key] = str(directory / f"{key}.txt")
+        if content is not None:
+            (directory / f"{key}.txt").write_text(content)
+    return outputs
+
+
+def test_restore_step_places_outputs_and_removes_ones_the_step_did_not_write(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    (tmp_path / "run1").mkdir()
+    store_step(cache_dir, "key", make_outputs(tmp_path / "run1", {"output_file": "findings", "optional_file": None}))
+
+    run_dir = tmp_path / "run2"
+    run_dir.mkdir()
+    outputs = make_outputs(run_dir, {"output_file": None, "optional_file": "stale"})
+    assert restore_step(cache_dir, "key", outputs)
+    assert (run_dir / "output_file.txt").read_text() == "findings"
+    assert not (run_dir / "optional_file.txt").exists()
+
+
+def test_restore_step_misses(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    outputs = make_outputs(tmp_path, {"output_file": "findings"})
+    assert not restore_step(cache_dir, "key", outputs)
+    store_step(cache_dir, "key", outputs)
+    assert not restore_step(cache_dir, "key", {**outputs, "other_file": str(tmp_path / "other.txt")})
+    os.utime(os.path.join(cache_dir, "key", "meta.json"), (0, 0))
+    assert restore_step(cache_dir, "key", outputs)
+    # Restoring touched the entry; its age is counted from when it was stored.
+    assert not restore_step(cache_dir, "key", outputs, ttl=0)
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    for index, key in enumerate(["old", "used", "new"]):
+        store_step(cache_dir, key, make_outputs(tmp_path, {"output_file": "x" * 1024}))
+        os.utime(os.path.join(cache_dir, key, "meta.json"), (index, index))
+    assert restore_step(cache_dir, "used", make_outputs(tmp_path, {"output_file": None}))
+
+    evict(cache_dir, 2.5 / 1024)
+    assert sorted(os.listdir(cache_dir)) == ["new", "used"]
+    evict(cache_dir, 1 / 1024)
+    assert os.listdir(cache_dir) == ["used"]
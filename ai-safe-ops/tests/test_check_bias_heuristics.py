@@ -0,0 +1,32 @@
+import pytest
+
+from ai_safe_ops.corpus import Corpus
+from ai_safe_ops.steps.analyze import check_bias_heuristics
+
+
+def texts(tmp_path, content, manifest=None):
+    corpus_file = tmp_path / "corpus.txt"
+    corpus_file.write_bytes(content)
+    with Corpus(str(corpus_file), manifest) as corpus:
+        return list(check_bias_heuristics._iter_texts(corpus))
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(check_bias_heuristics, "CHUNK_SIZE", 8)
+
+
+def test_chunks_end_at_line_boundaries(tmp_path):
+    assert texts(tmp_path, b"ab\ncd\nefgh\nij") == [("ab\ncd\n", 0), ("efgh\nij", 6)]
+
+
+def test_long_lines_are_split_between_characters(tmp_path):
+    content = "aaaaaaaé master ßßßßßß".encode("utf-8")
+    chunks = texts(tmp_path, content)
+    assert "".join(text for text, _ in chunks) == content.decode("utf-8")
+    assert all(content[offset:].decode("utf-8").startswith(text) for text, offset in chunks)
+
+
+def test_chunks_stay_within_manifest_files(tmp_path):
+    manifest = {"files": [{"path": "a.py", "start": 2, "end": 5}, {"path": "b.py", "start": 7, "end": 19}]}
+    assert texts(tmp_path, b"--abc--0123456\n789\n", manifest) == [("abc", 2), ("0123456\n", 7), ("789\n", 15)]
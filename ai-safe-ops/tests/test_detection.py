@@ -0,0 +1,92 @@
+import mmap
+
+import pytest
+
+from ai_safe_ops.detection import PatternSet
+from ai_safe_ops.steps.analyze.scan_data_handling import PII_PATTERNS
+
+
+def matches(pattern_set, data):
+    return [(name, match.group(0)) for name, match in pattern_set.finditer(data)]
+
+
+def with_prefilters(patterns, prefilter=r"[0-9]"):
+    return {name: {"pattern": pattern, "prefilter": prefilter} for name, pattern in patterns.items()}
+
+
+@pytest.mark.parametrize("prefiltered", [False, True])
+def test_first_pattern_wins_at_the_same_position(prefiltered):
+    patterns = {"LONG": r"\d{3}-\d{4}", "SHORT": r"\d{3}"}
+    if prefiltered:
+        patterns = with_prefilters(patterns)
+    assert matches(PatternSet(patterns), b"call 555-1234") == [("LONG", b"555-1234")]
+
+    reordered = {"SHORT": r"\d{3}", "LONG": r"\d{3}-\d{4}"}
+    if prefiltered:
+        reordered = with_prefilters(reordered)
+    assert matches(PatternSet(reordered), b"call 555-1234") == [("SHORT", b"555"), ("SHORT", b"123")]
+
+
+@pytest.mark.parametrize("prefiltered", [False, True])
+def test_matches_do_not_overlap_and_come_in_position_order(prefiltered):
+    patterns = {"WORD": r"[a-z]+[0-9]", "NUMBER": r"[0-9]+"}
+    if prefiltered:
+        patterns = with_prefilters(patterns)
+    data = b"ab1 23\nxy9 7\nno digits here\n"
+    assert matches(PatternSet(patterns), data) == [
+        ("WORD", b"ab1"), ("NUMBER", b"23"), ("WORD", b"xy9"), ("NUMBER", b"7"),
+    ]
+
+
+def test_match_starting_later_is_found_when_an_earlier_pattern_fails_at_a_position():
+    pattern_set = PatternSet({"A": r"ab", "B": r"b+c"})
+    assert matches(pattern_set, b"abbc") == [("A", b"ab"), ("B", b"bc")]
+
+
+def test_prefilter_is_used_only_when_every_pattern_declares_one():
+    assert PatternSet(with_prefilters({"A": "a1", "B": "b1"})).prefilter is not None
+    assert PatternSet({"A": {"pattern": "a1", "prefilter": "1"}, "B": "b1"}).prefilter is None
+
+
+def test_prefiltered_matches_do_not_span_lines():
+    patterns = {"SPAN": {"pattern": r"1\n2", "prefilter": "1"}}
+    assert matches(PatternSet(patterns), b"1\n2") == []
+    assert matches(PatternSet({"SPAN": r"1\n2"}), b"1\n2") == [("SPAN", b"1\n2")]
+
+
+def test_prefiltered_scan_finds_a_match_on_the_last_line_without_newline():
+    patterns = with_prefilters({"NUMBER": r"[0-9]+"})
+    assert matches(PatternSet(patterns), b"none\nx 42") == [("NUMBER", b"42")]
+
+
+def test_match_offsets_are_corpus_offsets(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_bytes(b"line one\nmail a@b.io now\n")
+    with open(corpus, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        (name, match), = PatternSet(PII_PATTERNS).finditer(data)
+        assert (name, match.start(), match.end()) == ("EMAIL", 14, 20)
+
+
+def test_pii_patterns_prefer_credit_card_over_phone_number():
+    found = matches(PatternSet(PII_PATTERNS), b"card 4111 1111 1111 1111, phone 555-123-4567, ip 10.0.0.1\n")
+    assert found == [
+        ("CREDIT_CARD", b"4111 1111 1111 1111"),
+        ("PHONE_NUMBER", b"555-123-4567"),
+        ("IP_ADDRESS", b"10.0.0.1"),
+    ]
+
+
+def test_inline_global_flags_apply_to_their_own_pattern():
+    pattern_set = PatternSet({"TOKEN": r"(?i)token=\w+", "WORD": r"secret"})
+    assert matches(pattern_set, b"TOKEN=abc SECRET secret") == [("TOKEN", b"TOKEN=abc"), ("WORD", b"secret")]
+
+
+def test_inline_verbose_flag_with_a_trailing_comment():
+    pattern_set = PatternSet({"NUMBER": "(?x) [0-9]+  # digits", "WORD": "[a-z]+"})
+    assert matches(pattern_set, b"ab 12") == [("WORD", b"ab"), ("NUMBER", b"12")]
+
+
+@pytest.mark.parametrize("patterns", [{"BAD": "a(?i)b"}, {"BAD": "(unclosed"}, {"OK": {"pattern": "a", "prefilter": "["}}])
+def test_invalid_patterns_are_rejected_by_name(patterns):
+    with pytest.raises(ValueError, match="Invalid pattern '(BAD|OK prefilter)'"):
+        PatternSet(patterns)
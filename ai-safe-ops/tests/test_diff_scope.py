@@ -0,0 +1,81 @@
+import subprocess
+
+import pytest
+
+from ai_safe_ops.diff_scope import compute_diff_scope, diff_status, in_scope, load_diff_scope, write_diff_scope
+
+ORIGINAL = "".join(f"line {number}\n" for number in range(1, 11))
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def commit(repo, message):
+    git(repo, "add", "-A")
+    git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "app").mkdir(parents=True)
+    (repo / "app" / "main.py").write_text(ORIGINAL)
+    (repo / "app" / "old_name.py").write_text(ORIGINAL)
+    (repo / "app" / "removed.py").write_text("x = 1\n")
+    (repo / "outside.py").write_text("x = 1\n")
+    git(repo, "init", "-q")
+    commit(repo, "initial")
+
+    lines = ORIGINAL.splitlines(keepends=True)
+    lines[1] = "changed 2\n"
+    lines[6:7] = ["changed 7\n", "inserted\n"]
+    (repo / "app" / "main.py").write_text("".join(lines))
+    git(repo, "mv", "app/old_name.py", "app/new_name.py")
+    git(repo, "rm", "-q", "app/removed.py")
+    (repo / "app" / "added.py").write_text("y = 2\n")
+    git(repo, "add", "app/added.py")
+    (repo / "app" / "untracked.py").write_text("z = 3\n")
+    (repo / "outside.py").write_text("x = 2\n")
+    return repo
+
+
+def test_scope_lists_changed_files_relative_to_the_codebase(repo):
+    scope = compute_diff_scope(str(repo / "app"), "HEAD")
+    assert scope["root"] == str(repo / "app")
+    assert scope["files"] == {
+        "main.py": [[2, 2], [7, 8]],
+        "new_name.py": [],
+        "added.py": None,
+        "untracked.py": None,
+    }
+    assert scope["renames"] == {"new_name.py": "old_name.py"}
+
+
+def test_unknown_ref_raises_a_value_error(repo):
+    with pytest.raises(ValueError, match="git diff"):
+        compute_diff_scope(str(repo), "no-such-ref")
+
+
+def test_in_scope_and_diff_status(repo, tmp_path):
+    scope_file = str(tmp_path / "scope.json")
+    write_diff_scope(str(repo / "app"), "HEAD", scope_file)
+    scope = load_diff_scope(scope_file)
+
+    assert in_scope(None, "anything.py")
+    assert in_scope(scope, "main.py")
+    assert in_scope(scope, str(repo / "app" / "added.py"))
+    assert not in_scope(scope, "old_name.py")
+
+    assert diff_status(scope, "main.py", 2) == "new"
+    assert diff_status(scope, "main.py", 8) == "new"
+    assert diff_status(scope, "main.py", 5) == "existing"
+    assert diff_status(scope, "main.py") == "new"
+    assert diff_status(scope, "new_name.py", 1) == "existing"
+    assert diff_status(scope, "added.py", 1) == "new"
+    assert diff_status(scope, "unchanged.py", 1) == "existing"
+    assert diff_status(scope, None) == "existing"
+
+
+def test_no_scope_file_means_a_full_scan():
+    assert load_diff_scope(None) is None
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from ai_safe_ops.findings import FindingWriter, convert_to_json, iter_findings
+
+FINDINGS = [{"type": "SECRET", "file": "a.py", "line": 1}, {"type": "PII_EXPOSURE", "value": "é\nx"}]
+
+
+def write(path, findings):
+    with FindingWriter(str(path)) as writer:
+        writer.write_all(findings)
+    return writer
+
+
+def test_findings_are_written_one_per_line(tmp_path):
+    writer = write(tmp_path / "findings.jsonl", FINDINGS)
+    assert writer.count == 2
+    lines = (tmp_path / "findings.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == FINDINGS
+    assert list(iter_findings(str(tmp_path / "findings.jsonl"))) == FINDINGS
+
+
+def test_empty_findings_file(tmp_path):
+    write(tmp_path / "findings.jsonl", [])
+    assert list(iter_findings(str(tmp_path / "findings.jsonl"))) == []
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+def test_legacy_json_documents_are_read(tmp_path, indent):
+    path = tmp_path / "findings.json"
+    path.write_text(json.dumps({"findings": FINDINGS}, indent=indent))
+    assert list(iter_findings(str(path))) == FINDINGS
+
+
+@pytest.mark.parametrize("findings", [FINDINGS, []])
+def test_convert_to_json_round_trips(tmp_path, findings):
+    write(tmp_path / "findings.jsonl", findings)
+    output_file = tmp_path / "findings.json"
+    assert convert_to_json(str(tmp_path / "findings.jsonl"), str(output_file)) == len(findings)
+    assert json.loads(output_file.read_text(encoding="utf-8")) == {"findings": findings}
+    assert list(iter_findings(str(output_file))) == findings
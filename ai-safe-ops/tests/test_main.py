@@ -0,0 +1,127 @@
+import json
+import os
+
+from ai_safe_ops.main import resolve_input, run_workflow
+
+WORKFLOW = {
+    "name": "sample_workflow",
+    "steps": [
+        {
+            "name": "produce",
+            "type": "analyze",
+            "module": "sample_steps",
+            "function": "write_text",
+            "inputs": {"text": "{workflow.inputs.text}"},
+            "outputs": {"output_file": "{workflow.outputs.produced_file}"},
+        },
+        {
+            "name": "report",
+            "type": "report",
+            "module": "sample_steps",
+            "function": "write_report",
+            "inputs": {"input_file_path": "{steps.produce.outputs.output_file}"},
+            "outputs": {"output_file": "{workflow.outputs.report_file}"},
+        },
+    ],
+}
+
+
+def write_workflow(tmp_path, workflow):
+    workflow_file = tmp_path / "workflow.json"
+    workflow_file.write_text(json.dumps(workflow))
+    return str(workflow_file)
+
+
+def test_reports_of_a_run_store_run_outlive_the_temporary_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store_path = tmp_path / "store" / "runs.sqlite"
+    store_path.parent.mkdir()
+    summary = run_workflow(
+        write_workflow(tmp_path, WORKFLOW), {"text": "hello"}, False,
+        use_cache=False, run_store_path=str(store_path),
+    )
+    report_file = summary["reports"]["output_file"]
+    assert report_file == str(store_path.parent / "reports" / summary["run_id"] / "report_file.txt")
+    with open(report_file) as f:
+        assert f.read() == "HELLO"
+    assert not os.path.exists(tmp_path / ".ai-safe-ops" / "temp" / summary["run_id"])
+
+
+RETURNS_WORKFLOW = {
+    "name": "returns_workflow",
+    "steps": [
+        {
+            "name": "find",
+            "type": "ingest",
+            "module": "sample_steps",
+            "function": "list_files",
+            "inputs": {"directory": "{workflow.inputs.path}"},
+            "outputs": {},
+            "returns": {"files": "paths"},
+        },
+        {
+            "name": "report",
+            "type": "report",
+            "module": "sample_steps",
+            "function": "write_lines",
+            "inputs": {"paths": "{steps.find.outputs.files}"},
+            "outputs": {"output_file": "{workflow.outputs.report_file}"},
+        },
+    ],
+}
+
+
+def make_codebase(tmp_path):
+    codebase = tmp_path / "codebase"
+    codebase.mkdir()
+    for name in ("b.py", "a.py"):
+        (codebase / name).write_text("")
+    return str(codebase)
+
+
+def test_returned_values_are_passed_to_consumers_without_a_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    codebase = make_codebase(tmp_path)
+    summary = run_workflow(write_workflow(tmp_path, RETURNS_WORKFLOW), {"path": codebase}, False, use_cache=False)
+    with open(summary["reports"]["output_file"]) as f:
+        assert f.read().splitlines() == [os.path.join(codebase, "a.py"), os.path.join(codebase, "b.py")]
+    assert not os.path.exists(os.path.join(os.path.dirname(summary["reports"]["output_file"]), "find_files.txt"))
+
+
+def test_returned_values_are_restored_from_the_cache(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    codebase = make_codebase(tmp_path)
+    workflow_file = write_workflow(tmp_path, RETURNS_WORKFLOW)
+    cache_dir = str(tmp_path / "cache")
+    run_workflow(workflow_file, {"path": codebase}, False, cache_dir=cache_dir)
+    capsys.readouterr()
+    summary = run_workflow(workflow_file, {"path": codebase}, False, cache_dir=cache_dir)
+    assert summary["steps"]["find"] == {"cached": True}
+    assert "STEP_CACHED:find" in capsys.readouterr().out
+    with open(summary["reports"]["output_file"]) as f:
+        assert f.read().splitlines() == [os.path.join(codebase, "a.py"), os.path.join(codebase, "b.py")]
+
+
+def test_resolve_input(tmp_path):
+    output = tmp_path / "produce_output.txt"
+    output.write_text(" value \n")
+    workflow = {"steps": [
+        {"name": "produce", "outputs": {"output_file": "{workflow.outputs.x}"}},
+        {"name": "find", "outputs": {}, "returns": {"files": "paths"}},
+    ]}
+
+    def resolve(key, value):
+        return resolve_input(
+            key, value, workflow, {"path": "/src"}, "/logs",
+            lambda step_name, output_key: str(output), lambda step_name, output_key: ["/src/a.py"],
+        )
+
+    assert resolve("path", "{workflow.inputs.path}") == "/src"
+    assert resolve("since", "{workflow.inputs.since}") is None
+    assert resolve("log_dir", "{workflow.log_dir}") == "/logs"
+    assert resolve("steps", "{workflow.all_steps}") == ["produce", "find"]
+    assert resolve("input_file", "{steps.produce.outputs.output_file}") == str(output)
+    assert resolve("text", "{steps.produce.outputs.output_file}") == "value"
+    assert resolve("text", "{steps.find.outputs.files}") == ["/src/a.py"]
+    assert resolve("input_files", ["{workflow.inputs.path}", "{steps.find.outputs.files}"]) == ["/src", ["/src/a.py"]]
+    assert resolve("limit", 3) == 3
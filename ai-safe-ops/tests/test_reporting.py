@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from ai_safe_ops.findings import FindingWriter
+from ai_safe_ops.reporting import FindingAggregator, SarifWriter, describe, relative_file
+from ai_safe_ops.run_store import RunStore
+from ai_safe_ops.steps.report.generate_governance_report import generate_governance_report
+
+FINDINGS = [
+    {"type": "SECRET", "risk_level": "Low", "file": "/repo/app/a.py", "line": 1},
+    {"type": "SECRET", "risk_level": "High", "file": "app/a.py", "line": 2, "diff_status": "new"},
+    {"type": "SECRET", "risk_level": "High", "file": "app\\b.py", "line": 3},
+    {"type": "PII_EXPOSURE", "risk_level": "Medium", "file": "app/b.py", "line": 4, "pii_type": "EMAIL", "value": "a@b.io"},
+]
+
+
+@pytest.mark.parametrize(
+    "file_path, root, expected",
+    [
+        ("/repo/app/a.py", "/repo", "app/a.py"),
+        ("/other/a.py", "/repo", "/other/a.py"),
+        ("/repo/a.py", None, "/repo/a.py"),
+        ("./app\\b.py", "/repo", "app/b.py"),
+    ],
+)
+def test_relative_file(file_path, root, expected):
+    assert relative_file(file_path, root) == expected
+
+
+def test_describe():
+    assert describe({"description": "Hard-coded key."}) == "Hard-coded key."
+    assert describe({"pii_type": "PHONE_NUMBER"}) == "Possible phone number in source."
+    assert describe({"type": "CONFIG_SECRET"}) == "Config secret."
+
+
+def test_aggregator_counts_findings_in_one_pass():
+    aggregator = FindingAggregator(root="/repo")
+    for finding in FINDINGS:
+        aggregator.add(finding)
+    assert aggregator.by_type() == [("SECRET", "High", 2, 1), ("PII_EXPOSURE", "Medium", 1, 0), ("SECRET", "Low", 1, 0)]
+    assert aggregator.top_files() == [("app/a.py", 2, 1), ("app/b.py", 2, 1)]
+    assert aggregator.summary() == {
+        "total": 4,
+        "new": 1,
+        "by_risk": {"High": 2, "Medium": 1, "Low": 1},
+        "by_type": {"SECRET": {"High": 2, "Low": 1}, "PII_EXPOSURE": {"Medium": 1}},
+        "top_files": [{"file": "app/a.py", "findings": 2, "high": 1}, {"file": "app/b.py", "findings": 2, "high": 1}],
+        "listed": {"SECRET": 3, "PII_EXPOSURE": 1},
+    }
+
+
+def test_aggregator_keeps_the_most_severe_findings_of_each_type():
+    aggregator = FindingAggregator(section_cap=2)
+    findings = [{"type": "SECRET", "risk_level": level, "line": line} for line, level in enumerate(["Low", "High", "Medium", "High", "Info"])]
+    for finding in findings:
+        aggregator.add(finding)
+    # Earlier findings win ties.
+    assert aggregator.section("SECRET") == [findings[1], findings[3]]
+    assert aggregator.section("PII_EXPOSURE") == []
+    assert aggregator.summary()["listed"] == {"SECRET": 2}
+
+
+def test_sarif_log_is_streamed_with_relative_locations(tmp_path):
+    output_file = tmp_path / "report.sarif"
+    with SarifWriter(str(output_file), root="/repo") as writer:
+        for finding in FINDINGS + [{"type": "SECRET", "file": "/elsewhere/c d.py"}, {"type": "BIAS_TERM", "term": "x"}]:
+            writer.add(finding)
+    assert writer.count == 6
+
+    log = json.loads(output_file.read_text())
+    run, = log["runs"]
+    assert log["version"] == "2.1.0"
+    assert [(rule["id"], rule["defaultConfiguration"]["level"]) for rule in run["tool"]["driver"]["rules"]] == [
+        ("BIAS_TERM", "none"), ("PII_EXPOSURE", "warning"), ("SECRET", "note"),
+    ]
+    locations = [result.get("locations", [{}])[0].get("physicalLocation") for result in run["results"]]
+    assert locations[0] == {"artifactLocation": {"uri": "app/a.py", "uriBaseId": "%SRCROOT%"}, "region": {"startLine": 1}}
+    assert locations[2]["artifactLocation"]["uri"] == "app/b.py"
+    assert locations[4] == {"artifactLocation": {"uri": "file:///elsewhere/c%20d.py"}}
+    assert locations[5] is None
+    assert run["results"][3]["properties"] == {"risk_level": "Medium", "pii_type": "EMAIL"}
+    assert "a@b.io" not in output_file.read_text()
+
+
+def test_empty_sarif_log_is_valid_json(tmp_path):
+    output_file = tmp_path / "report.sarif"
+    SarifWriter(str(output_file)).close()
+    assert json.loads(output_file.read_text())["runs"][0]["results"] == []
+
+
+def test_governance_report_is_the_same_with_and_without_a_run_store(tmp_path):
+    findings_file = str(tmp_path / "classified.jsonl")
+    with FindingWriter(findings_file) as writer:
+        writer.write_all([{**finding, "file": relative_file(finding["file"])} for finding in FINDINGS[1:]])
+    store_path = str(tmp_path / "runs.sqlite")
+    with RunStore(store_path) as store:
+        store.start_run("run", "governance_workflow")
+        store.record_output("run", "classify_risks", "output_file", findings_file, "findings")
+
+    reports = []
+    for name, store_args in (("plain", {}), ("stored", {"run_store_path": store_path, "run_id": "run"})):
+        output_file = tmp_path / f"{name}.md"
+        summary_file = tmp_path / f"{name}.json"
+        generate_governance_report(
+            findings_file, str(output_file), "logs", ["scan_data_handling"],
+            summary_file=str(summary_file), codebase_path="/repo", **store_args,
+        )
+        reports.append((output_file.read_text(), json.loads(summary_file.read_text())))
+    assert reports[0] == reports[1]
+    markdown, summary = reports[0]
+    assert "| SECRET | High | 2 |" in markdown
+    assert "`app/b.py`: 2 finding(s), 1 High" in markdown
+    assert "### 🛡️ **Secret**" in markdown
+    assert summary["total"] == 3
@@ -0,0 +1,100 @@
+import json
+import sqlite3
+
+import pytest
+
+from ai_safe_ops import run_store
+from ai_safe_ops.findings import FindingWriter
+from ai_safe_ops.run_store import RunStore
+
+FINDINGS = [
+    {"type": "SECRET", "risk_level": "Low", "file": "a.py", "line": 1},
+    {"type": "SECRET", "risk_level": "High", "file": "a.py", "line": 1, "diff_status": "new"},
+    {"type": "PII_EXPOSURE", "risk_level": "High", "file": "b.py", "line": 4, "pii_type": "EMAIL"},
+    {"type": "PII_EXPOSURE", "risk_level": "High", "file": "b.py", "line": 9, "pii_type": "EMAIL"},
+    {"type": "PII_EXPOSURE", "risk_level": "Medium", "pii_type": "PHONE_NUMBER"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with RunStore(str(tmp_path / "store" / "runs.sqlite")) as store:
+        store.start_run("run", "workflow", str(tmp_path))
+        yield store
+
+
+def write_findings(path, findings):
+    with FindingWriter(str(path)) as writer:
+        writer.write_all(findings)
+    return str(path)
+
+
+def test_findings_outputs_are_loaded_and_aggregated(store, tmp_path):
+    store.record_output("run", "scan", "output_file", write_findings(tmp_path / "findings.jsonl", FINDINGS), "findings")
+    assert store.count_findings("run", "scan") == [
+        ("PII_EXPOSURE", "High", 2, 0),
+        ("SECRET", "High", 1, 1),
+        ("PII_EXPOSURE", "Medium", 1, 0),
+        ("SECRET", "Low", 1, 0),
+    ]
+    assert store.count_by_field("run", "scan", "pii_type") == [(None, 2), ("EMAIL", 2), ("PHONE_NUMBER", 1)]
+    assert store.top_files("run", "scan") == [("a.py", 2, 1), ("b.py", 2, 2)]
+    assert list(store.count_by_location("run", "scan")) == [(None, None, 1), ("a.py", 1, 2), ("b.py", 4, 1), ("b.py", 9, 1)]
+    assert store.count_findings("run", "other") == []
+
+
+def test_re_recording_an_output_replaces_only_its_own_findings(store, tmp_path):
+    first = write_findings(tmp_path / "first.jsonl", FINDINGS[:2])
+    second = write_findings(tmp_path / "second.jsonl", FINDINGS[2:])
+    store.record_output("run", "scan", "first_file", first, "findings")
+    store.record_output("run", "scan", "second_file", second, "findings")
+    write_findings(tmp_path / "first.jsonl", FINDINGS[:1])
+    store.record_output("run", "scan", "first_file", first, "findings")
+    assert sum(count for _, _, count, _ in store.count_findings("run", "scan")) == 4
+
+
+def test_outputs_are_recorded_with_their_content_up_to_a_size(store, tmp_path, monkeypatch):
+    small, large = tmp_path / "small.txt", tmp_path / "large.txt"
+    small.write_text("report")
+    large.write_text("x" * 10)
+    monkeypatch.setattr(run_store, "MAX_STORED_OUTPUT_SIZE", 8)
+    store.record_output("run", "report", "output_file", str(small))
+    store.record_output("run", "ingest", "output_file", str(large))
+    store.record_output("run", "find", "output_file", str(tmp_path / "missing.txt"), "findings")
+    rows = store.connection.execute("SELECT step, size, content FROM outputs ORDER BY step").fetchall()
+    assert rows == [("find", None, None), ("ingest", 10, None), ("report", 6, b"report")]
+    assert store.step_of_output("run", str(small)) == "report"
+    assert store.step_of_output("run", str(tmp_path / "other.txt")) is None
+
+
+def test_bandit_reports_and_manifests(store, tmp_path):
+    bandit_file = tmp_path / "bandit.json"
+    bandit_file.write_text(json.dumps({"results": [{"issue_severity": "MEDIUM", "filename": "c.py", "line_number": 3, "test_id": "B101"}]}))
+    manifest_file = tmp_path / "manifest.json"
+    manifest_file.write_text(json.dumps({"files": [{"path": "c.py", "size": 10, "language": "python", "lines": 2}]}))
+    store.record_output("run", "bandit", "output_file", str(bandit_file), "bandit")
+    store.record_output("run", "ingest", "manifest_file", str(manifest_file), "manifest")
+    assert store.count_findings("run", "bandit") == [("STATIC_CODE", "Medium", 1, 0)]
+    assert store.count_by_field("run", "bandit", "test_id") == [("B101", 1)]
+    assert store.connection.execute("SELECT path, language, lines FROM files").fetchall() == [("c.py", "python", 2)]
+
+
+def test_unknown_output_kinds_are_rejected(store, tmp_path):
+    with pytest.raises(ValueError, match="Unknown output kind 'sarif'"):
+        store.record_output("run", "scan", "output_file", str(tmp_path / "x.txt"), "sarif")
+
+
+def test_runs_are_finished_with_their_status(store):
+    store.finish_run("run", "failed")
+    assert store.connection.execute("SELECT workflow, status FROM runs").fetchall() == [("workflow", "failed")]
+
+
+def test_stores_without_the_findings_output_column_are_migrated(tmp_path):
+    db_path = str(tmp_path / "runs.sqlite")
+    connection = sqlite3.connect(db_path)
+    connection.execute("CREATE TABLE findings (id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, step TEXT NOT NULL, type TEXT, risk_level TEXT, file TEXT, line INTEGER, diff_status TEXT, data TEXT NOT NULL)")
+    connection.close()
+    with RunStore(db_path) as store:
+        store.start_run("run", "workflow")
+        store.record_output("run", "scan", "output_file", write_findings(tmp_path / "findings.jsonl", FINDINGS[:1]), "findings")
+        assert store.connection.execute("SELECT output FROM findings").fetchall() == [("output_file",)]
@@ -0,0 +1,45 @@
+import json
+import subprocess
+
+from ai_safe_ops.diff_scope import write_diff_scope
+from ai_safe_ops.findings import iter_findings
+from ai_safe_ops.steps.analyze.scan_config_files import scan_config_files
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def make_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "app").mkdir(parents=True)
+    (repo / "app" / "settings.json").write_text(json.dumps({"db": {"password": "x"}}))
+    (repo / "app" / "other.yaml").write_text("api_key: x\n")
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "initial")
+    return repo
+
+
+def test_findings_have_paths_relative_to_the_codebase(tmp_path):
+    repo = make_repo(tmp_path)
+    output_file = str(tmp_path / "findings.jsonl")
+    scan_config_files(str(repo), output_file)
+    findings = sorted(iter_findings(output_file), key=lambda finding: finding["file"])
+    assert [(finding["file"], finding["key_path"]) for finding in findings] == [
+        ("app/other.yaml", "api_key"),
+        ("app/settings.json", "db.password"),
+    ]
+
+
+def test_diff_scope_with_a_relative_codebase_path(tmp_path, monkeypatch):
+    repo = make_repo(tmp_path)
+    (repo / "app" / "settings.json").write_text(json.dumps({"db": {"password": "y"}}))
+    (repo / "app" / ".env").write_text("SECRET_KEY=z\n")
+    monkeypatch.chdir(tmp_path)
+    scope_file = str(tmp_path / "scope.json")
+    write_diff_scope("./repo", "HEAD", scope_file)
+
+    output_file = str(tmp_path / "findings.jsonl")
+    scan_config_files("./repo", output_file, diff_scope_file=scope_file)
+    assert sorted(finding["file"] for finding in iter_findings(output_file)) == ["app/.env", "app/settings.json"]
@@ -0,0 +1,28 @@
+import json
+import os
+
+from ai_safe_ops.findings import iter_findings
+from ai_safe_ops.main import build_arg_parser
+from ai_safe_ops.steps.analyze.scan_data_handling import scan_data_handling
+
+WORKFLOW_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "ai_safe_ops", "workflows")
+
+
+def test_patterns_file_is_a_workflow_input():
+    with open(os.path.join(WORKFLOW_DIR, "governance_workflow.json")) as f:
+        steps = {step["name"]: step for step in json.load(f)["steps"]}
+    assert steps["scan_data_handling"]["inputs"]["patterns_file"] == "{workflow.inputs.patterns_file}"
+    assert build_arg_parser().parse_args(["governance_workflow", ".", "--patterns-file", "p.yaml"]).patterns_file == "p.yaml"
+
+
+def test_scan_with_a_patterns_file(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_bytes(b"Employee ID: EMP-00123\nmail a@b.io\n")
+    patterns_file = tmp_path / "patterns.json"
+    patterns_file.write_text(json.dumps({"EMPLOYEE_ID": {"pattern": r"(?i)emp-\d+", "prefilter": "-"}}))
+    output_file = str(tmp_path / "findings.jsonl")
+    scan_data_handling(str(corpus), output_file, patterns_file=str(patterns_file))
+    assert [(finding["pii_type"], finding["value"], finding["line"]) for finding in iter_findings(output_file)] == [
+        ("EMPLOYEE_ID", "EMP-00123", 1),
+        ("EMAIL", "a@b.io", 2),
+    ]
@@ -0,0 +1,196 @@
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from ai_safe_ops import scheduler
+from ai_safe_ops.scheduler import StepFailedError, StepTimeoutError, build_step_graph, find_step_references, run_step_graph
+
+
+def step(name, **inputs):
+    return {"name": name, "inputs": inputs}
+
+
+def test_find_step_references_searches_lists_and_dicts():
+    value = {"a": "{steps.one.outputs.x}", "b": ["{steps.two.outputs.y}", 3], "c": "{workflow.inputs.path}"}
+    assert find_step_references(value) == [("one", "x"), ("two", "y")]
+
+
+def test_build_step_graph_maps_steps_to_their_dependencies():
+    graph = build_step_graph([
+        step("ingest"),
+        step("scan", corpus="{steps.ingest.outputs.output_file}"),
+        step("report", files=["{steps.ingest.outputs.output_file}", "{steps.scan.outputs.output_file}"]),
+    ])
+    assert graph == {"ingest": set(), "scan": {"ingest"}, "report": {"ingest", "scan"}}
+    assert list(graph) == ["ingest", "scan", "report"]
+
+
+def test_build_step_graph_rejects_unknown_steps():
+    with pytest.raises(ValueError, match="'scan' references unknown step 'ingest'"):
+        build_step_graph([step("scan", corpus="{steps.ingest.outputs.output_file}")])
+
+
+def test_build_step_graph_rejects_cycles():
+    with pytest.raises(ValueError, match="dependency cycle between steps: a, b"):
+        build_step_graph([
+            step("root"),
+            step("a", x="{steps.b.outputs.x}", root="{steps.root.outputs.x}"),
+            step("b", x="{steps.a.outputs.x}"),
+        ])
+
+
+# Step functions; the step processes are forked from the test process and find them in this module.
+
+def succeed():
+    pass
+
+
+def fail():
+    raise ValueError("boom")
+
+
+def fail_unpicklably():
+    error = ValueError("cannot be sent")
+    error.callback = lambda: None
+    raise error
+
+
+def return_value():
+    return {"files": ["a.py"]}
+
+
+def return_unpicklable():
+    return lambda: None
+
+
+def fail_until(counter_file, failures):
+    with open(counter_file, "a+") as f:
+        f.write("x")
+        f.seek(0)
+        attempt = len(f.read())
+    if attempt <= failures:
+        raise ValueError(f"attempt {attempt} failed")
+
+
+def hang(pid_file):
+    child = subprocess.Popen(["sleep", "60"])
+    with open(pid_file, "w") as f:
+        f.write(str(child.pid))
+    time.sleep(60)
+
+
+class Run:
+    """Runs a graph of the step functions above and records the scheduler's callbacks."""
+
+    def __init__(self, graph, functions, kwargs=None):
+        self.graph = graph
+        self.functions = functions
+        self.kwargs = kwargs or {}
+        self.started = []
+        self.done = []
+        self.events = []
+        self.results = {}
+
+    def on_step_done(self, step_name, metrics, result):
+        self.done.append(step_name)
+        self.results[step_name] = result
+
+    def __call__(self, **options):
+        run_step_graph(
+            self.graph,
+            lambda step_name: (__name__, self.functions[step_name], self.kwargs.get(step_name, {})),
+            self.started.append,
+            self.on_step_done,
+            on_step_event=lambda step_name, event, error: self.events.append((step_name, event)),
+            **options,
+        )
+
+
+def test_a_failure_cancels_dependents_and_independent_steps_complete():
+    run = Run(
+        {"ingest": set(), "scan": {"ingest"}, "report": {"scan"}, "other": set()},
+        {"ingest": "fail", "scan": "succeed", "report": "succeed", "other": "succeed"},
+    )
+    with pytest.raises(StepFailedError, match="boom") as excinfo:
+        run()
+    assert excinfo.value.step_name == "ingest"
+    assert run.done == ["other"]
+    assert sorted(run.events) == [("ingest", "failed"), ("report", "cancelled"), ("scan", "cancelled")]
+
+
+def test_failed_steps_are_retried_with_backoff(tmp_path, monkeypatch):
+    delays = []
+    sleep = scheduler.asyncio.sleep
+
+    async def record_delay(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(scheduler.asyncio, "sleep", record_delay)
+    counter_file = str(tmp_path / "attempts")
+    run = Run({"scan": set()}, {"scan": "fail_until"}, {"scan": {"counter_file": counter_file, "failures": 2}})
+    run(step_options={"scan": {"retries": 2}})
+    assert run.done == ["scan"]
+    assert run.events == [("scan", "retry"), ("scan", "retry")]
+    assert delays == [scheduler.RETRY_DELAY, scheduler.RETRY_DELAY * 2]
+
+
+def test_a_step_failing_after_its_retries_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler, "RETRY_DELAY", 0)
+    counter_file = str(tmp_path / "attempts")
+    run = Run({"scan": set()}, {"scan": "fail_until"}, {"scan": {"counter_file": counter_file, "failures": 5}})
+    with pytest.raises(StepFailedError, match="attempt 2 failed"):
+        run(step_options={"scan": {"retries": 1}})
+    assert run.events == [("scan", "retry"), ("scan", "failed")]
+
+
+def is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # A zombie has exited and only waits to be reaped.
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_a_timed_out_step_is_stopped_with_its_subprocesses(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler, "TERMINATE_GRACE_PERIOD", 1.0)
+    pid_file = tmp_path / "pid"
+    run = Run({"scan": set(), "report": {"scan"}}, {"scan": "hang", "report": "succeed"}, {"scan": {"pid_file": str(pid_file)}})
+    started = time.monotonic()
+    with pytest.raises(StepFailedError) as excinfo:
+        run(step_options={"scan": {"timeout": 0.5}})
+    assert time.monotonic() - started < 10
+    assert isinstance(excinfo.value.__cause__, StepTimeoutError)
+    assert run.events == [("scan", "failed"), ("report", "cancelled")]
+    deadline = time.monotonic() + 5
+    while is_running(int(pid_file.read_text())) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not is_running(int(pid_file.read_text()))
+
+
+def test_an_unpicklable_exception_is_reported_by_type_and_message():
+    run = Run({"scan": set()}, {"scan": "fail_unpicklably"})
+    with pytest.raises(StepFailedError, match="ValueError: cannot be sent"):
+        run()
+
+
+@pytest.mark.parametrize("executor", [False, True])
+def test_return_values_are_passed_to_on_step_done(executor):
+    run = Run({"find": set()}, {"find": "return_value"})
+    if executor:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            run(executor=pool)
+    else:
+        run()
+    assert run.results == {"find": {"files": ["a.py"]}}
+
+
+def test_an_unpicklable_return_value_fails_the_step():
+    run = Run({"find": set(), "report": {"find"}}, {"find": "return_unpicklable", "report": "succeed"})
+    with pytest.raises(StepFailedError, match="Can.t pickle"):
+        run()
+    assert run.events == [("find", "failed"), ("report", "cancelled")]
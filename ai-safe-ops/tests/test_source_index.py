@@ -0,0 +1,80 @@
+import mmap
+
+import pytest
+
+from ai_safe_ops import source_index
+from ai_safe_ops.source_index import SourceIndex
+
+CORPUS = b"header\n\nFILE: a.py\nx = 1\ny = 2\n\nFILE: b.py\nprint()\n"
+A_START = CORPUS.index(b"x = 1")
+B_START = CORPUS.index(b"print()")
+FILES = [
+    {"path": "a.py", "start": A_START, "end": A_START + len(b"x = 1\ny = 2\n")},
+    {"path": "b.py", "start": B_START, "end": len(CORPUS)},
+]
+
+
+@pytest.fixture
+def corpus_file(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_bytes(CORPUS)
+    return str(path)
+
+
+def test_line_starts_follow_every_newline():
+    assert source_index._line_starts(b"ab\n\ncd\n") == [3, 4, 7]
+    assert source_index._line_starts(b"no newline") == []
+    assert source_index._line_starts(b"a\nb", base=10) == [12]
+
+
+def test_build_accepts_bytes_bytearray_and_mmap(corpus_file):
+    expected = list(SourceIndex.build(CORPUS).line_starts)
+    assert list(SourceIndex.build(bytearray(CORPUS)).line_starts) == expected
+    with open(corpus_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        assert list(SourceIndex.build(data).line_starts) == expected
+
+
+def test_build_from_file_matches_build_across_block_boundaries(corpus_file, monkeypatch):
+    monkeypatch.setattr(source_index, "BLOCK_SIZE", 5)
+    assert list(SourceIndex.build_from_file(corpus_file).line_starts) == list(SourceIndex.build(CORPUS).line_starts)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = SourceIndex.build(CORPUS)
+    index_file = str(tmp_path / "index.bin")
+    index.save(index_file)
+    assert SourceIndex.load(index_file).line_starts == index.line_starts
+
+
+@pytest.mark.parametrize(
+    "offset, expected",
+    [
+        (0, (None, 1, 1)),
+        (3, (None, 1, 4)),
+        (CORPUS.index(b"\nFILE: a.py"), (None, 2, 1)),
+        (A_START, ("a.py", 1, 1)),
+        (A_START + 4, ("a.py", 1, 5)),
+        (CORPUS.index(b"y = 2"), ("a.py", 2, 1)),
+        (CORPUS.index(b"= 2"), ("a.py", 2, 3)),
+        (B_START + 6, ("b.py", 1, 7)),
+    ],
+)
+def test_locate_maps_offsets_to_file_line_and_column(offset, expected):
+    assert SourceIndex.build(CORPUS, FILES).locate(offset) == expected
+
+
+def test_locate_outside_files_refers_to_corpus_lines():
+    index = SourceIndex.build(CORPUS, FILES)
+    offset = CORPUS.index(b"FILE: b.py")
+    assert index.file_at(offset) is None
+    assert index.locate(offset) == (None, 7, 1)
+
+
+def test_for_corpus_prefers_a_saved_index(corpus_file, tmp_path):
+    index_file = str(tmp_path / "index.bin")
+    SourceIndex.build(CORPUS).save(index_file)
+    manifest = {"files": FILES}
+    loaded = SourceIndex.for_corpus(corpus_file, index_file, manifest)
+    built = SourceIndex.for_corpus(corpus_file, str(tmp_path / "missing.bin"), manifest)
+    assert loaded.line_starts == built.line_starts
+    assert loaded.locate(B_START) == built.locate(B_START) == ("b.py", 1, 1)
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from ai_safe_ops.steps.scan.scan_dependencies import open_vulnerability_service
+from ai_safe_ops.vulndb import FallbackVulnerabilityService, VulnerabilityDatabase, VulnerabilityServiceError, import_osv
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "osv_pypi.json")
+
+
+@pytest.fixture
+def database(tmp_path):
+    db_path = str(tmp_path / "vulndb.sqlite")
+    import_osv(db_path, FIXTURE)
+    with VulnerabilityDatabase(db_path) as database:
+        yield database
+
+
+class LiveService:
+    def __init__(self, error=None):
+        self.error = error
+        self.queries = []
+
+    def query(self, name, version):
+        self.queries.append((name, version))
+        if self.error:
+            raise self.error
+        return [{"id": "LIVE-1", "fix_versions": [], "description": "", "aliases": []}]
+
+    def close(self):
+        pass
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_import_skips_withdrawn_and_other_ecosystems(tmp_path):
+    assert import_osv(str(tmp_path / "vulndb.sqlite"), FIXTURE) == 4
+
+
+def test_import_replaces_previous_content(tmp_path, database):
+    assert import_osv(database.path, FIXTURE) == 4
+    assert ids(database.query("requests", "2.19.0")) == ["PYSEC-0000-0001"]
+
+
+def test_query_normalizes_package_names(database):
+    assert ids(database.query("REQUESTS", "2.19.0")) == ["PYSEC-0000-0001"]
+    assert ids(database.query("Some.Package", "1.0")) == ["PYSEC-0000-0004"]
+
+
+@pytest.mark.parametrize(
+    "name, version, expected",
+    [
+        ("requests", "2.19.0", ["PYSEC-0000-0001"]),
+        ("requests", "2.20.0", []),
+        ("requests", "2.20.0rc1", ["PYSEC-0000-0001"]),
+        ("jinja2", "1.9", []),
+        ("jinja2", "2.0", ["PYSEC-0000-0002"]),
+        ("jinja2", "2.10", ["PYSEC-0000-0002"]),
+        ("jinja2", "2.10.1", []),
+        ("jinja2", "3.1.2", ["PYSEC-0000-0002"]),
+        ("urllib3", "1.23", []),
+        ("urllib3", "1.24.1", ["PYSEC-0000-0003"]),
+        ("urllib3", "1.24.2", []),
+        ("some-package", "1.0.post1", ["PYSEC-0000-0004"]),
+        ("some-package", "1.1", []),
+    ],
+)
+def test_query_matches_version_ranges(database, name, version, expected):
+    assert ids(database.query(name, version)) == expected
+
+
+def test_query_reports_fix_versions_above_the_version(database):
+    result = database.query("requests", "2.19.0")[0]
+    assert result["fix_versions"] == ["2.20.0"]
+    assert result["description"] == "Credentials leaked on redirect"
+    assert result["aliases"] == ["CVE-0000-0001"]
+    assert database.query("jinja2", "3.1.2")[0]["fix_versions"] == []
+
+
+def test_has_package(database):
+    assert database.has_package("Requests")
+    assert database.has_package("some_package")
+    assert not database.has_package("flask")
+
+
+def test_fallback_asks_the_live_service_about_unknown_packages_only(database):
+    live = LiveService()
+    service = FallbackVulnerabilityService(database, live)
+    assert ids(service.query("requests", "2.20.0")) == []
+    assert ids(service.query("flask", "2.0.0")) == ["LIVE-1"]
+    assert live.queries == [("flask", "2.0.0")]
+
+
+def test_fallback_uses_the_database_when_the_live_lookup_fails(database):
+    service = FallbackVulnerabilityService(database, LiveService(VulnerabilityServiceError("unreachable")))
+    assert service.query("flask", "2.0.0") == []
+
+
+def test_database_misses_mean_no_advisories_unless_the_live_fallback_is_requested(database):
+    service = open_vulnerability_service(database.path)
+    assert isinstance(service, VulnerabilityDatabase)
+    assert service.query("flask", "2.0.0") == []
+    service.close()
+    service = open_vulnerability_service(database.path, offline=True, live_fallback=True)
+    assert isinstance(service, VulnerabilityDatabase)
+    service.close()
@@ -2,11 +2,14 @@ package main
 
 import (
 	"bufio"
+	"encoding/json"
 	"fmt"
 	"io"
+	"net"
 	"os"
 	"os/exec"
 	"path/filepath"
+	"strconv"
 	"strings"
 	"time"
 
@@ -37,6 +40,7 @@ var (
 type Config struct {
 	Logging       LoggingConfig       `yaml:"logging"`
 	OpenTelemetry OpenTelemetryConfig `yaml:"opentelemetry"`
+	Execution     ExecutionConfig     `yaml:"execution"`
 }
 type LoggingConfig struct {
 	EnableLocalFiles bool   `yaml:"enable_local_files"`
@@ -47,6 +51,15 @@ type OpenTelemetryConfig struct {
 	ExporterType string `yaml:"exporter_type"`
 	Endpoint     string `yaml:"endpoint"`
 }
+type ExecutionConfig struct {
+	// MaxWorkers limits how many workflow steps run in parallel. 0 uses the number of CPUs.
+	MaxWorkers int `yaml:"max_workers"`
+	// DisableCache runs every step even if its result is in the step result cache.
+	DisableCache bool `yaml:"disable_cache"`
+	// WorkerSocket is the Unix socket of a running `ai_safe_ops.main serve` worker.
+	// Empty uses $AI_SAFE_OPS_SOCKET or ~/.ai-safe-ops/worker.sock.
+	WorkerSocket string `yaml:"worker_socket"`
+}
 
 func loadConfig() (*Config, error) {
 	configPath := filepath.Join("..", ".ai-safe-ops", "config.yml")
@@ -87,6 +100,10 @@ func getDefaultConfig() *Config {
 			ExporterType: "console",
 			Endpoint:     "http://localhost:4318/v1/traces",
 		},
+		Execution: ExecutionConfig{
+			MaxWorkers:   0,
+			DisableCache: false,
+		},
 	}
 }
 
@@ -107,12 +124,79 @@ const (
 	statusPending stepStatus = iota
 	statusRunning
 	statusDone
+	statusCached
 	statusError
+	statusCancelled
 )
 
 type workflowStep struct {
-	name   string
-	status stepStatus
+	name     string
+	status   stepStatus
+	metrics  string
+	progress string
+}
+
+// stepMetrics is the JSON payload of a STEP_METRICS line.
+type stepMetrics struct {
+	WallS     float64 `json:"wall_s"`
+	CPUS      float64 `json:"cpu_s"`
+	PeakRSSMB float64 `json:"peak_rss_mb"`
+	BytesRead *int64  `json:"bytes_read"`
+	Findings  *int    `json:"findings"`
+}
+
+// stepProgress is the JSON payload of a STEP_PROGRESS line.
+type stepProgress struct {
+	Done      int64    `json:"done"`
+	Total     *int64   `json:"total"`
+	Unit      string   `json:"unit"`
+	Bytes     int64    `json:"bytes"`
+	Rate      float64  `json:"rate"`
+	BytesPerS float64  `json:"bytes_per_s"`
+	ETAS      *float64 `json:"eta_s"`
+}
+
+// formatStepProgress renders a STEP_PROGRESS payload as a short status for a running step.
+func formatStepProgress(payload string) string {
+	var progress stepProgress
+	if err := json.Unmarshal([]byte(payload), &progress); err != nil {
+		return ""
+	}
+	var parts []string
+	if progress.Total != nil && *progress.Total > 0 {
+		parts = append(parts, fmt.Sprintf("%d%%", progress.Done*100 / *progress.Total), fmt.Sprintf("%d/%d %s", progress.Done, *progress.Total, progress.Unit))
+	} else {
+		parts = append(parts, fmt.Sprintf("%d %s", progress.Done, progress.Unit))
+	}
+	if progress.Unit == "bytes" {
+		parts = append(parts, fmt.Sprintf("%.1f MB/s", progress.BytesPerS/(1024*1024)))
+	} else if progress.Rate > 0 {
+		parts = append(parts, fmt.Sprintf("%.1f %s/s", progress.Rate, progress.Unit))
+	}
+	if progress.ETAS != nil {
+		parts = append(parts, "ETA "+(time.Duration(*progress.ETAS)*time.Second).String())
+	}
+	return strings.Join(parts, " · ")
+}
+
+// formatStepMetrics renders a STEP_METRICS payload as a short summary for the step list.
+func formatStepMetrics(payload string) string {
+	var metrics stepMetrics
+	if err := json.Unmarshal([]byte(payload), &metrics); err != nil {
+		return ""
+	}
+	parts := []string{
+		fmt.Sprintf("%.1fs", metrics.WallS),
+		fmt.Sprintf("cpu %.1fs", metrics.CPUS),
+		fmt.Sprintf("%.0f MB", metrics.PeakRSSMB),
+	}
+	if metrics.BytesRead != nil {
+		parts = append(parts, fmt.Sprintf("read %.1f MB", float64(*metrics.BytesRead)/(1024*1024)))
+	}
+	if metrics.Findings != nil {
+		parts = append(parts, fmt.Sprintf("%d findings", *metrics.Findings))
+	}
+	return strings.Join(parts, " · ")
 }
 
 type processOutputMsg struct{ line string }
@@ -237,6 +321,20 @@ func (m mainMenuModel) Update(msg tea.Msg) (tea.Model, tea.Cmd) {
 					m.steps[i].status = statusRunning
 				}
 			}
+		} else if strings.HasPrefix(line, "STEP_PROGRESS:") {
+			stepName, payload, _ := strings.Cut(strings.TrimPrefix(line, "STEP_PROGRESS:"), ";;")
+			for i := range m.steps {
+				if m.steps[i].name == stepName {
+					m.steps[i].progress = formatStepProgress(payload)
+				}
+			}
+		} else if strings.HasPrefix(line, "STEP_METRICS:") {
+			stepName, payload, _ := strings.Cut(strings.TrimPrefix(line, "STEP_METRICS:"), ";;")
+			for i := range m.steps {
+				if m.steps[i].name == stepName {
+					m.steps[i].metrics = formatStepMetrics(payload)
+				}
+			}
 		} else if strings.HasPrefix(line, "STEP_DONE:") {
 			stepName := strings.TrimPrefix(line, "STEP_DONE:")
 			for i := range m.steps {
@@ -244,6 +342,35 @@ func (m mainMenuModel) Update(msg tea.Msg) (tea.Model, tea.Cmd) {
 					m.steps[i].status = statusDone
 				}
 			}
+		} else if strings.HasPrefix(line, "STEP_CACHED:") {
+			stepName := strings.TrimPrefix(line, "STEP_CACHED:")
+			for i := range m.steps {
+				if m.steps[i].name == stepName {
+					m.steps[i].status = statusCached
+				}
+			}
+		} else if strings.HasPrefix(line, "STEP_RETRY:") {
+			stepName, message, _ := strings.Cut(strings.TrimPrefix(line, "STEP_RETRY:"), ";;")
+			for i := range m.steps {
+				if m.steps[i].name == stepName {
+					m.steps[i].progress = "retrying after: " + message
+				}
+			}
+		} else if strings.HasPrefix(line, "STEP_FAILED:") {
+			stepName, message, _ := strings.Cut(strings.TrimPrefix(line, "STEP_FAILED:"), ";;")
+			for i := range m.steps {
+				if m.steps[i].name == stepName {
+					m.steps[i].status = statusError
+					m.steps[i].metrics = message
+				}
+			}
+		} else if strings.HasPrefix(line, "STEP_CANCELLED:") {
+			stepName := strings.TrimPrefix(line, "STEP_CANCELLED:")
+			for i := range m.steps {
+				if m.steps[i].name == stepName {
+					m.steps[i].status = statusCancelled
+				}
+			}
 		}
 		cmds = append(cmds, streamOutput(m.stdoutScanner))
 	case processFinishedMsg:
@@ -354,10 +481,28 @@ func (m mainMenuModel) View() string {
 					statusIcon, style = m.spinner.View(), statusStyle
 				case statusDone:
 					statusIcon, style = successStyle.Render("✅"), lipgloss.NewStyle()
+				case statusCached:
+					statusIcon, style = successStyle.Render("✅"), pendingStyle
 				case statusError:
 					statusIcon, style = errorStyle.Render("❌"), lipgloss.NewStyle()
+				case statusCancelled:
+					statusIcon, style = "⏹", pendingStyle
+				}
+				name := step.name
+				if step.status == statusCached {
+					name += " (cached)"
+				} else if step.status == statusCancelled {
+					name += " (cancelled)"
+				}
+				s.WriteString(fmt.Sprintf("%s %s", statusIcon, style.Render(name)))
+				if step.status == statusRunning && step.progress != "" {
+					s.WriteString("  " + statusStyle.Render(step.progress))
+				} else if step.status == statusError && step.metrics != "" {
+					s.WriteString("  " + errorStyle.Render(step.metrics))
+				} else if step.metrics != "" {
+					s.WriteString("  " + pendingStyle.Render(step.metrics))
 				}
-				s.WriteString(fmt.Sprintf("%s %s\n", statusIcon, style.Render(step.name)))
+				s.WriteString("\n")
 			}
 		}
 		return s.String()
@@ -412,7 +557,24 @@ func doScan(m *mainMenuModel) tea.Cmd {
 			return processFinishedMsg{err: fmt.Errorf("python executable not found at %s. Please run 'python3 -m venv .venv' in the project root directory", pythonExecutable)}
 		}
 	}
-	args := []string{"-m", "ai_safe_ops.main", m.workflow, m.codebase}
+	args := []string{m.workflow, m.codebase}
+	if m.config.Execution.MaxWorkers > 0 {
+		args = append(args, "--max-workers", fmt.Sprint(m.config.Execution.MaxWorkers))
+	}
+	if m.config.Execution.DisableCache {
+		args = append(args, "--no-cache")
+	}
+	if m.config.OpenTelemetry.Enabled {
+		exporter := m.config.OpenTelemetry.ExporterType
+		// Console spans would go to stderr, which the TUI only shows on failure; keep them in the log directory instead.
+		if exporter == "console" && m.config.Logging.EnableLocalFiles {
+			exporter = "file"
+		}
+		args = append(args, "--otel-exporter", exporter)
+		if exporter == "otlp" && m.config.OpenTelemetry.Endpoint != "" {
+			args = append(args, "--otel-endpoint", m.config.OpenTelemetry.Endpoint)
+		}
+	}
 	var logDir string
 	if m.config.Logging.EnableLocalFiles {
 		args = append(args, "--enable-local-logs")
@@ -425,7 +587,16 @@ func doScan(m *mainMenuModel) tea.Cmd {
 		}
 		args = append(args, "--log-dir", logDir)
 	}
-	cmd := exec.Command(pythonExecutable, args...)
+	// Reuse a warm worker if one is listening; otherwise start a fresh interpreter.
+	if conn, err := net.DialTimeout("unix", workerSocketPath(m.config), 200*time.Millisecond); err == nil {
+		scanner, done, err := startWorkerRun(conn, args, projectRoot)
+		if err != nil {
+			return func() tea.Msg { return processFinishedMsg{err: err} }
+		}
+		m.stdoutScanner = scanner
+		return tea.Batch(streamOutput(m.stdoutScanner), waitForWorker(done, logDir), m.spinner.Tick)
+	}
+	cmd := exec.Command(pythonExecutable, append([]string{"-m", "ai_safe_ops.main"}, args...)...)
 	cmd.Dir = projectRoot
 	stdout, _ := cmd.StdoutPipe()
 	stderr, _ := cmd.StderrPipe()
@@ -461,6 +632,73 @@ func waitForExit(c *exec.Cmd, stderr io.ReadCloser, logDir string) tea.Cmd {
 	}
 }
 
+func workerSocketPath(cfg *Config) string {
+	if cfg.Execution.WorkerSocket != "" {
+		return cfg.Execution.WorkerSocket
+	}
+	if path := os.Getenv("AI_SAFE_OPS_SOCKET"); path != "" {
+		return path
+	}
+	home, _ := os.UserHomeDir()
+	return filepath.Join(home, ".ai-safe-ops", "worker.sock")
+}
+
+// workerExitPrefix precedes the exit code the worker sends after the last output line of a run.
+const workerExitPrefix = "SERVER_EXIT:"
+
+// startWorkerRun sends a run request to a warm worker. The returned scanner yields the
+// run's stdout lines (the STEP_* protocol); the channel receives the run's result once
+// the worker has reported its exit code.
+func startWorkerRun(conn net.Conn, args []string, dir string) (*bufio.Scanner, <-chan error, error) {
+	request, err := json.Marshal(map[string]interface{}{"argv": args, "cwd": dir})
+	if err == nil {
+		_, err = conn.Write(append(request, '\n'))
+	}
+	if err != nil {
+		conn.Close()
+		return nil, nil, fmt.Errorf("could not send request to worker: %w", err)
+	}
+
+	reader, writer := io.Pipe()
+	done := make(chan error, 1)
+	go func() {
+		defer conn.Close()
+		defer writer.Close()
+		lines := bufio.NewReader(conn)
+		for {
+			line, err := lines.ReadString('\n')
+			if strings.HasPrefix(line, workerExitPrefix) {
+				code, _ := strconv.Atoi(strings.TrimSpace(strings.TrimPrefix(line, workerExitPrefix)))
+				errOutput, _ := io.ReadAll(lines)
+				if code != 0 {
+					done <- fmt.Errorf("python script error:\n\n%s", string(errOutput))
+				} else {
+					done <- nil
+				}
+				return
+			}
+			if line != "" {
+				io.WriteString(writer, line)
+			}
+			if err != nil {
+				done <- fmt.Errorf("worker closed the connection before the run finished")
+				return
+			}
+		}
+	}()
+	return bufio.NewScanner(reader), done, nil
+}
+
+func waitForWorker(done <-chan error, logDir string) tea.Cmd {
+	reportPath := filepath.Join(logDir, "report_file.txt")
+	return func() tea.Msg {
+		if err := <-done; err != nil {
+			return processFinishedMsg{err: err}
+		}
+		return processFinishedMsg{err: nil, reportPath: reportPath}
+	}
+}
+
 // --- MAIN ---
 func main() {
 	if !isatty.IsTerminal(os.Stdout.Fd()) {